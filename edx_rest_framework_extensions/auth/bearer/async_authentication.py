@@ -0,0 +1,142 @@
+""" Async Bearer Authentication class. """
+
+import asyncio
+import logging
+import weakref
+
+from django.contrib.auth import get_user_model
+from edx_django_utils.monitoring import set_custom_attribute
+from rest_framework import exceptions
+
+from edx_rest_framework_extensions.auth.bearer.authentication import (
+    BearerAuthentication,
+)
+from edx_rest_framework_extensions.exceptions import UserInfoRetrievalFailed
+from edx_rest_framework_extensions.settings import get_setting
+
+
+try:
+    import httpx
+except ImportError as import_error:
+    raise ImportError(
+        'AsyncBearerAuthentication requires httpx, which is installed with the "async" extra: '
+        'pip install edx-drf-extensions[async]'
+    ) from import_error
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBearerAuthentication(BearerAuthentication):
+    """
+    Async variant of ``BearerAuthentication``, for async DRF views that await coroutine ``authenticate`` methods
+    (e.g. views from ``adrf``).
+
+    User info is retrieved with a pooled ``httpx.AsyncClient``, so the round-trip to the OAuth provider does not
+    occupy a thread, and the user is fetched, or created, with ``aget_or_create``. Like ``BearerAuthentication``, it
+    uses the OAUTH2_USER_INFO_URL, pool size, timeout and OAUTH2_LOCAL_JWT_INTROSPECTION settings, the
+    ``process_user_info_response`` hook, and sets the same custom attributes. The user info cache, coalescing and
+    circuit breaker of ``BearerAuthentication`` are not used.
+
+    Requires ``httpx``, installed with the ``async`` extra (``pip install edx-drf-extensions[async]``), and Django
+    4.1 or later.
+    """
+
+    def get_user_info_client(self):
+        """
+        Returns the ``httpx.AsyncClient`` used to retrieve user info.
+
+        The client, and thus its connection pool, is shared by all requests on the running event loop. It is configured
+        with the OAUTH2_USER_INFO_POOL_SIZE and OAUTH2_USER_INFO_MAX_RETRIES settings. Unlike the ``requests.Session``
+        of ``BearerAuthentication``, only connection errors are retried.
+        """
+        loop = asyncio.get_running_loop()
+        client = _user_info_clients.get(loop)
+        if client is None:
+            pool_size = get_setting('OAUTH2_USER_INFO_POOL_SIZE')
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                retries=get_setting('OAUTH2_USER_INFO_MAX_RETRIES'),
+            )
+            client = _user_info_clients[loop] = httpx.AsyncClient(transport=transport)
+        return client
+
+    async def authenticate(self, request):  # pylint: disable=invalid-overridden-method
+        token = self.get_bearer_token(request)
+        if token is None:
+            return None
+
+        output = await self.authenticate_credentials(token)
+        set_custom_attribute("BearerAuthentication", "Success")
+        return output
+
+    async def authenticate_credentials(self, token):  # pylint: disable=invalid-overridden-method
+        """
+        Validate the bearer token against the OAuth provider.
+
+        Arguments:
+            token (str): Access token to validate
+
+        Returns:
+            (tuple): tuple containing:
+
+                user (User): User associated with the access token
+                access_token (str): Access token
+
+        Raises:
+            AuthenticationFailed: The user is inactive, the JWT access token is invalid, or retrieval of user info
+                failed.
+        """
+        user_info = self._get_locally_introspected_user_info(token)
+        if user_info is None:
+            try:
+                user_info = await self.get_user_info(token)
+            except UserInfoRetrievalFailed as authentication_error:
+                msg = 'Failed to retrieve user info. Unable to authenticate.'
+                logger.error(msg)
+                raise exceptions.AuthenticationFailed(msg) from authentication_error
+
+        user, __ = await get_user_model().objects.aget_or_create(username=user_info['username'], defaults=user_info)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return user, token
+
+    async def get_user_info(self, token):  # pylint: disable=invalid-overridden-method
+        """
+        Retrieves the user info from the OAuth provider.
+
+        Arguments:
+            token (str): OAuth2 access token.
+
+        Returns:
+            dict
+
+        Raises:
+            UserInfoRetrievalFailed: Retrieval of user info from the remote server failed.
+        """
+        url = self.get_user_info_url()
+        connect_timeout, read_timeout = self.get_user_info_timeout()
+
+        try:
+            headers = {'Authorization': f'Bearer {token}'}
+            response = await self.get_user_info_client().get(
+                url, headers=headers, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+            )
+        except httpx.HTTPError as error:
+            logger.exception('Failed to retrieve user info due to a request exception.')
+            raise UserInfoRetrievalFailed from error
+
+        if response.status_code == 200:
+            return self.process_user_info_response(response.json())
+        else:
+            msg = 'Failed to retrieve user info. Server [{server}] responded with status [{status}].'.format(
+                server=url,
+                status=response.status_code
+            )
+            raise UserInfoRetrievalFailed(msg, status_code=response.status_code)
+
+
+# The user info clients of the process, per event loop, since an httpx.AsyncClient must not be shared across loops.
+_user_info_clients = weakref.WeakKeyDictionary()
@@ -0,0 +1,141 @@
+""" Cache of OAuth2 user info lookups for BearerAuthentication. """
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.utils.crypto import salted_hmac
+
+from edx_rest_framework_extensions.settings import get_setting
+
+
+class UserInfoCache:
+    """
+    Opt-in TTL cache mapping an OAuth2 access token to its processed user info and the resolved user's id.
+
+    Tokens are never stored; entries are keyed by a keyed (HMAC-SHA256) digest of the token. The cache is enabled
+    when the OAUTH2_USER_INFO_CACHE_TTL setting is set to a positive number of seconds, and may use:
+
+    * an in-process LRU, holding up to OAUTH2_USER_INFO_CACHE_MAX_SIZE entries (``0`` disables it), and/or
+    * the Django cache named by OAUTH2_USER_INFO_CACHE_ALIAS (``None`` disables it).
+
+    When both are used, the in-process LRU is checked first, and is filled from the Django cache on a hit. Its
+    entries are then only kept for up to OAUTH2_USER_INFO_CACHE_LOCAL_TTL seconds, since ``invalidate`` cannot
+    reach the in-process LRU of other processes.
+
+    Entries are kept for an additional OAUTH2_USER_INFO_CACHE_STALE_GRACE_SECONDS, during which they are only
+    returned when stale entries are explicitly allowed (e.g. while the provider's circuit breaker is open).
+    """
+    KEY_PREFIX = 'edx_drf_extensions.bearer_user_info.'
+
+    def __init__(self):
+        self._local_entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_enabled(self):
+        """ Returns True if the cache is enabled. """
+        return bool(self._get_ttl())
+
+    def get(self, token, allow_stale=False):
+        """
+        Returns the cached dict with ``user_info`` and ``user_id`` keys for the token, or None.
+
+        Arguments:
+            token (str): OAuth2 access token.
+            allow_stale (bool): Whether to return an entry older than the TTL, but within the stale grace period.
+        """
+        if not self.is_enabled():
+            return None
+
+        key = self._get_key(token)
+        value = self._get_local(key)
+        if value is None and self._get_alias():
+            value = caches[self._get_alias()].get(key)
+            if value is not None:
+                self._set_local(key, value)
+
+        if value is not None and not allow_stale and time.time() - value['cached_at'] >= self._get_ttl():
+            return None
+        return value
+
+    def set(self, token, user_info, user_id):
+        """
+        Caches the processed user info and the resolved user's id for the token.
+        """
+        if not self.is_enabled():
+            return
+
+        key = self._get_key(token)
+        value = {'user_info': user_info, 'user_id': user_id, 'cached_at': time.time()}
+        self._set_local(key, value)
+        if self._get_alias():
+            caches[self._get_alias()].set(key, value, self._get_timeout())
+
+    def invalidate(self, token):
+        """
+        Removes any cached user info for the token, e.g. when the token is revoked.
+
+        Only the in-process LRU of the calling process is cleared, along with the Django cache. Other processes
+        may keep using their own entry until it expires: after OAUTH2_USER_INFO_CACHE_LOCAL_TTL seconds when
+        the Django cache is used, or after the full TTL when only the in-process LRU is used.
+        """
+        key = self._get_key(token)
+        with self._lock:
+            self._local_entries.pop(key, None)
+        if self._get_alias():
+            caches[self._get_alias()].delete(key)
+
+    def clear_local(self):
+        """ Removes all entries from the in-process LRU. """
+        with self._lock:
+            self._local_entries.clear()
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local_entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local_entries[key]
+                return None
+            self._local_entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value):
+        max_size = get_setting('OAUTH2_USER_INFO_CACHE_MAX_SIZE')
+        if not max_size:
+            return
+        timeout = self._get_timeout()
+        if self._get_alias():
+            timeout = min(timeout, get_setting('OAUTH2_USER_INFO_CACHE_LOCAL_TTL'))
+        with self._lock:
+            self._local_entries[key] = (time.monotonic() + timeout, value)
+            self._local_entries.move_to_end(key)
+            while len(self._local_entries) > max_size:
+                self._local_entries.popitem(last=False)
+
+    def _get_key(self, token):
+        return self.KEY_PREFIX + get_token_digest(token)
+
+    def _get_ttl(self):
+        return get_setting('OAUTH2_USER_INFO_CACHE_TTL')
+
+    def _get_timeout(self):
+        """ Returns how long entries are kept, including the stale grace period. """
+        return self._get_ttl() + get_setting('OAUTH2_USER_INFO_CACHE_STALE_GRACE_SECONDS')
+
+    def _get_alias(self):
+        return get_setting('OAUTH2_USER_INFO_CACHE_ALIAS')
+
+
+def get_token_digest(token):
+    """
+    Returns a keyed (HMAC-SHA256) digest of the access token, so the token itself is never used as a key.
+    """
+    return salted_hmac(UserInfoCache.KEY_PREFIX, token, algorithm='sha256').hexdigest()
+
+
+# The process-wide cache used by BearerAuthentication.
+user_info_cache = UserInfoCache()
@@ -0,0 +1,92 @@
+""" Circuit breaker for the OAuth2 user info endpoint used by BearerAuthentication. """
+
+import threading
+import time
+
+from edx_rest_framework_extensions.settings import get_setting
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker around the requests made to the OAuth2 user info endpoint.
+
+    The breaker is configured with the following settings:
+
+    * OAUTH2_USER_INFO_CIRCUIT_BREAKER_WINDOW_SIZE: the number of most recent calls used to compute the failure rate.
+    * OAUTH2_USER_INFO_CIRCUIT_BREAKER_FAILURE_RATE: the failure rate (0 to 1) over a full window at which the
+      breaker opens.
+    * OAUTH2_USER_INFO_CIRCUIT_BREAKER_SLOW_CALL_SECONDS: calls taking at least this long count as failures.
+    * OAUTH2_USER_INFO_CIRCUIT_BREAKER_OPEN_SECONDS: how long the breaker stays open before letting a single trial
+      call through (half-open). A successful trial closes the breaker, and a failed one opens it again.
+
+    While the breaker is open, calls are rejected without reaching the provider.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def state(self):
+        """ Returns the current state: closed, open or half-open. """
+        return self._state
+
+    def reset(self):
+        """ Closes the breaker and forgets all recorded calls. """
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes = []
+            self._opened_at = None
+            self._is_trial_in_flight = False
+
+    def allow_request(self):
+        """
+        Returns True if a call may be made to the provider, and False if it should fail fast.
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < get_setting('OAUTH2_USER_INFO_CIRCUIT_BREAKER_OPEN_SECONDS'):
+                    return False
+                self._state = self.HALF_OPEN
+                self._is_trial_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                if self._is_trial_in_flight:
+                    return False
+                self._is_trial_in_flight = True
+            return True
+
+    def record(self, is_failure, duration):
+        """
+        Records the outcome of a call to the provider. Calls slower than the configured threshold are failures.
+        """
+        is_failure = is_failure or duration >= get_setting('OAUTH2_USER_INFO_CIRCUIT_BREAKER_SLOW_CALL_SECONDS')
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._is_trial_in_flight = False
+                if is_failure:
+                    self._open()
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes = []
+                return
+
+            window_size = get_setting('OAUTH2_USER_INFO_CIRCUIT_BREAKER_WINDOW_SIZE')
+            self._outcomes.append(is_failure)
+            del self._outcomes[:-window_size]
+            if len(self._outcomes) >= window_size:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= get_setting('OAUTH2_USER_INFO_CIRCUIT_BREAKER_FAILURE_RATE'):
+                    self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes = []
+
+
+# The process-wide circuit breaker used by BearerAuthentication.
+user_info_circuit_breaker = CircuitBreaker()
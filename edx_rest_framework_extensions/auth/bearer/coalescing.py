@@ -0,0 +1,58 @@
+""" Coalescing of concurrent identical user info lookups for BearerAuthentication. """
+
+import threading
+
+
+class _InFlightCall:
+    """ A call in progress, whose outcome is shared with the callers waiting on it. """
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key, so that only one of them runs at a time per process.
+
+    The first caller for a key runs the function, and any caller that arrives with the same key while it is
+    running waits for it and shares its result, or its exception. Once the call completes, the next caller for
+    the key runs the function again; results are not cached.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        #: The number of calls in this process that waited for another call, rather than running the function.
+        self.coalesced_count = 0
+
+    def do(self, key, func):
+        """
+        Runs ``func()``, or waits for the in-flight call with the same key.
+
+        Returns:
+            (tuple): the result of the call, and whether this call was coalesced into another one.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_coalesced = call is not None
+            if is_coalesced:
+                self.coalesced_count += 1
+            else:
+                call = self._calls[key] = _InFlightCall()
+
+        if is_coalesced:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -0,0 +1,109 @@
+""" Tests for the async Bearer authentication class. """
+import asyncio
+import importlib
+import sys
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from edx_rest_framework_extensions.auth.bearer.async_authentication import (
+    AsyncBearerAuthentication,
+)
+from edx_rest_framework_extensions.auth.bearer.tests.utils import StubUserInfoServer
+
+
+class AsyncBearerAuthenticationImportTests(TestCase):
+    """ Tests the import of the async Bearer authentication module without its optional dependency. """
+
+    def test_missing_httpx(self):
+        module_name = 'edx_rest_framework_extensions.auth.bearer.async_authentication'
+        with mock.patch.dict(sys.modules, {'httpx': None}):
+            sys.modules.pop(module_name)
+            with self.assertRaisesRegex(ImportError, r'edx-drf-extensions\[async\]'):
+                importlib.import_module(module_name)
+
+
+class AsyncBearerAuthenticationTests(TestCase):
+    """ Tests for the AsyncBearerAuthentication class, against a local stub server. """
+
+    def setUp(self):
+        super().setUp()
+        self.auth = AsyncBearerAuthentication()
+
+    def _create_request(self, token='abc123'):
+        return RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    async def _authenticate(self, server, request=None):
+        with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': server.url}):
+            return await self.auth.authenticate(request or self._create_request())
+
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.async_authentication.set_custom_attribute')
+    async def test_authenticate_as_new_user(self, mock_set_custom_attribute):
+        with StubUserInfoServer() as server:
+            user, token = await self._authenticate(server)
+
+        self.assertEqual(token, 'abc123')
+        self.assertEqual((user.username, user.email, user.first_name, user.last_name), (
+            'jdoe', 'jdoe@example.com', 'Jane', 'Doê',
+        ))
+        mock_set_custom_attribute.assert_called_with('BearerAuthentication', 'Success')
+
+    async def test_authenticate_existing_user(self):
+        user = await self._get_user('jdoe')
+        with StubUserInfoServer() as server:
+            self.assertEqual(await self._authenticate(server), (user, 'abc123'))
+
+    async def test_authenticate_inactive_user(self):
+        user = await self._get_user('jdoe')
+        user.is_active = False
+        await user.asave()
+        with StubUserInfoServer() as server:
+            with self.assertRaises(AuthenticationFailed):
+                await self._authenticate(server)
+
+    async def test_authenticate_request_status_failure(self):
+        with StubUserInfoServer(status=401) as server:
+            with self.assertRaises(AuthenticationFailed):
+                await self._authenticate(server)
+
+    async def test_authenticate_request_exception(self):
+        with StubUserInfoServer() as server:
+            url = server.url
+        with self.assertRaises(AuthenticationFailed):
+            with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': url}):
+                await self.auth.authenticate(self._create_request())
+
+    async def test_authenticate_without_bearer_token(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION='JWT abc123')
+        with StubUserInfoServer() as server:
+            self.assertIsNone(await self._authenticate(server, request=request))
+            self.assertEqual(server.request_count, 0)
+
+    async def test_client_is_shared(self):
+        with StubUserInfoServer() as server:
+            await self._authenticate(server)
+            await self._authenticate(server)
+        self.assertIs(self.auth.get_user_info_client(), AsyncBearerAuthentication().get_user_info_client())
+
+    async def test_concurrent_requests_do_not_block(self):
+        """ Concurrent lookups overlap their round-trips to a slow provider, rather than running one at a time. """
+        await self._get_user('jdoe')
+        request_count, delay = 10, 0.2
+        with StubUserInfoServer(delay=delay) as server:
+            with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': server.url}):
+                start = time.monotonic()
+                results = await asyncio.gather(
+                    *(self.auth.authenticate(self._create_request()) for __ in range(request_count))
+                )
+                elapsed = time.monotonic() - start
+
+        self.assertEqual([token for __, token in results], ['abc123'] * request_count)
+        self.assertEqual(server.request_count, request_count)
+        self.assertLess(elapsed, request_count * delay / 2)
+
+    async def _get_user(self, username):
+        user, __ = await get_user_model().objects.aget_or_create(username=username)
+        return user
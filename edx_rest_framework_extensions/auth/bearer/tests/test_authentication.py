@@ -1,8 +1,10 @@
 """ Tests for Bearer authentication class. """
 import json
+import threading
 from unittest import mock
 
 import httpretty
+import requests
 from django.contrib.auth import get_user_model
 from django.test import RequestFactory, TestCase, override_settings
 from requests import RequestException
@@ -11,6 +13,17 @@ from rest_framework.exceptions import AuthenticationFailed
 from edx_rest_framework_extensions.auth.bearer.authentication import (
     BearerAuthentication,
 )
+from edx_rest_framework_extensions.auth.bearer.cache import user_info_cache
+from edx_rest_framework_extensions.auth.bearer.circuit_breaker import (
+    CircuitBreaker,
+    user_info_circuit_breaker,
+)
+from edx_rest_framework_extensions.auth.bearer.tests.utils import StubUserInfoServer
+from edx_rest_framework_extensions.auth.jwt.tests.utils import (
+    generate_asymmetric_jwt_token,
+    generate_jwt,
+    generate_latest_version_payload,
+)
 from edx_rest_framework_extensions.tests import factories
 
 
@@ -162,7 +175,339 @@ class BearerAuthenticationTests(AccessTokenMixin, TestCase):
         original_user_count = User.objects.all().count()
         request = self.create_authenticated_request()
 
-        with mock.patch('requests.get', mock.Mock(side_effect=RequestException)):
+        with mock.patch('requests.Session.get', mock.Mock(side_effect=RequestException)):
             self.assertRaises(AuthenticationFailed, self.auth.authenticate, request)
 
         self.assertEqual(User.objects.all().count(), original_user_count)
+
+    @httpretty.activate
+    def test_user_info_session_is_shared(self):
+        """ Verify the pooled session is reused across authentication instances and requests. """
+        self.assert_user_authenticated()
+        self.assertIs(self.auth.get_user_info_session(), BearerAuthentication().get_user_info_session())
+
+    def test_user_info_connections_are_reused(self):
+        """ Verify successive lookups reuse a pooled connection, rather than opening one per request. """
+        with StubUserInfoServer() as server:
+            with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': server.url}):
+                for __ in range(5):
+                    self.auth.get_user_info(self.DEFAULT_TOKEN)
+                    BearerAuthentication().get_user_info(self.DEFAULT_TOKEN)
+            self.assertEqual(server.request_count, 10)
+            self.assertEqual(server.connection_count, 1)
+
+            # Without the pooled session, each request opens its own connection.
+            for __ in range(5):
+                requests.get(server.url, timeout=1)
+            self.assertEqual(server.connection_count, 6)
+
+    @override_settings(EDX_DRF_EXTENSIONS={
+        'OAUTH2_USER_INFO_URL': OAUTH2_USER_INFO_URL,
+        'OAUTH2_USER_INFO_POOL_SIZE': 3,
+        'OAUTH2_USER_INFO_MAX_RETRIES': 2,
+        'OAUTH2_USER_INFO_RETRY_BACKOFF_FACTOR': 0.5,
+    })
+    def test_user_info_session_configuration(self):
+        """ Verify the session's connection pool and retry policy are configured from settings. """
+        adapter = self.auth.get_user_info_session().get_adapter(OAUTH2_USER_INFO_URL)
+        self.assertEqual(adapter._pool_maxsize, 3)  # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(adapter.max_retries.backoff_factor, 0.5)
+
+    @override_settings(EDX_DRF_EXTENSIONS={
+        'OAUTH2_USER_INFO_URL': OAUTH2_USER_INFO_URL,
+        'OAUTH2_USER_INFO_CONNECT_TIMEOUT': 1,
+        'OAUTH2_USER_INFO_READ_TIMEOUT': 2,
+    })
+    @httpretty.activate
+    def test_user_info_request_timeout(self):
+        """ Verify the request to the user info endpoint uses the configured timeouts. """
+        self.mock_user_info_response()
+        with mock.patch('requests.Session.get', wraps=self.auth.get_user_info_session().get) as mock_get:
+            self.auth.get_user_info(self.DEFAULT_TOKEN)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], (1, 2))
+
+
+@override_settings(EDX_DRF_EXTENSIONS={
+    'OAUTH2_USER_INFO_URL': OAUTH2_USER_INFO_URL,
+    'OAUTH2_USER_INFO_CACHE_TTL': 60,
+})
+class BearerAuthenticationUserInfoCacheTests(AccessTokenMixin, TestCase):
+    """ Tests for BearerAuthentication with the user info cache enabled. """
+
+    def setUp(self):
+        super().setUp()
+        self.auth = BearerAuthentication()
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.DEFAULT_TOKEN}')
+        user_info_cache.clear_local()
+        self.addCleanup(user_info_cache.clear_local)
+
+    @httpretty.activate
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_cached_user_info_skips_provider(self, mock_set_custom_attribute):
+        self.mock_user_info_response()
+        user, __ = self.auth.authenticate(self.request)
+        mock_set_custom_attribute.assert_any_call('BearerAuthentication_user_info_cache', 'miss')
+        self.assertEqual(len(httpretty.latest_requests()), 1)
+
+        self.assertEqual(self.auth.authenticate(self.request), (user, self.DEFAULT_TOKEN))
+        mock_set_custom_attribute.assert_any_call('BearerAuthentication_user_info_cache', 'hit')
+        self.assertEqual(len(httpretty.latest_requests()), 1)
+
+    @httpretty.activate
+    def test_invalidate(self):
+        self.mock_user_info_response()
+        self.auth.authenticate(self.request)
+
+        user_info_cache.invalidate(self.DEFAULT_TOKEN)
+        self.auth.authenticate(self.request)
+        self.assertEqual(len(httpretty.latest_requests()), 2)
+
+    @httpretty.activate
+    def test_deleted_user_falls_back_to_provider(self):
+        self.mock_user_info_response()
+        user, __ = self.auth.authenticate(self.request)
+        user.delete()
+
+        new_user, __ = self.auth.authenticate(self.request)
+        self.assertEqual(new_user.username, USER_INFO['username'])
+        self.assertEqual(len(httpretty.latest_requests()), 2)
+
+    @httpretty.activate
+    def test_inactive_user(self):
+        self.mock_user_info_response()
+        user, __ = self.auth.authenticate(self.request)
+        user.is_active = False
+        user.save()
+
+        self.assertRaises(AuthenticationFailed, self.auth.authenticate, self.request)
+
+    @httpretty.activate
+    def test_inactive_user_not_cached(self):
+        factories.UserFactory(username=USER_INFO['username'], is_active=False)
+        self.mock_user_info_response()
+
+        self.assertRaises(AuthenticationFailed, self.auth.authenticate, self.request)
+        self.assertIsNone(user_info_cache.get(self.DEFAULT_TOKEN))
+
+
+class BearerAuthenticationCoalescingTests(TestCase):
+    """ Tests for coalescing concurrent BearerAuthentication user info lookups, against a delayed stub server. """
+    THREAD_COUNT = 10
+
+    def _get_user_info_concurrently(self, server, tokens):
+        barrier = threading.Barrier(len(tokens))
+        results = []
+
+        def _get_user_info(token):
+            barrier.wait()
+            results.append(BearerAuthentication()._get_user_info_coalesced(token))  # pylint: disable=protected-access
+
+        threads = [threading.Thread(target=_get_user_info, args=(token,)) for token in tokens]
+        with override_settings(EDX_DRF_EXTENSIONS={
+            'OAUTH2_USER_INFO_URL': server.url,
+            'OAUTH2_USER_INFO_COALESCE_LOOKUPS': True,
+        }):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return results
+
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_identical_lookups_are_coalesced(self, mock_set_custom_attribute):
+        with StubUserInfoServer(delay=0.5) as server:
+            results = self._get_user_info_concurrently(server, ['token'] * self.THREAD_COUNT)
+
+        self.assertEqual(server.request_count, 1)
+        self.assertEqual(results, [USER_INFO] * self.THREAD_COUNT)
+        coalesced_values = [
+            c.args[1] for c in mock_set_custom_attribute.call_args_list
+            if c.args[0] == 'BearerAuthentication_user_info_coalesced'
+        ]
+        self.assertEqual(sorted(coalesced_values), [False] + [True] * (self.THREAD_COUNT - 1))
+
+    def test_different_tokens_are_not_coalesced(self):
+        with StubUserInfoServer(delay=0.2) as server:
+            self._get_user_info_concurrently(server, ['token-1', 'token-2', 'token-3'])
+
+        self.assertEqual(server.request_count, 3)
+
+    def test_coalescing_disabled_by_default(self):
+        with StubUserInfoServer() as server:
+            with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': server.url}):
+                BearerAuthentication()._get_user_info_coalesced('token')  # pylint: disable=protected-access
+                BearerAuthentication()._get_user_info_coalesced('token')  # pylint: disable=protected-access
+
+        self.assertEqual(server.request_count, 2)
+
+
+class BearerAuthenticationCircuitBreakerTests(TestCase):
+    """ Tests for BearerAuthentication with the circuit breaker enabled, against a faulty stub server. """
+
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION='Bearer token')
+        user_info_circuit_breaker.reset()
+        user_info_cache.clear_local()
+        self.addCleanup(user_info_circuit_breaker.reset)
+        self.addCleanup(user_info_cache.clear_local)
+
+    def _settings(self, server, **overrides):
+        return override_settings(EDX_DRF_EXTENSIONS={
+            'OAUTH2_USER_INFO_URL': server.url,
+            'OAUTH2_USER_INFO_CIRCUIT_BREAKER_ENABLED': True,
+            'OAUTH2_USER_INFO_CIRCUIT_BREAKER_WINDOW_SIZE': 2,
+            'OAUTH2_USER_INFO_CIRCUIT_BREAKER_SLOW_CALL_SECONDS': 0.5,
+            **overrides,
+        })
+
+    def _authenticate_repeatedly(self, count):
+        for __ in range(count):
+            with self.assertRaises(AuthenticationFailed):
+                BearerAuthentication().authenticate(self.request)
+
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_server_errors_open_breaker(self, mock_set_custom_attribute):
+        with StubUserInfoServer(status=503) as server, self._settings(server):
+            self._authenticate_repeatedly(5)
+
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(user_info_circuit_breaker.state, CircuitBreaker.OPEN)
+        mock_set_custom_attribute.assert_called_with('BearerAuthentication_circuit_breaker_state', 'open')
+
+    def test_rejected_tokens_do_not_open_breaker(self):
+        with StubUserInfoServer(status=401) as server, self._settings(server):
+            self._authenticate_repeatedly(5)
+
+        self.assertEqual(server.request_count, 5)
+        self.assertEqual(user_info_circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_open_breaker(self):
+        with StubUserInfoServer(delay=0.5) as server, self._settings(server):
+            BearerAuthentication().authenticate(self.request)
+            BearerAuthentication().authenticate(self.request)
+            self._authenticate_repeatedly(1)
+
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(user_info_circuit_breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_recovery(self):
+        with StubUserInfoServer(status=503) as server, self._settings(server):
+            self._authenticate_repeatedly(2)
+            server.status = 200
+            with mock.patch(
+                'edx_rest_framework_extensions.auth.bearer.circuit_breaker.time.monotonic',
+                return_value=user_info_circuit_breaker._opened_at + 30,  # pylint: disable=protected-access
+            ):
+                user, __ = BearerAuthentication().authenticate(self.request)
+
+        self.assertEqual(user.username, USER_INFO['username'])
+        self.assertEqual(user_info_circuit_breaker.state, CircuitBreaker.CLOSED)
+
+    def test_disabled_by_default(self):
+        with StubUserInfoServer(status=503) as server:
+            with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': server.url}):
+                self._authenticate_repeatedly(25)
+
+        self.assertEqual(server.request_count, 25)
+
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_stale_user_info_served_while_open(self, mock_set_custom_attribute):
+        cache_settings = {'OAUTH2_USER_INFO_CACHE_TTL': 10, 'OAUTH2_USER_INFO_CACHE_STALE_GRACE_SECONDS': 60}
+        with StubUserInfoServer() as server, self._settings(server, **cache_settings):
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=100):
+                user, __ = BearerAuthentication().authenticate(self.request)
+
+            server.status = 503
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=120):
+                # The entry is past its TTL, so the provider is called, and its failure opens the breaker.
+                self._authenticate_repeatedly(1)
+                self.assertEqual(BearerAuthentication().authenticate(self.request), (user, 'token'))
+
+        self.assertEqual(server.request_count, 2)
+        mock_set_custom_attribute.assert_any_call('BearerAuthentication_user_info_stale', True)
+
+    def test_stale_user_info_not_served_without_grace_period(self):
+        with StubUserInfoServer() as server, self._settings(server, OAUTH2_USER_INFO_CACHE_TTL=10):
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=100):
+                BearerAuthentication().authenticate(self.request)
+
+            server.status = 503
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=120):
+                self._authenticate_repeatedly(3)
+
+
+@override_settings(EDX_DRF_EXTENSIONS={
+    'OAUTH2_USER_INFO_URL': OAUTH2_USER_INFO_URL,
+    'OAUTH2_LOCAL_JWT_INTROSPECTION': True,
+})
+class BearerAuthenticationLocalIntrospectionTests(AccessTokenMixin, TestCase):
+    """ Tests for BearerAuthentication with local introspection of JWT access tokens enabled. """
+
+    def setUp(self):
+        super().setUp()
+        self.auth = BearerAuthentication()
+        self.user = factories.UserFactory(email='jdoe@example.com')
+
+    def _authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.auth.authenticate(request)
+
+    @httpretty.activate
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_jwt_verified_locally(self, mock_set_custom_attribute):
+        token = generate_asymmetric_jwt_token(generate_latest_version_payload(self.user))
+
+        self.assertEqual(self._authenticate(token), (self.user, token))
+        self.assertEqual(len(httpretty.latest_requests()), 0)
+        mock_set_custom_attribute.assert_any_call('BearerAuthentication_introspection', 'local')
+
+    @httpretty.activate
+    def test_jwt_creates_user(self):
+        payload = generate_latest_version_payload(self.user)
+        payload.update({'preferred_username': 'new-user', 'given_name': 'Jane'})
+
+        user, __ = self._authenticate(generate_asymmetric_jwt_token(payload))
+        self.assertEqual((user.username, user.email, user.first_name, user.last_name), (
+            'new-user', 'jdoe@example.com', 'Jane', '',
+        ))
+
+    @httpretty.activate
+    @mock.patch('edx_rest_framework_extensions.auth.bearer.authentication.set_custom_attribute')
+    def test_opaque_token_falls_back_to_provider(self, mock_set_custom_attribute):
+        self.mock_user_info_response(username=self.user.username)
+
+        self.assertEqual(self._authenticate(self.DEFAULT_TOKEN), (self.user, self.DEFAULT_TOKEN))
+        self.assertEqual(len(httpretty.latest_requests()), 1)
+        mock_set_custom_attribute.assert_any_call('BearerAuthentication_introspection', 'remote')
+
+    @httpretty.activate
+    def test_invalid_jwt_is_rejected(self):
+        payload = generate_latest_version_payload(self.user)
+        expired_payload = dict(payload, exp=payload['iat'] - 1)
+        no_username_payload = {key: value for key, value in payload.items() if key != 'preferred_username'}
+
+        for token in (
+            generate_jwt(self.user),  # symmetrically signed
+            generate_asymmetric_jwt_token(expired_payload),
+            generate_asymmetric_jwt_token(no_username_payload),
+        ):
+            self.assertRaises(AuthenticationFailed, self._authenticate, token)
+        self.assertEqual(len(httpretty.latest_requests()), 0)
+
+    @httpretty.activate
+    def test_restricted_jwt_is_rejected(self):
+        token = generate_asymmetric_jwt_token(generate_latest_version_payload(self.user, is_restricted=True))
+        with self.assertRaisesRegex(AuthenticationFailed, 'Restricted'):
+            self._authenticate(token)
+        self.assertEqual(len(httpretty.latest_requests()), 0)
+
+    @httpretty.activate
+    def test_disabled_by_default(self):
+        self.mock_user_info_response(username=self.user.username)
+        token = generate_asymmetric_jwt_token(generate_latest_version_payload(self.user))
+
+        with override_settings(EDX_DRF_EXTENSIONS={'OAUTH2_USER_INFO_URL': OAUTH2_USER_INFO_URL}):
+            self.assertEqual(self._authenticate(token), (self.user, token))
+        self.assertEqual(len(httpretty.latest_requests()), 1)
@@ -0,0 +1,112 @@
+""" Tests for the cache of OAuth2 user info lookups. """
+from unittest import mock
+
+import ddt
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from edx_rest_framework_extensions.auth.bearer.cache import UserInfoCache
+
+
+USER_INFO = {'username': 'jdoe'}
+
+
+def _cache_settings(ttl=60, max_size=1000, alias=None, stale_grace=0):
+    return {
+        'OAUTH2_USER_INFO_CACHE_TTL': ttl,
+        'OAUTH2_USER_INFO_CACHE_MAX_SIZE': max_size,
+        'OAUTH2_USER_INFO_CACHE_ALIAS': alias,
+        'OAUTH2_USER_INFO_CACHE_STALE_GRACE_SECONDS': stale_grace,
+    }
+
+
+@ddt.ddt
+class UserInfoCacheTests(TestCase):
+    """ Tests for UserInfoCache. """
+
+    def setUp(self):
+        super().setUp()
+        self.cache = UserInfoCache()
+        caches['default'].clear()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(self.cache.is_enabled())
+        self.cache.set('token', USER_INFO, 1)
+        self.assertIsNone(self.cache.get('token'))
+
+    @ddt.data(
+        _cache_settings(),
+        _cache_settings(max_size=0, alias='default'),
+        _cache_settings(alias='default'),
+    )
+    def test_set_get_invalidate(self, edx_drf_extensions_settings):
+        with override_settings(EDX_DRF_EXTENSIONS=edx_drf_extensions_settings):
+            self.cache.set('token', USER_INFO, 1)
+            cached = self.cache.get('token')
+            self.assertEqual((cached['user_info'], cached['user_id']), (USER_INFO, 1))
+            self.assertIsNone(self.cache.get('other-token'))
+
+            self.cache.invalidate('token')
+            self.assertIsNone(self.cache.get('token'))
+
+    @override_settings(EDX_DRF_EXTENSIONS=_cache_settings())
+    def test_token_is_not_stored_in_key(self):
+        self.cache.set('secret-token', USER_INFO, 1)
+        # pylint: disable=protected-access
+        self.assertNotIn('secret-token', ''.join(self.cache._local_entries))
+
+    @override_settings(EDX_DRF_EXTENSIONS=_cache_settings(max_size=2))
+    def test_local_lru_eviction(self):
+        self.cache.set('token-1', USER_INFO, 1)
+        self.cache.set('token-2', USER_INFO, 2)
+        # token-1 becomes the most recently used
+        self.assertIsNotNone(self.cache.get('token-1'))
+        self.cache.set('token-3', USER_INFO, 3)
+
+        self.assertIsNotNone(self.cache.get('token-1'))
+        self.assertIsNone(self.cache.get('token-2'))
+        self.assertIsNotNone(self.cache.get('token-3'))
+
+    @override_settings(EDX_DRF_EXTENSIONS=_cache_settings(ttl=10))
+    def test_local_ttl_expiry(self):
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=100):
+            self.cache.set('token', USER_INFO, 1)
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=109):
+            self.assertIsNotNone(self.cache.get('token'))
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=110):
+            self.assertIsNone(self.cache.get('token'))
+
+    @override_settings(EDX_DRF_EXTENSIONS=_cache_settings(alias='default'))
+    def test_local_filled_from_django_cache(self):
+        self.cache.set('token', USER_INFO, 1)
+        self.cache.clear_local()
+
+        self.assertIsNotNone(self.cache.get('token'))
+        caches['default'].clear()
+        self.assertIsNotNone(self.cache.get('token'))
+
+    @override_settings(EDX_DRF_EXTENSIONS=_cache_settings(alias='default'))
+    def test_local_ttl_capped_with_django_cache(self):
+        other_process_cache = UserInfoCache()
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=100):
+            self.cache.set('token', USER_INFO, 1)
+            self.assertIsNotNone(other_process_cache.get('token'))
+            self.cache.invalidate('token')
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=104):
+            # The invalidation did not reach the other process's in-process LRU...
+            self.assertIsNotNone(other_process_cache.get('token'))
+        with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.monotonic', return_value=105):
+            # ...which drops its copy after OAUTH2_USER_INFO_CACHE_LOCAL_TTL seconds, rather than the full TTL.
+            self.assertIsNone(other_process_cache.get('token'))
+
+    @ddt.data(
+        _cache_settings(ttl=10, stale_grace=20),
+        _cache_settings(ttl=10, stale_grace=20, max_size=0, alias='default'),
+    )
+    def test_stale_entries(self, edx_drf_extensions_settings):
+        with override_settings(EDX_DRF_EXTENSIONS=edx_drf_extensions_settings):
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=100):
+                self.cache.set('token', USER_INFO, 1)
+            with mock.patch('edx_rest_framework_extensions.auth.bearer.cache.time.time', return_value=110):
+                self.assertIsNone(self.cache.get('token'))
+                self.assertEqual(self.cache.get('token', allow_stale=True)['user_id'], 1)
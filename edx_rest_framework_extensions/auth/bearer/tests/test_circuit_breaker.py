@@ -0,0 +1,74 @@
+""" Tests for the circuit breaker of the OAuth2 user info endpoint. """
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from edx_rest_framework_extensions.auth.bearer.circuit_breaker import CircuitBreaker
+
+
+@override_settings(EDX_DRF_EXTENSIONS={
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_WINDOW_SIZE': 4,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_FAILURE_RATE': 0.5,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_SLOW_CALL_SECONDS': 1,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_OPEN_SECONDS': 30,
+})
+@mock.patch('edx_rest_framework_extensions.auth.bearer.circuit_breaker.time.monotonic', return_value=100)
+class CircuitBreakerTests(TestCase):
+    """ Tests for CircuitBreaker. """
+
+    def setUp(self):
+        super().setUp()
+        self.breaker = CircuitBreaker()
+
+    def _record(self, *outcomes):
+        for is_failure in outcomes:
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record(is_failure, duration=0)
+
+    def test_stays_closed_below_failure_rate(self, mock_monotonic):  # pylint: disable=unused-argument
+        self._record(True, False, False, False, True, False)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_does_not_open_before_window_is_full(self, mock_monotonic):  # pylint: disable=unused-argument
+        self._record(True, True, True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_opens_at_failure_rate(self, mock_monotonic):  # pylint: disable=unused-argument
+        self._record(False, True, False, True)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_slow_calls_are_failures(self, mock_monotonic):  # pylint: disable=unused-argument
+        for __ in range(4):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record(False, duration=1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_trial_success_closes(self, mock_monotonic):
+        self._record(True, True, True, True)
+        mock_monotonic.return_value = 130
+
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # Only a single trial call is let through.
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record(False, duration=0)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_trial_failure_reopens(self, mock_monotonic):
+        self._record(True, True, True, True)
+        mock_monotonic.return_value = 130
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record(True, duration=0)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        mock_monotonic.return_value = 159
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_reset(self, mock_monotonic):  # pylint: disable=unused-argument
+        self._record(True, True, True, True)
+        self.breaker.reset()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
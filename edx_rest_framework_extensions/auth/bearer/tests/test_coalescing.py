@@ -0,0 +1,83 @@
+""" Tests for coalescing of concurrent user info lookups. """
+import threading
+from unittest import TestCase
+
+from edx_rest_framework_extensions.auth.bearer.coalescing import SingleFlight
+
+
+class SingleFlightTests(TestCase):
+    """ Tests for SingleFlight. """
+
+    def setUp(self):
+        super().setUp()
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.call_count = 0
+
+    def _slow_call(self, result=None, error=None):
+        def _call():
+            self.call_count += 1
+            self.started.set()
+            self.release.wait()
+            if error:
+                raise error
+            return result
+        return _call
+
+    def _run_in_thread(self, func):
+        outcome = {}
+
+        def _target():
+            try:
+                outcome['value'] = func()
+            except Exception as error:  # pylint: disable=broad-except
+                outcome['error'] = error
+
+        thread = threading.Thread(target=_target)
+        thread.start()
+        return thread, outcome
+
+    def _wait_for_coalesced_count(self, count):
+        while self.single_flight.coalesced_count < count:
+            threading.Event().wait(0.001)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        self.assertEqual(self.single_flight.do('key', lambda: 1), (1, False))
+        self.assertEqual(self.single_flight.do('key', lambda: 2), (2, False))
+        self.assertEqual(self.single_flight.coalesced_count, 0)
+
+    def test_concurrent_calls_share_result(self):
+        leader, leader_outcome = self._run_in_thread(lambda: self.single_flight.do('key', self._slow_call('result')))
+        self.started.wait()
+        follower, follower_outcome = self._run_in_thread(lambda: self.single_flight.do('key', self._slow_call()))
+        self._wait_for_coalesced_count(1)
+        self.release.set()
+        leader.join()
+        follower.join()
+
+        self.assertEqual(leader_outcome, {'value': ('result', False)})
+        self.assertEqual(follower_outcome, {'value': ('result', True)})
+        self.assertEqual(self.call_count, 1)
+
+    def test_concurrent_calls_share_error(self):
+        error = ValueError('failed')
+        leader, leader_outcome = self._run_in_thread(
+            lambda: self.single_flight.do('key', self._slow_call(error=error))
+        )
+        self.started.wait()
+        follower, follower_outcome = self._run_in_thread(lambda: self.single_flight.do('key', self._slow_call()))
+        self._wait_for_coalesced_count(1)
+        self.release.set()
+        leader.join()
+        follower.join()
+
+        self.assertIs(leader_outcome['error'], error)
+        self.assertIs(follower_outcome['error'], error)
+        self.assertEqual(self.call_count, 1)
+
+    def test_different_keys_are_not_coalesced(self):
+        self.release.set()
+        self.assertEqual(self.single_flight.do('key-1', self._slow_call(1)), (1, False))
+        self.assertEqual(self.single_flight.do('key-2', self._slow_call(2)), (2, False))
+        self.assertEqual(self.call_count, 2)
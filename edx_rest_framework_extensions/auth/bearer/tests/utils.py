@@ -0,0 +1,83 @@
+""" Utilities for BearerAuthentication tests. """
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+USER_INFO_RESPONSE = {
+    'preferred_username': 'jdoe',
+    'email': 'jdoe@example.com',
+    'family_name': 'Doê',
+    'given_name': 'Jane',
+}
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # Accept bursts of concurrent connections without the kernel dropping them (the default backlog is 5).
+    request_queue_size = 128
+
+
+class StubUserInfoServer:
+    """
+    A local OAuth2 user info endpoint, running in a background thread, for tests that need real HTTP requests.
+
+    Use as a context manager. Responses can be delayed, and faults can be injected by setting ``status``.
+    Connections are kept alive (HTTP/1.1), and ``connection_count`` counts the connections accepted, so
+    that tests can tell whether clients reuse them.
+
+    Example::
+
+        with StubUserInfoServer(delay=0.2) as server:
+            requests.get(server.url)
+            assert server.request_count == 1
+    """
+    def __init__(self, delay=0, status=200, response=None):
+        self.delay = delay
+        self.status = status
+        self.response = response or USER_INFO_RESPONSE
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/oauth2/user_info/'
+
+    def __enter__(self):
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with stub._lock:  # pylint: disable=protected-access
+                    stub.connection_count += 1
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                with stub._lock:  # pylint: disable=protected-access
+                    stub.request_count += 1
+                time.sleep(stub.delay)
+                body = json.dumps(stub.response).encode('utf8')
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+        self._server = _StubHTTPServer(('127.0.0.1', 0), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -19,6 +19,7 @@ from edx_rest_framework_extensions.config import (
     ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE,
 )
 from edx_rest_framework_extensions.settings import get_setting
+from edx_rest_framework_extensions.timing import PHASE_AUTHENTICATION, timed_phase
 
 
 logger = logging.getLogger(__name__)
@@ -80,6 +81,7 @@ class JwtAuthentication(JSONWebTokenAuthentication):
         """
         return get_setting('JWT_PAYLOAD_MERGEABLE_USER_ATTRIBUTES')
 
+    @timed_phase(PHASE_AUTHENTICATION)
     def authenticate(self, request):
         # .. custom_attribute_name: jwt_auth_result
         # .. custom_attribute_description: The result of the JWT authenticate process,
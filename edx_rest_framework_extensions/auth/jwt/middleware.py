@@ -25,6 +25,7 @@ from edx_rest_framework_extensions.auth.jwt.cookies import (
     jwt_cookie_signature_name,
 )
 from edx_rest_framework_extensions.config import ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE
+from edx_rest_framework_extensions.middleware import RequestCustomAttributesMiddleware
 from edx_rest_framework_extensions.permissions import (
     LoginRedirectIfUnauthenticated,
     NotJwtRestrictedApplication,
@@ -258,6 +259,108 @@ class JwtAuthCookieMiddleware(MiddlewareMixin):
                 request.user = SimpleLazyObject(lambda: _get_cached_user_from_jwt(request, view_func))
 
 
+class JwtAuthPipelineMiddleware(RequestCustomAttributesMiddleware):
+    """
+    Optional single middleware that does the work of the following middleware stack in one pass::
+
+        MIDDLEWARE = (
+            'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+            'edx_rest_framework_extensions.auth.jwt.middleware.JwtRedirectToLoginIfUnauthenticatedMiddleware',
+            'edx_rest_framework_extensions.auth.jwt.middleware.JwtAuthCookieMiddleware',
+            'edx_rest_framework_extensions.auth.jwt.middleware.EnsureJWTAuthSettingsMiddleware',
+            'edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware',
+        )
+
+    The individual middleware each resolve the view class and inspect its authentication and permission
+    classes on every request. This middleware computes that view metadata once per view and reuses it for
+    later requests. The custom attributes and the login redirect behavior are the same as for the stack above.
+
+    This middleware replaces all of the middleware listed above, and must appear after the session and
+    authentication middleware. For example::
+
+        MIDDLEWARE = (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'edx_rest_framework_extensions.auth.jwt.middleware.JwtAuthPipelineMiddleware',
+        )
+
+    Note: Because this middleware clears the request cache, no middleware that appears before it should rely
+    on the request cache.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self._jwt_auth_cookie_middleware = JwtAuthCookieMiddleware(get_response)
+        self._ensure_jwt_auth_settings_middleware = EnsureJWTAuthSettingsMiddleware(get_response)
+        # Maps each view_func to whether it uses the LoginRedirectIfUnauthenticated permission class.
+        self._is_login_required_by_view = {}
+
+    def get_login_url(self, request):  # pylint: disable=unused-argument
+        """
+        Return None for default login url.
+
+        Can be overridden for slow-rollout or A/B testing of transition to other login mechanisms.
+        """
+        return None
+
+    def process_request(self, request):
+        """
+        Clears the request cache and caches if authenticated user was found.
+        """
+        RequestCache.clear_all_namespaces()
+        super().process_request(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Applies the precomputed view metadata, and reconstitutes the JWT auth cookie.
+        """
+        is_login_required = self._is_login_required_by_view.get(view_func)
+        if is_login_required is None:
+            is_login_required = self._compute_view_metadata(request, view_func, view_args, view_kwargs)
+        self._get_request_cache()[self._LOGIN_REQUIRED_FOUND_CACHE_KEY] = is_login_required
+
+        self._jwt_auth_cookie_middleware.process_view(request, view_func, view_args, view_kwargs)
+        super().process_view(request, view_func, view_args, view_kwargs)
+
+    def process_response(self, request, response):
+        """
+        Adds custom attributes, redirects unauthenticated users to login when required, and clears the request cache.
+        """
+        response = super().process_response(request, response)
+
+        if self._is_login_required_found() and not request.user.is_authenticated:
+            login_url = self.get_login_url(request)  # pylint: disable=assignment-from-none
+            response = login_required(function=lambda request: None, login_url=login_url)(request)
+
+        RequestCache.clear_all_namespaces()
+        return response
+
+    _REQUEST_CACHE_NAMESPACE = 'JwtAuthPipelineMiddleware'
+    _LOGIN_REQUIRED_FOUND_CACHE_KEY = 'login_required_found'
+
+    def _get_request_cache(self):
+        return RequestCache(self._REQUEST_CACHE_NAMESPACE).data
+
+    def _is_login_required_found(self):
+        """
+        Returns True if LoginRedirectIfUnauthenticated permission was found, and False otherwise.
+        """
+        return self._get_request_cache().get(self._LOGIN_REQUIRED_FOUND_CACHE_KEY, False)
+
+    def _compute_view_metadata(self, request, view_func, view_args, view_kwargs):
+        """
+        Ensures the JWT permission classes for the view, and returns and stores whether it requires login.
+
+        This is only done the first time a view is seen, since the result only depends on the view.
+        """
+        self._ensure_jwt_auth_settings_middleware.process_view(request, view_func, view_args, view_kwargs)
+
+        view_class = _get_view_class(view_func)
+        view_permission_classes = getattr(view_class, 'permission_classes', tuple())
+        is_login_required = _includes_base_class(view_permission_classes, LoginRedirectIfUnauthenticated)
+        self._is_login_required_by_view[view_func] = is_login_required
+        return is_login_required
+
+
 def _get_module_request_cache():
     return RequestCache(__name__).data
 
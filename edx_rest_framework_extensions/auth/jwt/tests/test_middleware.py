@@ -3,7 +3,7 @@ Unit tests for jwt authentication middlewares.
 """
 from http.cookies import SimpleCookie
 from itertools import product
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
 import ddt
 from django.test import Client, RequestFactory, TestCase, override_settings
@@ -26,7 +26,9 @@ from edx_rest_framework_extensions.auth.jwt.cookies import (
 from edx_rest_framework_extensions.auth.jwt.middleware import (
     EnsureJWTAuthSettingsMiddleware,
     JwtAuthCookieMiddleware,
+    JwtAuthPipelineMiddleware,
     JwtRedirectToLoginIfUnauthenticatedMiddleware,
+    _includes_base_class,
 )
 from edx_rest_framework_extensions.config import ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE
 from edx_rest_framework_extensions.permissions import (
@@ -441,6 +443,157 @@ class TestJwtAuthCookieMiddleware(TestCase):
         self.assertEqual(200, response.status_code)
 
 
+_INDIVIDUAL_MIDDLEWARE_STACK = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+    'edx_rest_framework_extensions.auth.jwt.middleware.JwtRedirectToLoginIfUnauthenticatedMiddleware',
+    'edx_rest_framework_extensions.auth.jwt.middleware.JwtAuthCookieMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'edx_rest_framework_extensions.auth.jwt.middleware.EnsureJWTAuthSettingsMiddleware',
+    'edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware',
+)
+
+_PIPELINE_MIDDLEWARE_STACK = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'edx_rest_framework_extensions.auth.jwt.middleware.JwtAuthPipelineMiddleware',
+)
+
+
+class OverriddenJwtAuthPipelineMiddleware(JwtAuthPipelineMiddleware):
+    def get_login_url(self, request):
+        return '/overridden/login/'
+
+
+@ddt.ddt
+class TestJwtAuthPipelineMiddleware(TestCase):
+    """
+    Tests that JwtAuthPipelineMiddleware behaves like the individual middleware it replaces.
+    """
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+        self.client = Client()
+
+    @ddt.data(
+        ('/loginredirectifunauthenticated/', False, 302),
+        ('/loginredirectifunauthenticated/', True, 200),
+        ('/isauthenticatedandloginredirect/', False, 302),
+        ('/isauthenticatedandloginredirect/', True, 200),
+        ('/isauthenticated/', False, 401),
+        ('/isauthenticated/', True, 200),
+        ('/nopermissionsrequired/', False, 200),
+        ('/nopermissionsrequired/', True, 200),
+    )
+    @ddt.unpack
+    @override_settings(
+        ROOT_URLCONF='edx_rest_framework_extensions.auth.jwt.tests.test_middleware',
+        MIDDLEWARE=_PIPELINE_MIDDLEWARE_STACK,
+        LOGIN_URL='/test/login/',
+    )
+    def test_login_required(self, url, has_jwt_cookies, expected_status):
+        if has_jwt_cookies:
+            self.client.cookies = _get_test_cookie()
+        response = self.client.get(url)
+        self.assertEqual(expected_status, response.status_code)
+        if response.status_code == 302:
+            self.assertEqual('/test/login/?next=' + url, response.url)
+
+    @override_settings(
+        ROOT_URLCONF='edx_rest_framework_extensions.auth.jwt.tests.test_middleware',
+        MIDDLEWARE=(
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'edx_rest_framework_extensions.auth.jwt.tests.test_middleware.OverriddenJwtAuthPipelineMiddleware',
+        ),
+    )
+    def test_login_required_overridden_login_url(self):
+        response = self.client.get('/loginredirectifunauthenticated/')
+        self.assertEqual(302, response.status_code)
+        self.assertEqual('/overridden/login/?next=/loginredirectifunauthenticated/', response.url)
+
+    @ddt.data(
+        *product(
+            ('/loginredirectifunauthenticated/', '/isauthenticated/', '/nopermissionsrequired/', '/unauthenticated/'),
+            (True, False),
+        )
+    )
+    @ddt.unpack
+    @override_settings(ROOT_URLCONF='edx_rest_framework_extensions.auth.jwt.tests.test_middleware')
+    def test_same_custom_attributes_as_individual_middleware(self, url, has_jwt_cookies):
+        def _get_custom_attribute_calls(middleware):
+            self.client = Client()
+            if has_jwt_cookies:
+                self.client.cookies = _get_test_cookie()
+            with override_settings(MIDDLEWARE=middleware):
+                with patch('edx_django_utils.monitoring.set_custom_attribute') as mock_monitoring_attribute:
+                    with patch(
+                        'edx_rest_framework_extensions.auth.jwt.middleware.set_custom_attribute'
+                    ) as mock_jwt_attribute:
+                        response = self.client.get(url)
+            # MockJwtAuthentication creates a new user for each request, so user ids are not compared.
+            return response.status_code, [
+                c if c.args[0] not in ('enduser.id', 'request_user_id') else call(c.args[0])
+                for c in mock_jwt_attribute.call_args_list + mock_monitoring_attribute.call_args_list
+            ]
+
+        individual_status, individual_calls = _get_custom_attribute_calls(_INDIVIDUAL_MIDDLEWARE_STACK)
+        pipeline_status, pipeline_calls = _get_custom_attribute_calls(_PIPELINE_MIDDLEWARE_STACK)
+
+        self.assertEqual(individual_status, pipeline_status)
+        self.assertEqual(individual_calls, pipeline_calls)
+        self.assertIn(call('has_jwt_cookie', has_jwt_cookies), pipeline_calls)
+
+    def test_view_metadata_computed_once_per_view(self):
+        class SomeJwtView(APIView):
+            authentication_classes = (SomeJwtAuthenticationSubclass,)
+            permission_classes = (LoginRedirectIfUnauthenticated,)
+
+        request = RequestFactory().get('/')
+        request.session = 'mock session'
+        middleware = JwtAuthPipelineMiddleware(Mock())
+        with patch.object(
+            middleware._ensure_jwt_auth_settings_middleware, 'process_view',  # pylint: disable=protected-access
+        ) as mock_ensure_process_view:
+            middleware.process_view(request, SomeJwtView, None, None)
+            middleware.process_view(request, SomeJwtView, None, None)
+
+        mock_ensure_process_view.assert_called_once_with(request, SomeJwtView, None, None)
+        self.assertTrue(middleware._is_login_required_found())  # pylint: disable=protected-access
+
+    @override_settings(
+        ROOT_URLCONF='edx_rest_framework_extensions.auth.jwt.tests.test_middleware',
+        MIDDLEWARE=_PIPELINE_MIDDLEWARE_STACK,
+        LOGIN_URL='/test/login/',
+    )
+    def test_login_required_lookup_cached_across_requests(self):
+        with patch(
+            'edx_rest_framework_extensions.auth.jwt.middleware._includes_base_class',
+            wraps=_includes_base_class,
+        ) as mock_includes_base_class:
+            first_response = self.client.get('/loginredirectifunauthenticated/')
+            first_call_count = mock_includes_base_class.call_count
+            second_response = self.client.get('/loginredirectifunauthenticated/')
+
+        self.assertGreater(first_call_count, 0)
+        self.assertEqual(mock_includes_base_class.call_count, first_call_count)
+        self.assertEqual(first_response.status_code, 302)
+        self.assertEqual(second_response.status_code, 302)
+
+    def test_request_cache_cleared(self):
+        request = RequestFactory().get('/')
+        request.user = Mock(is_authenticated=True)
+        middleware = JwtAuthPipelineMiddleware(Mock())
+        RequestCache('some_namespace').set('some_key', 'some_value')
+
+        middleware.process_request(request)
+        self.assertFalse(RequestCache('some_namespace').get_cached_response('some_key').is_found)
+
+        RequestCache('some_namespace').set('some_key', 'some_value')
+        middleware.process_response(request, Mock())
+        self.assertFalse(RequestCache('some_namespace').get_cached_response('some_key').is_found)
+
+
 def _get_test_cookie(is_cookie_valid=True):
     header_payload_value = 'header.payload' if is_cookie_valid else 'header.payload.invalid'
     return SimpleCookie({
@@ -26,3 +26,34 @@ ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE = 'ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE
 # .. toggle_creation_date: 2023-12-20
 # .. toggle_tickets: VAN-1694
 ENABLE_JWT_AND_LMS_USER_EMAIL_MATCH = 'ENABLE_JWT_AND_LMS_USER_EMAIL_MATCH'
+
+# .. toggle_name: EDX_DRF_EXTENSIONS[ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY]
+# .. toggle_implementation: DjangoSetting
+# .. toggle_default: False
+# .. toggle_description: Toggle to keep RequestCustomAttributesMiddleware from forcing the evaluation of a lazy
+#      request.user (e.g. the SimpleLazyObject set by Django's AuthenticationMiddleware). When enabled, user related
+#      custom attributes are only set if something else already loaded the user, which avoids the session lookup and
+#      user query for endpoints that never use the user.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-19
+ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY = 'ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY'
+
+# .. toggle_name: EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING]
+# .. toggle_implementation: DjangoSetting
+# .. toggle_default: False
+# .. toggle_description: Toggle to time the authentication, permissions, scoping, pagination and rendering phases of
+#      each request, and report them as millisecond custom attributes through RequestCustomAttributesMiddleware. See
+#      edx_rest_framework_extensions.timing for details.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-19
+ENABLE_REQUEST_PHASE_TIMING = 'ENABLE_REQUEST_PHASE_TIMING'
+
+# .. toggle_name: EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION]
+# .. toggle_implementation: DjangoSetting
+# .. toggle_default: False
+# .. toggle_description: Toggle for ScopedQuerysetMixin to report the time spent applying its scoping policy, and the
+#      time spent resolving the subject's scope set and its size when the policy reports them, as custom attributes.
+#      See also the SCOPING_EXPLAIN_SAMPLE_RATE setting.
+# .. toggle_use_cases: opt_in
+# .. toggle_creation_date: 2026-10-19
+ENABLE_SCOPING_INSTRUMENTATION = 'ENABLE_SCOPING_INSTRUMENTATION'
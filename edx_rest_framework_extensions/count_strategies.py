@@ -0,0 +1,173 @@
+"""
+Count strategies for ``DefaultPagination`` and ``NamespacedPageNumberPagination``.
+
+A count strategy computes the ``count`` (and thus ``num_pages``) reported by a paginator, and whether it is exact.
+Select one with the ``count_strategy`` attribute of a paginator subclass:
+
+.. code-block:: python
+
+    class LargeTablePagination(DefaultPagination):
+        count_strategy = CappedCount(10000)
+
+When the count is not exact, the response also includes ``"count_is_exact": false``, and pages past the reported
+``num_pages`` may still be requested. With ``NoCount``, for clients that only follow ``next`` links (e.g. infinite
+scroll), no count is made at all, and ``count`` and ``num_pages`` are null.
+
+Strategies other than ``ExactCount`` only apply to querysets; other object lists are counted exactly.
+"""
+import hashlib
+import inspect
+import json
+from abc import ABC, abstractmethod
+
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.inspect import method_has_no_args
+
+
+class CountStrategy(ABC):
+    """
+    Base class for count strategies.
+    """
+
+    @abstractmethod
+    def get_count(self, object_list):
+        """
+        Returns a tuple of the count of the object list, and whether it is exact (rather than a lower bound or an
+        estimate).
+        """
+
+
+class ExactCount(CountStrategy):
+    """
+    Counts the object list exactly, like Django's ``Paginator``. This is the default.
+    """
+
+    def get_count(self, object_list):
+        return get_exact_count(object_list), True
+
+
+class NoCount(CountStrategy):
+    """
+    Never counts. Each page fetches one extra row to know whether there is a next page, so it runs a single query.
+    Since the number of pages is unknown, ``page=last`` is not found.
+    """
+
+    def get_count(self, object_list):
+        return None, False
+
+
+class CappedCount(CountStrategy):
+    """
+    Stops counting at ``cap`` rows. Querysets with more rows report a count of ``cap``, which is not exact.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def get_count(self, object_list):
+        if not isinstance(object_list, QuerySet):
+            return get_exact_count(object_list), True
+
+        # Counts a LIMIT subquery, so the database stops scanning after cap + 1 rows.
+        count = object_list[:self.cap + 1].count()
+        if count > self.cap:
+            return self.cap, False
+        return count, True
+
+
+class CachedCount(CountStrategy):
+    """
+    Caches the counts of another strategy (``ExactCount`` by default) for ``ttl`` seconds, in the Django cache named
+    ``cache_alias``, keyed by a hash of the queryset's SQL and its parameters.
+
+    Cached counts may be stale by up to ``ttl`` seconds.
+    """
+    KEY_PREFIX = 'edx_drf_extensions.count.'
+
+    def __init__(self, ttl=60, cache_alias='default', strategy=None):
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.strategy = strategy or ExactCount()
+
+    def get_count(self, object_list):
+        key = self.get_cache_key(object_list) if isinstance(object_list, QuerySet) else None
+        if key is None:
+            return self.strategy.get_count(object_list)
+
+        cache = caches[self.cache_alias]
+        cached = cache.get(key)
+        if cached is not None:
+            return tuple(cached)
+
+        count = self.strategy.get_count(object_list)
+        cache.set(key, count, self.ttl)
+        return count
+
+    def get_cache_key(self, queryset):
+        """
+        Returns the cache key of the queryset's count, or None if the queryset cannot match any rows.
+        """
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        digest = hashlib.sha256(repr((queryset.db, sql, params)).encode('utf8')).hexdigest()
+        return self.KEY_PREFIX + digest
+
+
+class EstimatedCount(CountStrategy):
+    """
+    Reports the query planner's estimate of the row count, if it is at least ``exact_below`` rows, and otherwise
+    counts exactly.
+
+    ``estimate`` uses ``EXPLAIN`` on PostgreSQL; override it to use the statistics of other databases. Where no
+    estimate is available (e.g. on SQLite), the ``fallback`` strategy is used, which is ``ExactCount`` by default
+    (``CappedCount`` is a cheaper alternative).
+    """
+
+    def __init__(self, exact_below=10000, fallback=None):
+        self.exact_below = exact_below
+        self.fallback = fallback or ExactCount()
+
+    def get_count(self, object_list):
+        if not isinstance(object_list, QuerySet):
+            return self.fallback.get_count(object_list)
+
+        estimate = self.estimate(object_list)
+        if estimate is None:
+            return self.fallback.get_count(object_list)
+        if estimate < self.exact_below:
+            return object_list.count(), True
+        return estimate, False
+
+    def estimate(self, queryset):
+        """
+        Returns the database's estimate of the row count of the queryset, or None if it is not available.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_exact_count(object_list):
+    """
+    Returns the exact count of the object list, as Django's ``Paginator`` does.
+    """
+    count = getattr(object_list, 'count', None)
+    if callable(count) and not inspect.isbuiltin(count) and method_has_no_args(count):
+        return count()
+    return len(object_list)
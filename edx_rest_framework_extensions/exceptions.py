@@ -3,3 +3,11 @@
 
 class UserInfoRetrievalFailed(Exception):
     """ Raised when we fail to retrieve user info (e.g. from the OAuth provider). """
+    def __init__(self, *args, status_code=None):
+        super().__init__(*args)
+        # The HTTP status code of the provider's response, or None if no response was received.
+        self.status_code = status_code
+
+
+class UserInfoCircuitOpen(UserInfoRetrievalFailed):
+    """ Raised when user info is not retrieved because the circuit breaker for the OAuth provider is open. """
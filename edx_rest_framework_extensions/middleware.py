@@ -2,13 +2,30 @@
 Middleware to ensure best practices of DRF and other endpoints.
 """
 import warnings
+from functools import lru_cache
 
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import LazyObject, empty
 from edx_django_utils import monitoring
 from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
 
 import edx_rest_framework_extensions
+from edx_rest_framework_extensions.auth.bearer.authentication import (
+    BearerAuthentication,
+)
+from edx_rest_framework_extensions.auth.jwt.authentication import JwtAuthentication
 from edx_rest_framework_extensions.auth.jwt.cookies import jwt_cookie_name
+from edx_rest_framework_extensions.config import (
+    ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY,
+)
+from edx_rest_framework_extensions.settings import get_setting
+from edx_rest_framework_extensions.timing import (
+    get_phase_durations_ms,
+    is_request_phase_timing_enabled,
+    time_response_rendering,
+)
 
 
 class RequestCustomAttributesMiddleware(MiddlewareMixin):
@@ -22,10 +39,11 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
             Attribute won't exist if user is not authenticated.
 
         request_auth_type_guess:
-            Example values include: no-user, unauthenticated, jwt, bearer, other-token-type, jwt-cookie, or
-            session-or-other
+            Example values include: no-user, unevaluated-user, unauthenticated, jwt, bearer, other-token-type,
+            jwt-cookie, session, or session-or-other
 
-            Note: These are just guesses because if a token was expired, for example,
+            Note: When DRF authenticated the request with a known authentication class, the value is based
+            on that class. Otherwise, these are just guesses because if a token was expired, for example,
             the user could have been authenticated by some other means.
 
         request_client_name: The client name from edx-rest-api-client calls.
@@ -36,6 +54,10 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
         request_is_staff_or_superuser: `staff` or `superuser` depending on whether the
             user in the request is a django staff or superuser.
 
+        request_phase_<phase>_ms: The milliseconds spent in each timed phase of the request (authentication,
+            permissions and each permission class, scoping, pagination and rendering). Only set if the toggle
+            EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled. See edx_rest_framework_extensions.timing.
+
     This middleware is dependent on the RequestCacheMiddleware. You must
     include this middleware later.  For example::
 
@@ -46,6 +68,11 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
 
     This middleware should also appear after any authentication middleware.
 
+    By default, this middleware evaluates a lazy ``request.user``, which may cost a session lookup and a user query
+    even for endpoints that never use the user. Enable the toggle
+    EDX_DRF_EXTENSIONS[ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY] to only inspect the user once something
+    else has evaluated it.
+
     """
     def process_request(self, request):
         """
@@ -64,7 +91,15 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
         Add custom attributes for various details of the request.
         """
         self._cache_if_authenticated_user_found_in_middleware(request, 'process_response')
-        self._set_all_request_attributes(request)
+        self._set_all_request_attributes(request, response)
+        return response
+
+    def process_template_response(self, request, response):  # pylint: disable=unused-argument
+        """
+        Times the rendering of the response, if request phase timing is enabled.
+        """
+        if is_request_phase_timing_enabled():
+            time_response_rendering(response)
         return response
 
     def process_exception(self, request, exception):  # pylint: disable=unused-argument
@@ -74,7 +109,7 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
         self._cache_if_authenticated_user_found_in_middleware(request, 'process_exception')
         self._set_all_request_attributes(request)
 
-    def _set_all_request_attributes(self, request):
+    def _set_all_request_attributes(self, request, response=None):
         """
         Sets all the request custom attributes
         """
@@ -85,12 +120,13 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
         #   should have ``request_auth_type_guess``.
         monitoring.set_custom_attribute('edx_drf_extensions_version', edx_rest_framework_extensions.__version__)
 
-        self._set_request_auth_type_guess_attribute(request)
+        self._set_request_auth_type_guess_attribute(request, response)
         self._set_request_user_agent_attributes(request)
         self._set_request_referer_attribute(request)
         self._set_request_user_id_attribute(request)
         self._set_request_authenticated_user_found_in_middleware_attribute()
         self._set_request_is_staff_or_superuser(request)
+        self._set_request_phase_timing_attributes()
 
     def _set_request_is_staff_or_superuser(self, request):
         """
@@ -100,6 +136,9 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
             request_is_staff_or_superuser
         """
         value = None
+        if self._is_request_user_skipped(request):
+            return
+
         if hasattr(request, 'user') and request.user:
             if request.user.is_superuser:
                 value = 'superuser'
@@ -109,10 +148,23 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
             if value:
                 monitoring.set_custom_attribute('request_is_staff_or_superuser', value)
 
+    def _set_request_phase_timing_attributes(self):
+        """
+        Add a request_phase_<phase>_ms custom attribute for each timed phase, if request phase timing is enabled.
+        """
+        if not is_request_phase_timing_enabled():
+            return
+        # The custom attributes are annotated with their phases in edx_rest_framework_extensions.timing.
+        for phase, duration_ms in get_phase_durations_ms().items():
+            monitoring.set_custom_attribute(f'request_phase_{phase}_ms', duration_ms)
+
     def _set_request_user_id_attribute(self, request):
         """
         Add enduser.id (and request_user_id) custom attributes.
         """
+        if self._is_request_user_skipped(request):
+            return
+
         if hasattr(request, 'user') and hasattr(request.user, 'id') and request.user.id:
             # .. custom_attribute_name: enduser.id
             # .. custom_attribute_description: The user's id when available. The name enduser.id is an
@@ -142,44 +194,71 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
         if 'user-agent' in request.headers and request.headers['user-agent']:
             user_agent = request.headers['user-agent']
             monitoring.set_custom_attribute('request_user_agent', user_agent)
-            if user_agent:
-                # Example agent string from edx-rest-api-client:
-                #    python-requests/2.9.1 edx-rest-api-client/1.7.2 ecommerce
-                #    See https://github.com/openedx/edx-rest-api-client/commit/692903c30b157f7a4edabc2f53aae1742db3a019
-                user_agent_parts = user_agent.split()
-                if len(user_agent_parts) == 3 and user_agent_parts[1].startswith('edx-rest-api-client/'):
-                    monitoring.set_custom_attribute('request_client_name', user_agent_parts[2])
+            client_name = _get_client_name_from_user_agent(user_agent)
+            if client_name:
+                monitoring.set_custom_attribute('request_client_name', client_name)
 
-    def _set_request_auth_type_guess_attribute(self, request):
+    def _set_request_auth_type_guess_attribute(self, request, response=None):
         """
         Add custom attribute 'request_auth_type_guess' for the authentication type used.
         """
-        if not hasattr(request, 'user') or not request.user:
-            auth_type = 'no-user'
-        elif not request.user.is_authenticated:
-            auth_type = 'unauthenticated'
-        elif 'authorization' in request.headers and request.headers['authorization']:
-            token_parts = request.headers['authorization'].split()
-            # Example: "JWT eyJhbGciO..."
-            if len(token_parts) == 2:
-                auth_type = token_parts[0].lower()  # 'jwt' or 'bearer' (for example)
-            else:
-                auth_type = 'other-token-type'
-        elif jwt_cookie_name() in request.COOKIES:
-            auth_type = 'jwt-cookie'
-        else:
-            auth_type = 'session-or-other'
+        auth_type = (
+            self._get_auth_type_from_successful_authenticator(request, response) or self._guess_auth_type(request)
+        )
 
         # .. custom_attribute_name: request_auth_type_guess
         # .. custom_attribute_description: This is a somewhat odd custom attribute, because
         #      we are taking a guess at authentication. Possible values include:
         #         no-user,
+        #         unevaluated-user (only if ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY is enabled),
         #         unauthenticated,
         #         jwt/bearer/other-token-type,
         #         jwt-cookie,
+        #         session (only when SessionAuthentication was the successful DRF authenticator),
         #         session-or-other (catch all).
+        #      When DRF authenticated the request with a JWT, Bearer, or Session authentication class,
+        #      the value is based on that class instead of the request headers and cookies.
         monitoring.set_custom_attribute('request_auth_type_guess', auth_type)
 
+    def _guess_auth_type(self, request):
+        """
+        Returns a guess at the authentication type, based on the request user, headers and cookies.
+        """
+        if self._is_request_user_skipped(request):
+            return 'unevaluated-user'
+        if not hasattr(request, 'user') or not request.user:
+            return 'no-user'
+        if not request.user.is_authenticated:
+            return 'unauthenticated'
+        if 'authorization' in request.headers and request.headers['authorization']:
+            token_parts = request.headers['authorization'].split()
+            # Example: "JWT eyJhbGciO..."
+            if len(token_parts) == 2:
+                return token_parts[0].lower()  # 'jwt' or 'bearer' (for example)
+            return 'other-token-type'
+        if jwt_cookie_name() in request.COOKIES:
+            return 'jwt-cookie'
+        return 'session-or-other'
+
+    def _get_auth_type_from_successful_authenticator(self, request, response):
+        """
+        Returns the auth type for the DRF authentication class that authenticated the request, or None.
+
+        The DRF request is only available through the response's renderer context, and the authenticator is only
+        read if DRF already ran authentication, so that authentication is never triggered from here.
+        """
+        renderer_context = getattr(response, 'renderer_context', None) or {}
+        drf_request = renderer_context.get('request')
+        authenticator = getattr(drf_request, '_authenticator', None)
+
+        if isinstance(authenticator, JSONWebTokenAuthentication):
+            return 'jwt-cookie' if JwtAuthentication.is_authenticating_with_jwt_cookie(request) else 'jwt'
+        if isinstance(authenticator, BearerAuthentication):
+            return 'bearer'
+        if isinstance(authenticator, SessionAuthentication):
+            return 'session'
+        return None
+
     AUTHENTICATED_USER_FOUND_CACHE_KEY = 'edx-drf-extensions.authenticated_user_found_in_middleware'
 
     def _set_request_authenticated_user_found_in_middleware_attribute(self):
@@ -203,9 +282,43 @@ class RequestCustomAttributesMiddleware(MiddlewareMixin):
             # and the value was already set in earlier middleware step, do not set again.
             return
 
+        if self._is_request_user_skipped(request):
+            return
+
         if hasattr(request, 'user') and request.user and request.user.is_authenticated:
             DEFAULT_REQUEST_CACHE.set(self.AUTHENTICATED_USER_FOUND_CACHE_KEY, value)
 
+    def _is_request_user_skipped(self, request):
+        """
+        Returns True if request.user should not be inspected, because it is a lazy object that has not yet been
+        evaluated and ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY is enabled.
+        """
+        if not get_setting(ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY):
+            return False
+        # Note: getattr does not evaluate a lazy object, and isinstance succeeds on its type without evaluating it.
+        user = getattr(request, 'user', None)
+        return isinstance(user, LazyObject) and user._wrapped is empty  # pylint: disable=protected-access
+
+
+# The number of distinct user agent strings for which the parsed client name is kept in memory.
+USER_AGENT_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def _get_client_name_from_user_agent(user_agent):
+    """
+    Returns the client name from an edx-rest-api-client user agent string, or None.
+
+    Most traffic comes from a small set of user agents, so parsed results are kept in a bounded LRU cache.
+    """
+    # Example agent string from edx-rest-api-client:
+    #    python-requests/2.9.1 edx-rest-api-client/1.7.2 ecommerce
+    #    See https://github.com/openedx/edx-rest-api-client/commit/692903c30b157f7a4edabc2f53aae1742db3a019
+    user_agent_parts = user_agent.split()
+    if len(user_agent_parts) == 3 and user_agent_parts[1].startswith('edx-rest-api-client/'):
+        return user_agent_parts[2]
+    return None
+
 
 class RequestMetricsMiddleware(RequestCustomAttributesMiddleware):
     """
@@ -1,12 +1,398 @@
 """ Paginatator methods for edX API implementations."""
+import datetime
+import hashlib
+import json
+import os
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
 
-from django.core.paginator import InvalidPage, Paginator
-from django.http import Http404
-from rest_framework import pagination
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import close_old_connections, connections
+from django.db.models import Q, QuerySet
+from django.http import Http404, StreamingHttpResponse
+from django.utils.functional import cached_property
+from django.utils.http import parse_etags, quote_etag
+from django.utils.translation import gettext_lazy as _
+from edx_django_utils.monitoring import set_custom_attribute
+from rest_framework import pagination, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.utils import encoders
+from rest_framework.utils.urls import replace_query_param
 
+from edx_rest_framework_extensions.count_strategies import ExactCount, NoCount
+from edx_rest_framework_extensions.settings import get_setting
+from edx_rest_framework_extensions.timing import PHASE_PAGINATION, timed_phase
 
-class DefaultPagination(pagination.PageNumberPagination):
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django ``Paginator`` whose count is computed by a count strategy (see ``count_strategies``).
+
+    When the count is not exact, any page number may be requested, and each page fetches one extra row to know
+    whether there is a next page.
+
+    When ``concurrent`` is True, the count and page queries of a queryset are run concurrently, the count on another
+    thread, and thus on another database connection (see ``CountStrategyMixin.concurrent_count``).
+    """
+
+    def __init__(self, object_list, per_page, *args, count_strategy=None, concurrent=False, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.concurrent = concurrent
+
+    @cached_property
+    def _count_and_is_exact(self):
+        return self.count_strategy.get_count(self.object_list)
+
+    @property
+    def count(self):
+        return self._count_and_is_exact[0]
+
+    @property
+    def count_is_exact(self):
+        """ Returns False if the count is a lower bound or an estimate, or if there is no count. """
+        return self._count_and_is_exact[1]
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            # The number of pages is unknown. Zero keeps DRF's page number controls hidden.
+            return 0
+        return super().num_pages
+
+    def validate_number(self, number):
+        if self.count_is_exact:
+            return super().validate_number(number)
+
+        # The number of pages is not known, so only the lower bound is checked.
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError) as number_error:
+            raise PageNotAnInteger(_('That page number is not an integer')) from number_error
+        if number < 1:
+            raise EmptyPage(_('That page number is less than 1'))
+        return number
+
+    def page(self, number):
+        rows = self._get_rows_concurrently_with_count(number) if self._is_concurrent_page(number) else None
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if self.count_is_exact:
+            if rows is None:
+                return super().page(number)
+            top = bottom + self.per_page
+            if top + self.orphans >= self.count:
+                top = self.count
+            return self._get_page(rows[:top - bottom], number, self)
+
+        if rows is None:
+            rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_('That page contains no results'))
+        return _InexactCountPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+
+    def _is_concurrent_page(self, number):
+        """
+        Returns True if the count and the rows of the page should be queried concurrently.
+
+        Not within a transaction, since the other connection would not see its uncommitted changes, nor without
+        persistent connections, since the count would then open a new connection each time.
+        """
+        if not (self.concurrent and isinstance(self.object_list, QuerySet)):
+            return False
+        if isinstance(self.count_strategy, NoCount) or '_count_and_is_exact' in self.__dict__:
+            return False
+        connection = connections[self.object_list.db]
+        if connection.in_atomic_block or connection.settings_dict['CONN_MAX_AGE'] == 0:
+            return False
+        try:
+            return int(number) >= 1
+        except (TypeError, ValueError):
+            return False
+
+    def _get_rows_concurrently_with_count(self, number):
+        """
+        Counts the queryset on another thread while fetching the rows of the page, and returns the rows.
+
+        Enough rows are fetched for any count: up to the orphans of a last page, or one extra row when the count
+        is not exact.
+        """
+        # .. custom_attribute_name: pagination_concurrent_count
+        # .. custom_attribute_description: True if the count and page queries of a page number paginator were run
+        #      concurrently, on separate database connections. Only set if the paginator enables concurrent_count.
+        set_custom_attribute('pagination_concurrent_count', True)
+        executor = _get_count_executor(os.getpid(), get_setting('PAGINATION_CONCURRENT_COUNT_MAX_WORKERS'))
+        count_future = executor.submit(_call_with_own_connection, lambda: self._count_and_is_exact)
+        try:
+            bottom = (int(number) - 1) * self.per_page
+            rows = list(self.object_list[bottom:bottom + self.per_page + max(self.orphans, 1)])
+        finally:
+            # Cached by _count_and_is_exact once the count completes.
+            count_future.result()
+        return rows
+
+
+class _InexactCountPage(Page):
+    """ Page of a ``CountStrategyPaginator`` whose count is not exact. """
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class CountStrategyMixin:
+    """
+    Mixin for ``PageNumberPagination`` subclasses that counts results with their ``count_strategy``.
+
+    When ``concurrent_count`` is True, the count and page queries of a queryset are sent concurrently on separate
+    database connections, rather than one after the other, which saves a round-trip to a remote database. The count
+    runs on a process-wide pool of PAGINATION_CONCURRENT_COUNT_MAX_WORKERS threads, each of which holds a persistent
+    database connection, so it requires ``CONN_MAX_AGE`` to be non-zero: with ``CONN_MAX_AGE = 0``, each count would
+    connect to the database anew, which costs more than the round-trip saved. It is not used in that case, within a
+    transaction (e.g. with ``ATOMIC_REQUESTS``), for ``NoCount``, or for ``page=last``, which needs the count first.
+    """
+    count_strategy = ExactCount()
+    concurrent_count = False
+
+    def django_paginator_class(self, object_list, per_page, **kwargs):
+        """
+        Returns the Django paginator. Called by ``PageNumberPagination.paginate_queryset`` in place of a class.
+        """
+        return CountStrategyPaginator(
+            object_list, per_page, count_strategy=self.count_strategy, concurrent=self.concurrent_count, **kwargs
+        )
+
+    def get_result_count(self):
+        """
+        Returns total number of results, or None if they are not counted
+        """
+        return self.page.paginator.count
+
+    def get_num_pages(self):
+        """
+        Returns total number of pages the results are divided into, or None if the results are not counted
+        """
+        if self.get_result_count() is None:
+            return None
+        return self.page.paginator.num_pages
+
+    def get_count_metadata(self):
+        """
+        Returns the additional pagination metadata of an inexact count, or an empty dict for an exact count.
+        """
+        if getattr(self.page.paginator, 'count_is_exact', True):
+            return {}
+        return {'count_is_exact': False}
+
+
+@lru_cache(maxsize=8)
+def _get_count_executor(pid, max_workers):  # pylint: disable=unused-argument
+    """
+    Returns the thread pool running concurrent counts.
+
+    Pools are cached per process id, so that a forked worker never shares the threads of its parent.
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='edx_drf_extensions_count')
+
+
+def _call_with_own_connection(func):
+    """
+    Calls func on a thread of the count pool, whose database connections are handled as for a request.
+    """
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+class StreamingExportMixin:
+    """
+    Mixin for paginators that adds an opt-in mode streaming all results, rather than a page, as newline-delimited JSON.
+
+    The mode is enabled by setting ``stream_query_param`` (e.g. to ``'stream'``), and requested with
+    ``?stream=true``. Results are read from the database with ``iterator(chunk_size=stream_chunk_size)``, and
+    serialized a chunk at a time with the view's serializer, so memory use does not grow with the number of results.
+    The view must provide ``get_serializer``, like DRF's generic views.
+    """
+    stream_query_param = None
+    stream_chunk_size = 500
+    stream_content_type = 'application/x-ndjson'
+
+    _stream = None
+
+    def is_stream_requested(self, request, view):
+        """
+        Returns True if the request asks for all results to be streamed, and the view supports it.
+        """
+        if not self.stream_query_param or not hasattr(view, 'get_serializer'):
+            return False
+        return request.query_params.get(self.stream_query_param, '').lower() in ('true', '1')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_stream_requested(request, view):
+            # The view serializes this empty page, and get_paginated_response returns the stream.
+            self._stream = (queryset, view)
+            return []
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_streaming_response(self):
+        """
+        Returns the response streaming all results, or None if streaming was not requested.
+        """
+        if self._stream is None:
+            return None
+        queryset, view = self._stream
+        return StreamingHttpResponse(self._get_stream_lines(queryset, view), content_type=self.stream_content_type)
+
+    def _get_stream_lines(self, queryset, view):
+        if isinstance(queryset, QuerySet):
+            rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        else:
+            rows = iter(queryset)
+        for chunk in iter(lambda: list(islice(rows, self.stream_chunk_size)), []):
+            yield ''.join(
+                json.dumps(item, cls=encoders.JSONEncoder) + '\n'
+                for item in view.get_serializer(chunk, many=True).data
+            )
+
+
+class ConditionalPageMixin:
+    """
+    Mixin for paginators that adds an ``ETag`` validator to pages, and answers ``304 Not Modified`` when it matches
+    the request's ``If-None-Match`` header, skipping the serialization of the page.
+
+    The validator is computed by ``get_page_etag``. By default, it is enabled by setting ``page_etag_field`` to a field
+    updated on every change (e.g. ``modified``), and it hashes the requested URL, the count, and the primary key and
+    ``page_etag_field`` of each result of the page, which have already been fetched. Override ``get_page_etag`` to
+    use another validator.
+    """
+    page_etag_field = None
+
+    _page_etag = None
+    _is_page_not_modified = False
+
+    def get_page_etag(self, page, request):
+        """
+        Returns the quoted ETag of the page of results, or None to disable conditional requests.
+        """
+        if self.page_etag_field is None:
+            return None
+        validator = json.dumps([
+            request.get_full_path(),
+            self.page.paginator.count,
+            [(obj.pk, getattr(obj, self.page_etag_field)) for obj in page],
+        ], cls=encoders.JSONEncoder)
+        return quote_etag(hashlib.sha256(validator.encode('utf8')).hexdigest()[:32])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view=view)
+        self._page_etag = None
+        self._is_page_not_modified = False
+        if not page or request.method not in ('GET', 'HEAD'):
+            return page
+
+        self._page_etag = self.get_page_etag(page, request)
+        if self._page_etag is not None and _etag_matches(self._page_etag, request.headers.get('If-None-Match')):
+            # The view serializes this empty page, and get_paginated_response returns the 304.
+            self._is_page_not_modified = True
+            return []
+        return page
+
+    def get_not_modified_response(self):
+        """
+        Returns a ``304 Not Modified`` response if the client's copy of the page is current, or None.
+        """
+        if not self._is_page_not_modified:
+            return None
+        return self.add_etag_header(Response(status=status.HTTP_304_NOT_MODIFIED))
+
+    def add_etag_header(self, response):
+        """
+        Adds the page's ETag, if any, to the response.
+        """
+        if self._page_etag is not None:
+            response['ETag'] = self._page_etag
+        return response
+
+
+def _etag_matches(etag, if_none_match):
+    if not if_none_match:
+        return False
+    # If-None-Match uses the weak comparison.
+    etags = [client_etag.removeprefix('W/') for client_etag in parse_etags(if_none_match)]
+    return '*' in etags or etag in etags
+
+
+class PageDepthLimitMixin:
+    """
+    Mixin for ``PageNumberPagination`` subclasses that rejects pages starting past ``max_page_offset`` results,
+    since the ``OFFSET`` scans of deep pages are expensive for the database. Deep traversals should use
+    ``KeysetPagination`` instead.
+
+    Such pages are rejected with a 400 naming the limit, rather than a 404, since they may well exist: the client
+    should narrow its request, not conclude that it has reached the end of the results.
+
+    ``max_page_offset`` defaults to the PAGINATION_MAX_PAGE_OFFSET setting, and ``None`` disables the limit.
+    """
+    max_page_offset = None
+    page_offset_exceeded_message = _(
+        'Pages starting past result {max_page_offset} are not available. Narrow the results with filters instead.'
+    )
+
+    def get_max_page_offset(self):
+        """
+        Returns the maximum offset of the first result of a page, or None if there is no limit.
+        """
+        if self.max_page_offset is not None:
+            return self.max_page_offset
+        return get_setting('PAGINATION_MAX_PAGE_OFFSET')
+
+    def get_page_number(self, request, paginator):
+        page_number = super().get_page_number(request, paginator)
+        try:
+            offset = max(int(page_number) - 1, 0) * paginator.per_page
+        except (TypeError, ValueError):
+            # Invalid page numbers are rejected by the paginator.
+            return page_number
+
+        # .. custom_attribute_name: pagination_offset
+        # .. custom_attribute_description: The offset of the first result of the requested page, for the page
+        #      number paginators of this package. Helps find callers requesting deep pages.
+        set_custom_attribute('pagination_offset', offset)
+        max_page_offset = self.get_max_page_offset()
+        if max_page_offset is not None and offset > max_page_offset:
+            # .. custom_attribute_name: pagination_offset_exceeded
+            # .. custom_attribute_description: True if the requested page was rejected because its offset exceeded
+            #      the max_page_offset of the paginator (or the PAGINATION_MAX_PAGE_OFFSET setting).
+            set_custom_attribute('pagination_offset_exceeded', True)
+            raise ValidationError({
+                self.page_query_param: [self.page_offset_exceeded_message.format(max_page_offset=max_page_offset)],
+            })
+        return page_number
+
+
+class DefaultPagination(
+    CountStrategyMixin, StreamingExportMixin, ConditionalPageMixin, PageDepthLimitMixin, pagination.PageNumberPagination
+):
     """
     Default paginator for APIs in edx-platform.
 
@@ -17,22 +403,37 @@ class DefaultPagination(pagination.PageNumberPagination):
     page_size = 10
     max_page_size = 100
 
+    @timed_phase(PHASE_PAGINATION)
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset, request, view=view)
+
+    @timed_phase(PHASE_PAGINATION)
     def get_paginated_response(self, data):
         """
         Annotate the response with pagination information.
         """
-        return Response({
+        streaming_response = self.get_streaming_response()
+        if streaming_response is not None:
+            return streaming_response
+        not_modified_response = self.get_not_modified_response()
+        if not_modified_response is not None:
+            return not_modified_response
+
+        return self.add_etag_header(Response({
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
-            'count': self.page.paginator.count,
-            'num_pages': self.page.paginator.num_pages,
+            'count': self.get_result_count(),
+            'num_pages': self.get_num_pages(),
             'current_page': self.page.number,
             'start': (self.page.number - 1) * self.get_page_size(self.request),
+            **self.get_count_metadata(),
             'results': data
-        })
+        }))
 
 
-class NamespacedPageNumberPagination(pagination.PageNumberPagination):
+class NamespacedPageNumberPagination(
+    CountStrategyMixin, StreamingExportMixin, ConditionalPageMixin, PageDepthLimitMixin, pagination.PageNumberPagination
+):
     """
     Pagination scheme that returns results with pagination metadata
     embedded in a "pagination" attribute.  Can be used with data
@@ -42,27 +443,28 @@ class NamespacedPageNumberPagination(pagination.PageNumberPagination):
 
     page_size_query_param = "page_size"
 
-    def get_result_count(self):
-        """
-        Returns total number of results
-        """
-        return self.page.paginator.count
-
-    def get_num_pages(self):
-        """
-        Returns total number of pages the results are divided into
-        """
-        return self.page.paginator.num_pages
+    @timed_phase(PHASE_PAGINATION)
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset, request, view=view)
 
+    @timed_phase(PHASE_PAGINATION)
     def get_paginated_response(self, data):
         """
         Annotate the response with pagination information
         """
+        streaming_response = self.get_streaming_response()
+        if streaming_response is not None:
+            return streaming_response
+        not_modified_response = self.get_not_modified_response()
+        if not_modified_response is not None:
+            return not_modified_response
+
         metadata = {
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'count': self.get_result_count(),
             'num_pages': self.get_num_pages(),
+            **self.get_count_metadata(),
         }
         if isinstance(data, dict):
             if 'results' not in data:
@@ -73,10 +475,198 @@ class NamespacedPageNumberPagination(pagination.PageNumberPagination):
                 'results': data,
                 'pagination': metadata,
             }
-        return Response(data)
+        return self.add_etag_header(Response(data))
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Keyset (cursor) pagination, with the ``next``/``previous``/``results`` envelope of ``DefaultPagination``.
+
+    Rather than an ``OFFSET`` query and a ``COUNT(*)``, each page is fetched with a ``WHERE`` clause that continues
+    from the first or last row of the adjacent page over the ``ordering`` fields, so every page has the same cost,
+    however deep it is. The cursors in the ``next`` and ``previous`` links are opaque to clients.
+
+    ``ordering`` should be covered by an index, and its fields must be non-null, concrete fields of the model (e.g.
+    ``user_id`` rather than ``user``). The primary key is appended to it if needed, so that the ordering is unique.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 10
+    max_page_size = 100
+    ordering = ('pk',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.base_url = None
+        self.next_position = None
+        self.previous_position = None
+
+    def get_page_size(self, request):
+        """
+        Returns the page size of the request, bounded by ``max_page_size``.
+        """
+        if self.page_size_query_param:
+            try:
+                return pagination._positive_int(  # pylint: disable=protected-access
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        Returns the ordering of the queryset's pages, ending with the primary key.
+        """
+        ordering = tuple(self.ordering)
+        if ordering[-1].lstrip('-') not in ('pk', queryset.model._meta.pk.name):
+            ordering += ('pk',)
+        return ordering
+
+    @timed_phase(PHASE_PAGINATION)
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        position, is_reversed = self.decode_cursor(request, ordering, queryset.model)
+
+        if is_reversed:
+            ordering = tuple(_reverse_ordering_field(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(_get_keyset_filter(ordering, position))
+
+        # Fetch one extra row to know whether there are more rows in that direction.
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if is_reversed:
+            results.reverse()
+
+        has_next = is_reversed or has_more
+        has_previous = has_more if is_reversed else position is not None
+        self.next_position = self.previous_position = None
+        if results:
+            if has_next:
+                self.next_position = _get_position(results[-1], ordering)
+            if has_previous:
+                self.previous_position = _get_position(results[0], ordering)
+        return results
+
+    def decode_cursor(self, request, ordering, model):
+        """
+        Returns the position and direction of the cursor of the request, or ``(None, False)`` for the first page.
+
+        The values of the position are converted by the model fields of the ordering.
+
+        Raises:
+            NotFound: The cursor is malformed, or its values are not valid for their fields.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position, is_reversed = cursor['p'], bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError) as cursor_error:
+            raise NotFound(self.invalid_cursor_message) from cursor_error
+        if not isinstance(position, list) or len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # The ordering fields are non-null, and their values are encoded as JSON scalars.
+        if not all(isinstance(value, (str, int, float)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            fields = [_get_ordering_field(model, field) for field in ordering]
+            position = [field.get_prep_value(field.to_python(value)) for field, value in zip(fields, position)]
+        except (TypeError, ValueError, DjangoValidationError, FieldDoesNotExist) as value_error:
+            raise NotFound(self.invalid_cursor_message) from value_error
+        return position, is_reversed
 
+    def encode_cursor(self, position, is_reversed=False):
+        """
+        Returns the URL of the page before (if reversed) or after the given position.
+        """
+        cursor = {'p': position}
+        if is_reversed:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=_encode_position_value).encode('utf8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, is_reversed=True)
 
-def paginate_search_results(object_class, search_results, page_size, page):
+    @timed_phase(PHASE_PAGINATION)
+    def get_paginated_response(self, data):
+        """
+        Annotate the response with pagination information.
+        """
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _reverse_ordering_field(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+def _get_ordering_field(model, field):
+    name = field.lstrip('-')
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def _get_position(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+def _get_keyset_filter(ordering, position):
+    """
+    Returns the filter for the rows after the position, e.g. ``a > x OR (a = x AND b > y)`` for ``('a', 'b')``.
+    """
+    keyset_filter = Q()
+    equal_filter = Q()
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        keyset_filter |= equal_filter & Q(**{f'{name}__{lookup}': value})
+        equal_filter &= Q(**{name: value})
+    return keyset_filter
+
+
+def _encode_position_value(value):
+    # Unlike DjangoJSONEncoder, keeps the microseconds of times, which the ordering may depend on.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not a valid cursor position.')
+
+
+def paginate_search_results(object_class, search_results, page_size, page,
+                            select_related=None, prefetch_related=None, only=None):
     """
     Takes search results and returns a Page object populated
     with db objects for that page.
@@ -85,9 +675,64 @@ def paginate_search_results(object_class, search_results, page_size, page):
     :param search_results: search results.
     :param page_size: Number of results per page.
     :param page: Page number.
+    :param select_related: Optional related fields to load with ``select_related``.
+    :param prefetch_related: Optional related lookups to load with ``prefetch_related``.
+    :param only: Optional fields to load with ``only``, which must include any ``select_related`` fields.
+    :return: Paginator object with model objects
+    """
+    return _paginate_search_results(
+        object_class, search_results['results'], page_size, page, select_related, prefetch_related, only
+    )
+
+
+def paginate_lazy_search_results(object_class, get_search_results, total, page_size, page,
+                                 select_related=None, prefetch_related=None, only=None):
+    """
+    Like ``paginate_search_results``, but only fetches the search results of the requested page from the search
+    engine, so memory use does not grow with the number of hits.
+
+    :param object_class: Model class to use when querying the db for objects.
+    :param get_search_results: Callable taking ``(offset, limit)`` and returning that window of search results.
+    :param total: Total number of search results, as reported by the search engine.
+    :param page_size: Number of results per page.
+    :param page: Page number, or 'last'.
+    :param select_related: Optional related fields to load with ``select_related``.
+    :param prefetch_related: Optional related lookups to load with ``prefetch_related``.
+    :param only: Optional fields to load with ``only``, which must include any ``select_related`` fields.
     :return: Paginator object with model objects
     """
-    paginator = Paginator(search_results['results'], page_size)
+    return _paginate_search_results(
+        object_class, _LazySearchResults(get_search_results, total), page_size, page,
+        select_related, prefetch_related, only
+    )
+
+
+class _LazySearchResults:
+    """
+    Sequence of search results, of the length reported by the search engine, that fetches slices on demand.
+    """
+
+    def __init__(self, get_search_results, total):
+        self.get_search_results = get_search_results
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('Search results can only be sliced.')
+        start, stop, __ = index.indices(self.total)
+        if stop <= start:
+            return []
+        return list(self.get_search_results(start, stop - start))
+
+
+def _paginate_search_results(object_class, results, page_size, page, select_related, prefetch_related, only):
+    """
+    Returns the page of the search results, populated with db objects.
+    """
+    paginator = Paginator(results, page_size)
 
     # This code is taken from within the GenericAPIView#paginate_queryset method.
     # It is common code, but
@@ -111,16 +756,16 @@ def paginate_search_results(object_class, search_results, page_size, page):
 
     search_queryset_pks = [item['data']['pk'] for item in paged_results.object_list]
     queryset = object_class.objects.filter(pk__in=search_queryset_pks)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only:
+        queryset = queryset.only(*only)
 
-    def ordered_objects(primary_key):
-        """ Returns database object matching the search result object"""
-        for obj in queryset:
-            if obj.pk == primary_key:
-                return obj
-        return None
-
-    # map over the search results and get a list of database objects in the same order
-    object_results = list(map(ordered_objects, search_queryset_pks))
-    paged_results.object_list = object_results
+    # Evaluate the queryset once into a map by primary key, to get the database objects in the search results' order.
+    # Search results missing from the database are None.
+    objects_by_pk = {obj.pk: obj for obj in queryset}
+    paged_results.object_list = [objects_by_pk.get(primary_key) for primary_key in search_queryset_pks]
 
     return paged_results
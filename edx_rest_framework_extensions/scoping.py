@@ -23,6 +23,31 @@ subject's accessible scopes in one bulk lookup (for example openedx-authz
 ``WHERE`` clause, rather than running an ``enforce``-style check on every row --
 but any object that can filter a queryset for a subject may implement it.
 
+A policy may also implement :class:`ScopeResolvingPolicy`, splitting ``scope``
+into resolving the subject's scope set and filtering on it, so that
+:class:`CachedScopingPolicy` can memoize the resolved scope sets. Such a
+policy may build its filter with :func:`compile_scope_filter`, which keeps the
+SQL of large scope sets small. Policies can be combined with :class:`AllOf`,
+:class:`AnyOf` and :class:`Not`, which apply them as a single ``WHERE`` clause.
+:class:`ScopeSetPolicy` is a convenience base class for the common case of
+matching a field of the rows against the subject's scope set.
+
+A policy implementing :class:`ObjectScopingPolicy` can also tell whether a
+single object is visible, which :class:`ScopedQuerysetMixin` uses in
+``get_object()`` to check an object against a resolved scope set without
+querying the scoped queryset.
+
+When the toggle ``EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION]`` is
+enabled, :class:`ScopedQuerysetMixin` reports the time spent in the policy, and
+the time spent resolving the scope set and its size as reported with
+:func:`report_scope_set` (which the policies of this module do), as custom
+attributes. A sample of requests may also log their final query and its
+``EXPLAIN`` output (see the ``SCOPING_EXPLAIN_SAMPLE_RATE`` setting).
+
+For reporting jobs, :func:`scope_many` scopes a queryset for many subjects,
+resolving their scope sets in bulk, batch by batch (see
+:class:`MultiSubjectScopingPolicy`).
+
 ``ScopingPolicy`` is a :class:`typing.Protocol` rather than an abstract base
 class: implementers do not import or inherit anything, and type checkers verify
 conformance statically. :class:`ScopedQuerysetMixin` performs a lightweight
@@ -36,10 +61,58 @@ scoped queryset; code that queries the model directly is not protected by it.
 .. _OEP-66: https://docs.openedx.org/projects/openedx-proposals/en/latest/best-practices/oep-0066-bp-authorization.html
 .. _row-level security: https://www.postgresql.org/docs/current/ddl-rowsecurity.html
 """
-from typing import Any, Optional, Protocol
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import (
+    Any,
+    Collection,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from django.core.cache import caches
+from django.core.exceptions import (
+    EmptyResultSet,
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.db import connections
+from django.db.models import Exists, Model, OuterRef, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+from django.http import Http404
+from edx_django_utils.cache import RequestCache
+from edx_django_utils.monitoring import increment, set_custom_attribute
+
+from edx_rest_framework_extensions.config import ENABLE_SCOPING_INSTRUMENTATION
+from edx_rest_framework_extensions.settings import get_setting
+from edx_rest_framework_extensions.timing import PHASE_SCOPING, timed_phase
+
 
-from django.core.exceptions import ImproperlyConfigured
-from django.db.models import QuerySet
+logger = logging.getLogger(__name__)
+
+
+SCOPE_FILTER_IN = "in"
+SCOPE_FILTER_VALUES = "values"
+SCOPE_FILTER_EXISTS = "exists"
+
+# Selects each value of a single array parameter, by database vendor.
+_ARRAY_VALUES_SQL = {
+    "sqlite": "SELECT value FROM json_each(%s)",
+    "postgresql": "SELECT unnest(%s)",
+}
+
+_REQUEST_CACHE_NAMESPACE = "edx_rest_framework_extensions.scoping"
+_REPORTED_SCOPE_SETS_CACHE_KEY = "reported_scope_sets"
 
 
 class ScopingPolicy(Protocol):
@@ -61,6 +134,633 @@ class ScopingPolicy(Protocol):
         """Return ``queryset`` filtered to the rows visible to ``subject``."""
 
 
+class ScopeResolvingPolicy(ScopingPolicy, Protocol):
+    """
+    Structural interface for a :class:`ScopingPolicy` whose ``scope`` resolves
+    the subject's accessible scope set, then filters the queryset on it.
+
+    Its ``scope`` is expected to be equivalent to::
+
+        queryset.filter(self.get_scope_filter(queryset, subject, self.resolve_scopes(subject)))
+
+    Exposing the two steps lets wrappers such as :class:`CachedScopingPolicy`
+    reuse a resolved scope set rather than repeating the bulk lookup.
+    """
+
+    def resolve_scopes(self, subject: Any) -> Collection[Hashable]:
+        """Return the keys of the scopes accessible to ``subject``, e.g. from one bulk lookup."""
+
+    def get_scope_filter(self, queryset: QuerySet, subject: Any, scopes: Collection[Hashable]) -> Q:
+        """Return the filter matching the rows of ``queryset`` within ``scopes``."""
+
+
+class ObjectScopingPolicy(ScopingPolicy, Protocol):
+    """
+    Structural interface for a :class:`ScopingPolicy` that can tell whether a
+    single object is visible, e.g. from the subject's resolved scope set.
+
+    A :class:`ScopeResolvingPolicy` may implement ``contains`` with an
+    ``is_in_scopes(obj, subject, scopes)`` method, taking the resolved scope set;
+    :class:`CachedScopingPolicy` and the combinators then call it with their own
+    resolved scope sets.
+    """
+
+    def contains(self, obj: Any, subject: Any) -> Optional[bool]:
+        """Return whether ``obj`` is visible to ``subject``, or None if that is unknown without a query."""
+
+
+class MultiSubjectScopingPolicy(ScopingPolicy, Protocol):
+    """
+    Structural interface for a :class:`ScopingPolicy` that scopes a queryset for
+    many subjects at once, e.g. for a reporting job, rather than once per subject.
+
+    :func:`scope_many` uses ``scope_many`` when a policy implements it. Otherwise,
+    a :class:`ScopeResolvingPolicy` may implement
+    ``resolve_scopes_many(subjects)``, returning a mapping of each subject to its
+    scope set from a single bulk lookup, which :func:`scope_many`,
+    :class:`CachedScopingPolicy` and the combinators use.
+    """
+
+    def scope_many(self, queryset: QuerySet, subjects: Iterable[Any]) -> Iterable[Tuple[Any, QuerySet]]:
+        """Return ``(subject, scoped queryset)`` pairs for each of ``subjects``."""
+
+
+class CachedScopingPolicy:
+    """
+    Wraps a :class:`ScopeResolvingPolicy`, memoizing the scope set it resolves for each subject.
+
+    Resolved scope sets are cached for the rest of the request, and for ``ttl``
+    seconds across requests in the Django cache named ``cache_alias`` (``ttl=0``
+    only caches them for the request). Cached scope sets may thus be stale by up
+    to ``ttl`` seconds; call :meth:`invalidate` when a subject's grants change.
+
+    The request cache is the ``RequestCache`` of ``edx_django_utils``, which is
+    only cleared by ``RequestCacheMiddleware`` (or ``JwtAuthPipelineMiddleware``)
+    at the start and end of each request. Outside of requests, e.g. in celery
+    tasks or management commands, it is never cleared, so scope sets would be
+    cached for the lifetime of the process: callers must then call
+    :meth:`clear_request_cache` once they are done with a subject (e.g. at the end
+    of each task). :func:`scope_many` does not use the request cache.
+
+    Entries of the request cache are keyed by the wrapped policy object, and
+    entries of the Django cache by ``name`` and the subject's primary key. By
+    default, ``name`` is the wrapped policy's class, followed by its
+    ``cache_key_fragment`` attribute if it has one, so differently configured
+    policies of the same class must either set distinct ``cache_key_fragment``
+    values or be given different names. A combinator (e.g. :class:`AllOf`) cached
+    across requests must be given a name. Subjects without a primary key (e.g.
+    anonymous users) are never cached. A policy without ``resolve_scopes`` is
+    applied as is, without caching.
+
+    Each lookup of a scope set increments the ``scoping_scope_cache_request_hits``,
+    ``scoping_scope_cache_hits`` or ``scoping_scope_cache_misses`` custom attribute.
+    """
+    KEY_PREFIX = "edx_drf_extensions.scopes."
+
+    def __init__(self, policy: ScopingPolicy, ttl: int = 60, cache_alias: str = "default", name: Optional[str] = None):
+        if name is None and ttl and isinstance(policy, _PolicyCombinator):
+            raise ImproperlyConfigured(
+                f"CachedScopingPolicy of a {type(policy).__name__} requires a name to cache its scope sets across "
+                f"requests, since the scopes of a combinator depend on its policies rather than its class."
+            )
+        self.policy = policy
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.name = name or _get_default_cache_name(policy)
+
+    def scope(self, queryset: QuerySet, subject: Any) -> QuerySet:
+        """Return ``queryset`` filtered to the rows visible to ``subject``, using the cached scope set."""
+        if not callable(getattr(self.policy, "resolve_scopes", None)):
+            return self.policy.scope(queryset, subject)
+        return queryset.filter(self.get_scope_filter(queryset, subject, _resolve_reported_scopes(self, subject)))
+
+    def get_scope_filter(self, queryset: QuerySet, subject: Any, scopes: Collection[Hashable]) -> Q:
+        """Return the wrapped policy's filter for ``scopes``."""
+        return self.policy.get_scope_filter(queryset, subject, scopes)
+
+    def contains(self, obj: Any, subject: Any) -> Optional[bool]:
+        """Return whether ``obj`` is visible to ``subject``, using the cached scope set if possible."""
+        if callable(getattr(self.policy, "resolve_scopes", None)):
+            return self.is_in_scopes(obj, subject, self.resolve_scopes(subject))
+        return _get_policy_membership(self.policy, obj, subject, None)
+
+    def is_in_scopes(self, obj: Any, subject: Any, scopes: Collection[Hashable]) -> Optional[bool]:
+        """Return whether ``obj`` is within ``scopes`` according to the wrapped policy, or None if it cannot tell."""
+        return _get_policy_membership(self.policy, obj, subject, scopes)
+
+    def resolve_scopes(self, subject: Any) -> Collection[Hashable]:
+        """Return the scope set of ``subject``, from the request cache, the Django cache, or the wrapped policy."""
+        key = self.get_cache_key(subject)
+        if key is None:
+            return self.policy.resolve_scopes(subject)
+
+        request_cache = RequestCache(_REQUEST_CACHE_NAMESPACE)
+        request_key = self._get_request_cache_key(key)
+        cached_response = request_cache.get_cached_response(request_key)
+        if cached_response.is_found:
+            # .. custom_attribute_name: scoping_scope_cache_request_hits
+            # .. custom_attribute_description: The number of scope sets of CachedScopingPolicy found in the request
+            #      cache, i.e. already resolved earlier in the request.
+            increment("scoping_scope_cache_request_hits")
+            return cached_response.value
+
+        scopes = caches[self.cache_alias].get(key) if self.ttl else None
+        if scopes is not None:
+            # .. custom_attribute_name: scoping_scope_cache_hits
+            # .. custom_attribute_description: The number of scope sets of CachedScopingPolicy found in the Django
+            #      cache, i.e. resolved by an earlier request within their ttl.
+            increment("scoping_scope_cache_hits")
+        else:
+            # .. custom_attribute_name: scoping_scope_cache_misses
+            # .. custom_attribute_description: The number of scope sets of CachedScopingPolicy that were not cached,
+            #      and were resolved by the wrapped policy.
+            increment("scoping_scope_cache_misses")
+            scopes = self.policy.resolve_scopes(subject)
+            if not isinstance(scopes, (frozenset, _CombinedScopes)):
+                scopes = frozenset(scopes)
+            if self.ttl:
+                caches[self.cache_alias].set(key, scopes, self.ttl)
+
+        request_cache.set(request_key, scopes)
+        return scopes
+
+    def resolve_scopes_many(self, subjects: Collection[Any]) -> Mapping[Any, Collection[Hashable]]:
+        """
+        Return the scope set of each of ``subjects``, from the Django cache, or resolved in bulk by the wrapped policy.
+
+        The request cache is not used, so that memory stays bounded by the number of subjects.
+        """
+        cache_keys = {subject: self.get_cache_key(subject) for subject in subjects}
+        cached_scopes = {}
+        if self.ttl:
+            cached_scopes = caches[self.cache_alias].get_many([key for key in cache_keys.values() if key])
+        scopes_by_subject = {
+            subject: cached_scopes[key] for subject, key in cache_keys.items() if key in cached_scopes
+        }
+
+        missing_subjects = [subject for subject in subjects if subject not in scopes_by_subject]
+        if missing_subjects:
+            resolved_scopes = {}
+            for subject, scopes in _resolve_scopes_many(self.policy, missing_subjects).items():
+                if not isinstance(scopes, (frozenset, _CombinedScopes)):
+                    scopes = frozenset(scopes)
+                scopes_by_subject[subject] = scopes
+                if cache_keys[subject]:
+                    resolved_scopes[cache_keys[subject]] = scopes
+            if self.ttl and resolved_scopes:
+                caches[self.cache_alias].set_many(resolved_scopes, self.ttl)
+        return scopes_by_subject
+
+    def invalidate(self, subject: Any) -> None:
+        """Forget the cached scope set of ``subject``, e.g. when its grants change."""
+        key = self.get_cache_key(subject)
+        if key is None:
+            return
+        RequestCache(_REQUEST_CACHE_NAMESPACE).delete(self._get_request_cache_key(key))
+        caches[self.cache_alias].delete(key)
+
+    @staticmethod
+    def clear_request_cache() -> None:
+        """Forget the scope sets cached for the request, e.g. at the end of a celery task."""
+        RequestCache(_REQUEST_CACHE_NAMESPACE).clear()
+
+    def get_cache_key(self, subject: Any) -> Optional[str]:
+        """Return the cache key of the scope set of ``subject``, or None if it should not be cached."""
+        subject_key = getattr(subject, "pk", None)
+        if subject_key is None:
+            return None
+        return f"{self.KEY_PREFIX}{self.name}.{subject_key}"
+
+    def _get_request_cache_key(self, key):
+        # The wrapped policy outlives the request, so its id is unique within the request.
+        return f"{key}.{id(self.policy)}"
+
+
+def _get_default_cache_name(policy):
+    """
+    Return the default name of the cached scope sets of ``policy``: its class, and its ``cache_key_fragment`` if any.
+    """
+    name = f"{type(policy).__module__}.{type(policy).__qualname__}"
+    cache_key_fragment = getattr(policy, "cache_key_fragment", None)
+    if cache_key_fragment is not None:
+        name = f"{name}.{cache_key_fragment}"
+    return name
+
+
+class _CombinedScopes(tuple):
+    """ The scope sets of the policies of a combinator, in order. """
+
+
+class _PolicyCombinator(ABC):
+    """
+    Base class of the policies combining other policies into a single filter.
+
+    Its scope set is a tuple of the scope sets of its policies (None for those
+    without ``resolve_scopes``). Each distinct policy object is resolved once,
+    even if it appears in several branches of nested combinators.
+
+    A combinator without policies is rejected rather than given a default scope,
+    since an empty ``AllOf`` would otherwise match every row.
+    """
+
+    def __init__(self, *policies: ScopingPolicy):
+        if not policies:
+            raise ImproperlyConfigured(f"{type(self).__name__} requires at least one scoping policy.")
+        self.policies = policies
+
+    def scope(self, queryset: QuerySet, subject: Any) -> QuerySet:
+        """Return ``queryset`` filtered to the rows visible to ``subject``, with a single filter."""
+        return queryset.filter(self.get_scope_filter(queryset, subject, _resolve_reported_scopes(self, subject)))
+
+    def resolve_scopes(self, subject: Any) -> tuple:
+        """Return the scope sets of the policies for ``subject``, as a tuple."""
+        return self._resolve_scopes(subject, {})
+
+    def _resolve_scopes(self, subject, resolved_scopes):
+        scopes = []
+        for policy in self.policies:
+            if id(policy) not in resolved_scopes:
+                if isinstance(policy, _PolicyCombinator):
+                    resolved_scopes[id(policy)] = policy._resolve_scopes(  # pylint: disable=protected-access
+                        subject, resolved_scopes
+                    )
+                elif _is_scope_resolving(policy):
+                    resolved_scopes[id(policy)] = policy.resolve_scopes(subject)
+                else:
+                    resolved_scopes[id(policy)] = None
+            scopes.append(resolved_scopes[id(policy)])
+        return _CombinedScopes(scopes)
+
+    def resolve_scopes_many(self, subjects: Collection[Any]) -> Mapping[Any, tuple]:
+        """Return the scope sets of the policies for each of ``subjects``, resolving each policy's in bulk."""
+        return self._resolve_scopes_many(subjects, {})
+
+    def _resolve_scopes_many(self, subjects, resolved_scopes):
+        scopes_by_policy = []
+        for policy in self.policies:
+            if id(policy) not in resolved_scopes:
+                if isinstance(policy, _PolicyCombinator):
+                    resolved_scopes[id(policy)] = policy._resolve_scopes_many(  # pylint: disable=protected-access
+                        subjects, resolved_scopes
+                    )
+                elif _is_scope_resolving(policy):
+                    resolved_scopes[id(policy)] = _resolve_scopes_many(policy, subjects)
+                else:
+                    resolved_scopes[id(policy)] = None
+            scopes_by_policy.append(resolved_scopes[id(policy)])
+        return {
+            subject: _CombinedScopes(
+                None if scopes_by_subject is None else scopes_by_subject[subject]
+                for scopes_by_subject in scopes_by_policy
+            )
+            for subject in subjects
+        }
+
+    def get_scope_filter(self, queryset: QuerySet, subject: Any, scopes: tuple) -> Q:
+        """Return the combination of the filters of the policies for their scope sets."""
+        return self._combine([
+            _get_policy_filter(policy, queryset, subject, policy_scopes)
+            for policy, policy_scopes in zip(self.policies, scopes)
+        ])
+
+    def contains(self, obj: Any, subject: Any) -> Optional[bool]:
+        """Return whether ``obj`` is visible to ``subject``, or None if a policy cannot tell without a query."""
+        return self.is_in_scopes(obj, subject, self.resolve_scopes(subject))
+
+    def is_in_scopes(self, obj: Any, subject: Any, scopes: tuple) -> Optional[bool]:
+        """Return the combination of whether ``obj`` is within the scope sets of the policies."""
+        return self._combine_memberships([
+            _get_policy_membership(policy, obj, subject, policy_scopes)
+            for policy, policy_scopes in zip(self.policies, scopes)
+        ])
+
+    @abstractmethod
+    def _combine(self, filters):
+        """Return the filter combining the ``filters`` of the policies."""
+
+    @abstractmethod
+    def _combine_memberships(self, memberships):
+        """Return the membership combining the ``memberships`` (True, False or None) of the policies."""
+
+
+class AllOf(_PolicyCombinator):
+    """
+    Policy matching the rows visible under all of the given policies.
+
+    Policies implementing :class:`ScopeResolvingPolicy` contribute their filters
+    to a single ``WHERE`` clause; others are applied as a ``pk IN`` subquery.
+    """
+
+    def _combine(self, filters):
+        combined = filters[0]
+        for scope_filter in filters[1:]:
+            combined &= scope_filter
+        return combined
+
+    def _combine_memberships(self, memberships):
+        if False in memberships:
+            return False
+        return None if None in memberships else True
+
+
+class AnyOf(_PolicyCombinator):
+    """
+    Policy matching the rows visible under any of the given policies.
+
+    Policies implementing :class:`ScopeResolvingPolicy` contribute their filters
+    to a single ``WHERE`` clause; others are applied as a ``pk IN`` subquery.
+    """
+
+    def _combine(self, filters):
+        combined = filters[0]
+        for scope_filter in filters[1:]:
+            combined |= scope_filter
+        return combined
+
+    def _combine_memberships(self, memberships):
+        if True in memberships:
+            return True
+        return None if None in memberships else False
+
+
+class Not(_PolicyCombinator):
+    """
+    Policy matching the rows not visible under the given policy, e.g. to exclude rows within ``AllOf``.
+    """
+
+    def __init__(self, policy: ScopingPolicy):
+        super().__init__(policy)
+
+    def _combine(self, filters):
+        return ~filters[0]
+
+    def _combine_memberships(self, memberships):
+        return None if memberships[0] is None else not memberships[0]
+
+
+def _get_policy_filter(policy, queryset, subject, scopes):
+    """
+    Return the filter of a combined policy, as a subquery on its scoped queryset if it cannot provide one.
+    """
+    if _is_scope_resolving(policy):
+        return policy.get_scope_filter(queryset, subject, scopes)
+    return Q(pk__in=policy.scope(queryset.all(), subject).values("pk"))
+
+
+def _is_scope_resolving(policy):
+    """
+    Return True if the policy implements :class:`ScopeResolvingPolicy`, or is a cache of one.
+    """
+    if isinstance(policy, CachedScopingPolicy):
+        return _is_scope_resolving(policy.policy)
+    return callable(getattr(policy, "resolve_scopes", None)) and callable(getattr(policy, "get_scope_filter", None))
+
+
+def _resolve_scopes_many(policy, subjects):
+    """
+    Return the scope set of each of ``subjects``, resolved in bulk if the policy implements ``resolve_scopes_many``.
+    """
+    resolve_scopes_many = getattr(policy, "resolve_scopes_many", None)
+    if callable(resolve_scopes_many):
+        return resolve_scopes_many(subjects)
+    return {subject: policy.resolve_scopes(subject) for subject in subjects}
+
+
+def scope_many(
+    policy: ScopingPolicy, queryset: QuerySet, subjects: Iterable[Any], batch_size: Optional[int] = None
+) -> Iterator[Tuple[Any, QuerySet]]:
+    """
+    Yield ``(subject, scoped queryset)`` pairs for each of ``subjects``, e.g. for a reporting job.
+
+    Use ``dict(scope_many(...))`` for a mapping of each subject to its scoped
+    queryset. The policy's own ``scope_many`` is used if it implements
+    :class:`MultiSubjectScopingPolicy`. Otherwise, subjects are processed in
+    batches of ``batch_size`` (by default, the SCOPING_SCOPE_MANY_BATCH_SIZE
+    setting), and the scope sets of each batch are resolved together, in bulk
+    if the policy implements ``resolve_scopes_many``. Only the scope sets of one
+    batch are held at a time, so ``subjects`` may be a lazy iterable.
+    """
+    if callable(getattr(policy, "scope_many", None)):
+        yield from policy.scope_many(queryset, subjects)
+        return
+
+    for batch in _get_batches(subjects, batch_size):
+        if not _is_scope_resolving(policy):
+            for subject in batch:
+                yield subject, policy.scope(queryset, subject)
+            continue
+
+        scopes_by_subject = _resolve_scopes_many(policy, batch)
+        for subject in batch:
+            yield subject, queryset.filter(policy.get_scope_filter(queryset, subject, scopes_by_subject[subject]))
+
+
+def scope_many_annotated(
+    policy: ScopingPolicy,
+    queryset: QuerySet,
+    subjects: Iterable[Any],
+    batch_size: Optional[int] = None,
+    annotation: str = "scoped_subject_id",
+) -> Iterator[QuerySet]:
+    """
+    Yield, for each batch of ``subjects``, a single queryset of the rows visible to the subjects of the batch.
+
+    Each row is annotated with the primary key of the subject it is visible to,
+    as ``annotation``, and appears once per such subject. The querysets are the
+    ``UNION ALL`` of the subjects' scoped querysets, without ordering. Batches
+    are those of :func:`scope_many`, and should stay below the database's limit
+    on compound statements (500 terms on SQLite).
+    """
+    for batch in _get_batches(scope_many(policy, queryset, subjects, batch_size), batch_size):
+        querysets = [
+            scoped_queryset.order_by().annotate(**{annotation: Value(subject.pk)})
+            for subject, scoped_queryset in batch
+        ]
+        yield querysets[0].union(*querysets[1:], all=True)
+
+
+def _get_batches(iterable, batch_size):
+    """
+    Yield lists of up to ``batch_size`` items (by default, the SCOPING_SCOPE_MANY_BATCH_SIZE setting) of ``iterable``.
+    """
+    batch_size = batch_size or get_setting("SCOPING_SCOPE_MANY_BATCH_SIZE")
+    iterator = iter(iterable)
+    batch = list(islice(iterator, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, batch_size))
+
+
+def report_scope_set(scopes: Collection[Hashable], resolution_seconds: Optional[float] = None) -> None:
+    """
+    Report a scope set resolved by a policy, and the time it took, to :class:`ScopedQuerysetMixin`.
+
+    Policies implementing ``scope`` themselves may call it. It does nothing unless
+    the toggle ``EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION]`` is enabled,
+    and the policy is being applied by :class:`ScopedQuerysetMixin`, so nothing
+    accumulates when policies are used elsewhere (e.g. in celery tasks).
+    """
+    if not get_setting(ENABLE_SCOPING_INSTRUMENTATION):
+        return
+    reported_scope_sets = RequestCache(_REQUEST_CACHE_NAMESPACE).data.get(_REPORTED_SCOPE_SETS_CACHE_KEY)
+    if reported_scope_sets is not None:
+        reported_scope_sets.append((_get_scope_set_size(scopes), resolution_seconds))
+
+
+def _resolve_reported_scopes(policy, subject):
+    """
+    Return the scope set resolved by the policy for ``subject``, reported with :func:`report_scope_set`.
+    """
+    start = time.perf_counter()
+    scopes = policy.resolve_scopes(subject)
+    report_scope_set(scopes, time.perf_counter() - start)
+    return scopes
+
+
+def _get_scope_set_size(scopes):
+    """
+    Return the number of scope keys in a scope set, or in all the scope sets of a combinator.
+    """
+    if isinstance(scopes, _CombinedScopes):
+        return sum(_get_scope_set_size(policy_scopes) for policy_scopes in scopes if policy_scopes is not None)
+    return len(scopes)
+
+
+def _get_policy_membership(policy, obj, subject, scopes):
+    """
+    Return whether ``obj`` is visible under a policy, from its resolved scope set if possible, or None if unknown.
+    """
+    if scopes is not None and callable(getattr(policy, "is_in_scopes", None)):
+        return policy.is_in_scopes(obj, subject, scopes)
+    contains = getattr(policy, "contains", None)
+    return contains(obj, subject) if callable(contains) else None
+
+
+def compile_scope_filter(
+    queryset: QuerySet,
+    field: str,
+    scopes: Collection[Hashable],
+    grants: Optional[QuerySet] = None,
+    grants_field: Optional[str] = None,
+    max_in_size: Optional[int] = None,
+) -> Q:
+    """
+    Return a filter matching the rows of ``queryset`` whose ``field`` is in ``scopes``, with SQL suited to its size.
+
+    * Scope sets of up to ``max_in_size`` (by default, the SCOPING_MAX_IN_LIST_SIZE
+      setting) keys use ``field IN (%s, ...)``, with one parameter per key.
+    * Larger scope sets use an ``EXISTS`` subquery on ``grants``, if given: a
+      queryset of the subject's grants (e.g. its role assignments), whose
+      ``grants_field`` holds the scope key. The keys are then not sent at all.
+    * Otherwise, on SQLite and PostgreSQL, larger scope sets are sent as a single
+      array parameter, and joined with ``field IN (SELECT value FROM json_each(%s))``
+      or ``field IN (SELECT unnest(%s))``, which neither hits SQLite's limit on the
+      number of parameters, nor makes a statement that is slow to parse and plan.
+      Other databases fall back to ``IN``.
+
+    ``field`` may span relationships, e.g. ``course__org``. The strategy used is
+    reported in the ``scoping_filter_strategy`` custom attribute.
+    """
+    if max_in_size is None:
+        max_in_size = get_setting("SCOPING_MAX_IN_LIST_SIZE")
+    connection = connections[queryset.db]
+
+    if len(scopes) <= max_in_size:
+        strategy, scope_filter = SCOPE_FILTER_IN, Q(**{f"{field}__in": scopes})
+    elif grants is not None:
+        strategy = SCOPE_FILTER_EXISTS
+        scope_filter = Q(Exists(grants.filter(**{grants_field: OuterRef(field)})))
+    elif connection.vendor in _ARRAY_VALUES_SQL:
+        # Values are converted as the field would convert them (e.g. UUIDs are stored as hex strings on SQLite).
+        target_field = queryset.query.clone().resolve_ref(field).target
+        values = [target_field.get_db_prep_value(scope, connection) for scope in scopes]
+        if connection.vendor == "sqlite":
+            values = json.dumps(values, default=str)
+        strategy = SCOPE_FILTER_VALUES
+        scope_filter = Q(**{f"{field}__in": RawSQL(_ARRAY_VALUES_SQL[connection.vendor], (values,))})
+    else:
+        strategy, scope_filter = SCOPE_FILTER_IN, Q(**{f"{field}__in": scopes})
+
+    # .. custom_attribute_name: scoping_filter_strategy
+    # .. custom_attribute_description: How compile_scope_filter matched the scope set: "in" for an IN list of
+    #      parameters, "values" for a single array parameter, or "exists" for a subquery on the subject's grants.
+    set_custom_attribute("scoping_filter_strategy", strategy)
+    return scope_filter
+
+
+class ScopeSetPolicy(ABC):
+    """
+    Convenience base class of a :class:`ScopeResolvingPolicy` and :class:`ObjectScopingPolicy`
+    matching :attr:`scope_field` of the rows against the subject's scope set.
+
+    Subclasses set :attr:`scope_field` and implement ``resolve_scopes``, e.g.
+    with openedx-authz ``get_scopes_for_subject_and_permission``, and may
+    implement ``resolve_scopes_many`` for :func:`scope_many`. The filter is
+    built with :func:`compile_scope_filter`. Inheriting from it is optional:
+    any object with the same methods may be used instead.
+    """
+
+    #: The field holding the scope key of a row. Use the ``_id`` attribute of a
+    #: foreign key (e.g. ``course_id``), so ``contains`` can read it without a query.
+    scope_field: Optional[str] = None
+
+    @abstractmethod
+    def resolve_scopes(self, subject: Any) -> Collection[Hashable]:
+        """Return the keys of the scopes accessible to ``subject``."""
+
+    def get_scope_filter(self, queryset: QuerySet, subject: Any, scopes: Collection[Hashable]) -> Q:
+        """Return the filter matching the rows of ``queryset`` whose scope key is in ``scopes``."""
+        return compile_scope_filter(queryset, self.scope_field, scopes)
+
+    def is_in_scopes(self, obj: Any, subject: Any, scopes: Collection[Hashable]) -> Optional[bool]:
+        """
+        Return whether the scope key of ``obj`` is in ``scopes``, or None if it cannot be compared with them.
+
+        The scope key and the scopes are converted with the model field, as the
+        filter's lookup would, so e.g. a string scope matches an integer key.
+        """
+        scope_key = obj
+        for attribute in self.scope_field.split("__"):
+            scope_key = getattr(scope_key, attribute, None)
+            if scope_key is None:
+                return False
+        if isinstance(scope_key, Model):
+            scope_key = scope_key.pk
+        if scope_key in scopes:
+            return True
+
+        try:
+            field = _get_scope_field(type(obj), self.scope_field)
+            scope_key = _get_prep_value(field, scope_key)
+            return scope_key in scopes or scope_key in {_get_prep_value(field, scope) for scope in scopes}
+        except (AttributeError, TypeError, ValueError, ValidationError, FieldDoesNotExist):
+            return None
+
+    def scope(self, queryset: QuerySet, subject: Any) -> QuerySet:
+        """Return ``queryset`` filtered to the rows within the scope set of ``subject``."""
+        return queryset.filter(self.get_scope_filter(queryset, subject, _resolve_reported_scopes(self, subject)))
+
+    def contains(self, obj: Any, subject: Any) -> Optional[bool]:
+        """Return whether ``obj`` is within the scope set of ``subject``."""
+        return self.is_in_scopes(obj, subject, self.resolve_scopes(subject))
+
+
+def _get_scope_field(model, scope_field):
+    """
+    Return the model field at the end of the ``__``-separated ``scope_field`` path from ``model``.
+    """
+    *related_names, name = scope_field.split("__")
+    for related_name in related_names:
+        model = model._meta.get_field(related_name).related_model  # pylint: disable=protected-access
+    if name == "pk":
+        return model._meta.pk  # pylint: disable=protected-access
+    return model._meta.get_field(name)  # pylint: disable=protected-access
+
+
+def _get_prep_value(field, value):
+    return field.get_prep_value(field.to_python(value))
+
+
 class ScopedQuerysetMixin:
     """
     Applies :attr:`scoping_policy` to a DRF view's base queryset (OEP-66).
@@ -70,18 +770,137 @@ class ScopedQuerysetMixin:
     :class:`ScopingPolicy` protocol. The mixin runs the policy on top of the
     view's ``get_queryset()`` result so the ``list`` response contains only the
     rows within the requesting subject's accessible scopes.
+
+    If the policy implements :class:`ObjectScopingPolicy`, ``get_object()``
+    looks the object up in the unscoped queryset and asks the policy's
+    ``contains`` whether it is visible, so a policy with a resolved scope set
+    needs no scoped query. An invisible object is not found. If ``contains``
+    cannot tell, visibility is checked with the scoped queryset. Visibility is
+    checked early in ``check_object_permissions``, so an invisible object is not
+    found rather than forbidden, and always by ``get_object()`` itself, so views
+    overriding ``check_object_permissions`` without calling ``super()`` still
+    only see visible objects.
     """
 
     #: An object implementing the :class:`ScopingPolicy` protocol.
     scoping_policy: Optional[ScopingPolicy] = None
 
+    _is_scoping_deferred_to_object = False
+    _scope_checked_object = None
+    _is_explain_sampled = False
+
+    @timed_phase(PHASE_SCOPING)
     def get_queryset(self) -> QuerySet:
         """Return the base queryset scoped to the rows the requesting subject may see."""
         queryset = super().get_queryset()
+        policy = self._get_scoping_policy()
+        if self._is_scoping_deferred_to_object:
+            return queryset
+        if get_setting(ENABLE_SCOPING_INSTRUMENTATION):
+            return self._scope_with_instrumentation(policy, queryset)
+        return policy.scope(queryset, self.request.user)
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Return the filtered queryset, logging its query and ``EXPLAIN`` output if the request is sampled."""
+        queryset = super().filter_queryset(queryset)
+        if self._is_explain_sampled and isinstance(queryset, QuerySet):
+            self._is_explain_sampled = False
+            _log_explained_query(type(self).__name__, queryset)
+        return queryset
+
+    def get_object(self) -> Any:
+        """Return the requested object, if it is visible to the requesting subject."""
+        if not callable(getattr(self.scoping_policy, "contains", None)):
+            return super().get_object()
+
+        self._is_scoping_deferred_to_object = True
+        self._scope_checked_object = None
+        try:
+            obj = super().get_object()
+            if self._scope_checked_object is not obj:
+                self._check_object_scope(obj)
+            return obj
+        finally:
+            self._is_scoping_deferred_to_object = False
+            self._scope_checked_object = None
+
+    def get_scoped_querysets(self, subjects: Iterable[Any], batch_size: Optional[int] = None):
+        """
+        Yield ``(subject, scoped queryset)`` pairs of the view's base queryset for each of ``subjects``.
+
+        Lets a reporting job reuse the view's policy; see :func:`scope_many`.
+        """
+        return scope_many(self._get_scoping_policy(), super().get_queryset(), subjects, batch_size)
+
+    def check_object_permissions(self, request, obj) -> None:
+        """Raise ``Http404`` if the object is not visible, then check object permissions."""
+        if self._is_scoping_deferred_to_object and self._scope_checked_object is not obj:
+            self._check_object_scope(obj)
+        super().check_object_permissions(request, obj)
+
+    @timed_phase(PHASE_SCOPING)
+    def _check_object_scope(self, obj):
+        is_visible = self.scoping_policy.contains(obj, self.request.user)
+        if is_visible is None:
+            self._is_scoping_deferred_to_object = False
+            is_visible = self.get_queryset().filter(pk=obj.pk).exists()
+        if not is_visible:
+            raise Http404
+        self._scope_checked_object = obj
+
+    def _scope_with_instrumentation(self, policy, queryset):
+        reported_scope_sets = []
+        request_cache = RequestCache(_REQUEST_CACHE_NAMESPACE)
+        request_cache.set(_REPORTED_SCOPE_SETS_CACHE_KEY, reported_scope_sets)
+        start = time.perf_counter()
+        try:
+            scoped_queryset = policy.scope(queryset, self.request.user)
+        finally:
+            request_cache.delete(_REPORTED_SCOPE_SETS_CACHE_KEY)
+        # .. custom_attribute_name: scoping_policy_ms
+        # .. custom_attribute_description: Milliseconds spent in the scope() method of the scoping policy of a view
+        #      using ScopedQuerysetMixin. Only set if EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION] is enabled.
+        set_custom_attribute("scoping_policy_ms", round((time.perf_counter() - start) * 1000, 3))
+
+        if reported_scope_sets:
+            # .. custom_attribute_name: scoping_scope_set_size
+            # .. custom_attribute_description: The number of scope keys resolved for the requesting subject by the
+            #      scoping policy of a view using ScopedQuerysetMixin, if the policy reports it. Only set if
+            #      EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION] is enabled.
+            set_custom_attribute("scoping_scope_set_size", sum(size for size, __ in reported_scope_sets))
+            resolution_durations = [duration for __, duration in reported_scope_sets if duration is not None]
+            if resolution_durations:
+                # .. custom_attribute_name: scoping_resolution_ms
+                # .. custom_attribute_description: Milliseconds spent resolving the scope set of the requesting
+                #      subject, within scoping_policy_ms, if the scoping policy reports it. Only set if
+                #      EDX_DRF_EXTENSIONS[ENABLE_SCOPING_INSTRUMENTATION] is enabled.
+                set_custom_attribute("scoping_resolution_ms", round(sum(resolution_durations) * 1000, 3))
+
+        if random.random() < get_setting("SCOPING_EXPLAIN_SAMPLE_RATE"):
+            # .. custom_attribute_name: scoping_explain_sampled
+            # .. custom_attribute_description: True if the final query of a view using ScopedQuerysetMixin was
+            #      logged with its EXPLAIN output. See the SCOPING_EXPLAIN_SAMPLE_RATE setting.
+            set_custom_attribute("scoping_explain_sampled", True)
+            self._is_explain_sampled = True
+        return scoped_queryset
+
+    def _get_scoping_policy(self):
         policy = self.scoping_policy
         if not callable(getattr(policy, "scope", None)):
             raise ImproperlyConfigured(
                 f"{type(self).__name__} uses ScopedQuerysetMixin but its scoping_policy does not "
                 f"implement the ScopingPolicy protocol (expected a callable 'scope(queryset, subject)' method)."
             )
-        return policy.scope(queryset, self.request.user)
+        return policy
+
+
+def _log_explained_query(view_name, queryset):
+    """
+    Log the SQL of the queryset and its ``EXPLAIN`` output.
+    """
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        logger.info("Scoped query of %s matches no rows.", view_name)
+        return
+    logger.info("Scoped query of %s: %s\nEXPLAIN:\n%s", view_name, sql, queryset.explain())
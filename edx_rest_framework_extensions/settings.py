@@ -16,7 +16,10 @@ from django.conf import settings
 from rest_framework_jwt.settings import api_settings
 
 from edx_rest_framework_extensions.config import (
+    ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY,
     ENABLE_JWT_AND_LMS_USER_EMAIL_MATCH,
+    ENABLE_REQUEST_PHASE_TIMING,
+    ENABLE_SCOPING_INSTRUMENTATION,
     ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE,
 )
 
@@ -25,7 +28,10 @@ logger = logging.getLogger(__name__)
 
 
 DEFAULT_SETTINGS = {
+    ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY: False,
     ENABLE_JWT_AND_LMS_USER_EMAIL_MATCH: False,
+    ENABLE_REQUEST_PHASE_TIMING: False,
+    ENABLE_SCOPING_INSTRUMENTATION: False,
     ENABLE_SET_REQUEST_USER_FOR_JWT_COOKIE: False,
 
     'JWT_PAYLOAD_MERGEABLE_USER_ATTRIBUTES': (),
@@ -36,6 +42,37 @@ DEFAULT_SETTINGS = {
     },
 
     'OAUTH2_USER_INFO_URL': None,
+    # Connection pooling, timeouts (in seconds) and retries for the requests made to OAUTH2_USER_INFO_URL.
+    'OAUTH2_USER_INFO_POOL_SIZE': 10,
+    'OAUTH2_USER_INFO_CONNECT_TIMEOUT': 5,
+    'OAUTH2_USER_INFO_READ_TIMEOUT': 10,
+    'OAUTH2_USER_INFO_MAX_RETRIES': 0,
+    'OAUTH2_USER_INFO_RETRY_BACKOFF_FACTOR': 0,
+    # Opt-in cache of user info lookups. The cache is disabled unless the TTL (in seconds) is set.
+    'OAUTH2_USER_INFO_CACHE_TTL': 0,
+    'OAUTH2_USER_INFO_CACHE_MAX_SIZE': 1000,
+    'OAUTH2_USER_INFO_CACHE_ALIAS': None,
+    # Seconds for which the in-process LRU keeps entries when OAUTH2_USER_INFO_CACHE_ALIAS is set.
+    'OAUTH2_USER_INFO_CACHE_LOCAL_TTL': 5,
+    # Whether concurrent user info lookups for the same token in a process share a single request.
+    'OAUTH2_USER_INFO_COALESCE_LOOKUPS': False,
+    # Opt-in circuit breaker around the requests made to OAUTH2_USER_INFO_URL.
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_ENABLED': False,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_WINDOW_SIZE': 20,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_FAILURE_RATE': 0.5,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_SLOW_CALL_SECONDS': 5,
+    'OAUTH2_USER_INFO_CIRCUIT_BREAKER_OPEN_SECONDS': 30,
+    # Seconds past OAUTH2_USER_INFO_CACHE_TTL during which cached user info is served while the breaker is open.
+    'OAUTH2_USER_INFO_CACHE_STALE_GRACE_SECONDS': 0,
+    # Verify JWT bearer tokens locally with JWT_AUTH['JWT_PUBLIC_SIGNING_JWK_SET'], rather than OAUTH2_USER_INFO_URL.
+    'OAUTH2_LOCAL_JWT_INTROSPECTION': False,
+
+    # Default maximum offset of the first result of a page for the page number paginators (None for no limit).
+    'PAGINATION_MAX_PAGE_OFFSET': None,
+    'PAGINATION_CONCURRENT_COUNT_MAX_WORKERS': 8,
+    'SCOPING_MAX_IN_LIST_SIZE': 500,
+    'SCOPING_EXPLAIN_SAMPLE_RATE': 0,
+    'SCOPING_SCOPE_MANY_BATCH_SIZE': 100,
 }
 
 
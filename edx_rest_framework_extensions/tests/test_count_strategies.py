@@ -0,0 +1,85 @@
+""" Tests for the count strategies of the paginators. """
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+
+from edx_rest_framework_extensions.count_strategies import (
+    CachedCount,
+    CappedCount,
+    CountStrategy,
+    EstimatedCount,
+    ExactCount,
+)
+from edx_rest_framework_extensions.tests import factories
+
+
+User = get_user_model()
+
+
+class CountStrategyTests(TestCase):
+    """ Tests for the count strategies. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for __ in range(5):
+            factories.UserFactory()
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def test_get_count_is_abstract(self):
+        with self.assertRaises(TypeError):
+            CountStrategy()  # pylint: disable=abstract-class-instantiated
+
+        class IncompleteCount(CountStrategy):  # pylint: disable=abstract-method
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteCount()  # pylint: disable=abstract-class-instantiated
+
+    def test_exact_count(self):
+        self.assertEqual(ExactCount().get_count(User.objects.all()), (5, True))
+        self.assertEqual(ExactCount().get_count([1, 2, 3]), (3, True))
+
+    def test_capped_count(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(CappedCount(3).get_count(User.objects.all()), (3, False))
+        self.assertEqual(CappedCount(5).get_count(User.objects.all()), (5, True))
+        self.assertEqual(CappedCount(2).get_count([1, 2, 3]), (3, True))
+
+    def test_cached_count(self):
+        strategy = CachedCount(ttl=60)
+        with self.assertNumQueries(1):
+            self.assertEqual(strategy.get_count(User.objects.all()), (5, True))
+        User.objects.filter(pk=User.objects.first().pk).delete()
+
+        # The cached count is stale until it expires, but a different query is counted.
+        with self.assertNumQueries(0):
+            self.assertEqual(strategy.get_count(User.objects.all()), (5, True))
+        self.assertEqual(strategy.get_count(User.objects.filter(is_active=True)), (4, True))
+
+    def test_cached_count_keyed_by_parameters(self):
+        strategy = CachedCount(strategy=CappedCount(2))
+        usernames = list(User.objects.values_list('username', flat=True))
+
+        self.assertEqual(strategy.get_count(User.objects.filter(username__in=usernames[:1])), (1, True))
+        self.assertEqual(strategy.get_count(User.objects.filter(username__in=usernames[:3])), (2, False))
+
+    def test_cached_count_of_empty_queryset(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCount().get_count(User.objects.none()), (0, True))
+
+    def test_estimated_count_falls_back_without_estimate(self):
+        self.assertIsNone(EstimatedCount().estimate(User.objects.all()))
+        self.assertEqual(EstimatedCount(fallback=CappedCount(3)).get_count(User.objects.all()), (3, False))
+        self.assertEqual(EstimatedCount().get_count(User.objects.all()), (5, True))
+
+    def test_estimated_count(self):
+        with mock.patch.object(EstimatedCount, 'estimate', return_value=20000):
+            self.assertEqual(EstimatedCount(exact_below=10000).get_count(User.objects.all()), (20000, False))
+        with mock.patch.object(EstimatedCount, 'estimate', return_value=20):
+            self.assertEqual(EstimatedCount(exact_below=10000).get_count(User.objects.all()), (5, True))
@@ -2,19 +2,56 @@
 Unit tests for middlewares.
 """
 import re
+from types import SimpleNamespace
 from unittest.mock import Mock, call, patch
 
 import ddt
 from django.contrib.auth.models import AnonymousUser
-from django.test import RequestFactory, TestCase
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import re_path as url_pattern
+from django.utils.functional import SimpleLazyObject
 from edx_django_utils.cache import RequestCache
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from edx_rest_framework_extensions.auth.bearer.authentication import (
+    BearerAuthentication,
+)
+from edx_rest_framework_extensions.auth.jwt.authentication import JwtAuthentication
 from edx_rest_framework_extensions.auth.jwt.cookies import jwt_cookie_name
+from edx_rest_framework_extensions.config import (
+    ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY,
+)
 from edx_rest_framework_extensions.middleware import (
     RequestCustomAttributesMiddleware,
     RequestMetricsMiddleware,
+    _get_client_name_from_user_agent,
 )
-from edx_rest_framework_extensions.tests.factories import UserFactory
+from edx_rest_framework_extensions.tests.factories import PASSWORD, UserFactory
+
+
+def public_view(request):  # pylint: disable=unused-argument
+    return HttpResponse()
+
+
+def user_view(request):
+    return HttpResponse(request.user.username)
+
+
+class SessionAuthenticationView(APIView):
+    authentication_classes = (SessionAuthentication,)
+
+    def get(self, request):  # pylint: disable=unused-argument
+        return Response({'success': True})
+
+
+urlpatterns = [
+    url_pattern(r'^public/$', public_view),
+    url_pattern(r'^user/$', user_view),
+    url_pattern(r'^session/$', SessionAuthenticationView.as_view()),
+]
 
 
 @ddt.ddt
@@ -83,6 +120,16 @@ class TestRequestCustomAttributesMiddleware(TestCase):
         ]
         mock_set_custom_attribute.assert_has_calls(expected_calls, any_order=True)
 
+    def test_request_user_agent_parsing_is_cached(self):
+        _get_client_name_from_user_agent.cache_clear()
+        self.request.META['HTTP_USER_AGENT'] = 'python-requests/2.9.1 edx-rest-api-client/1.7.2 test-client'
+
+        self.middleware.process_response(self.request, None)
+        self.middleware.process_response(self.request, None)
+
+        cache_info = _get_client_name_from_user_agent.cache_info()
+        assert (cache_info.hits, cache_info.misses) == (1, 1)
+
     @patch('edx_django_utils.monitoring.set_custom_attribute')
     def test_request_standard_user_agent_attributes(self, mock_set_custom_attribute):
         self.request.META['HTTP_USER_AGENT'] = 'test-user-agent'
@@ -116,6 +163,49 @@ class TestRequestCustomAttributesMiddleware(TestCase):
         self.middleware.process_response(self.request, None)
         mock_set_custom_attribute.assert_any_call('request_auth_type_guess', 'jwt-cookie')
 
+    @ddt.data(
+        (JwtAuthentication, False, 'jwt'),
+        (JwtAuthentication, True, 'jwt-cookie'),
+        (BearerAuthentication, False, 'bearer'),
+        (SessionAuthentication, False, 'session'),
+        # Unknown authentication classes fall back to the guess based on the Authorization header.
+        (BasicAuthentication, False, 'other-token-type'),
+    )
+    @ddt.unpack
+    @patch('edx_django_utils.monitoring.set_custom_attribute')
+    def test_request_auth_type_from_successful_authenticator(
+        self, authentication_class, has_jwt_cookie, expected_auth_type, mock_set_custom_attribute
+    ):
+        self.request.user = UserFactory()
+        if has_jwt_cookie:
+            self.request.COOKIES[jwt_cookie_name()] = 'reconstituted-jwt-cookie'
+        else:
+            self.request.META['HTTP_AUTHORIZATION'] = 'not-parsed-for-known-authenticators'
+        drf_request = SimpleNamespace(_authenticator=authentication_class())
+        response = SimpleNamespace(renderer_context={'request': drf_request})
+
+        self.middleware.process_response(self.request, response)
+        mock_set_custom_attribute.assert_any_call('request_auth_type_guess', expected_auth_type)
+
+    @override_settings(
+        ROOT_URLCONF='edx_rest_framework_extensions.tests.test_middleware',
+        MIDDLEWARE=(
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+            'edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware',
+        ),
+    )
+    @patch('edx_django_utils.monitoring.set_custom_attribute')
+    def test_request_auth_type_from_drf_session_authentication(self, mock_set_custom_attribute):
+        client = Client()
+        assert client.login(username=UserFactory().username, password=PASSWORD)
+
+        response = client.get('/session/')
+
+        assert response.status_code == 200
+        mock_set_custom_attribute.assert_any_call('request_auth_type_guess', 'session')
+
     @patch('edx_django_utils.monitoring.set_custom_attribute')
     def test_request_auth_type_guess_session_attribute(self, mock_set_custom_attribute):
         self.request.user = UserFactory()
@@ -217,6 +307,95 @@ class TestRequestCustomAttributesMiddleware(TestCase):
         mock_set_custom_attribute.assert_any_call('request_is_staff_or_superuser', 'superuser')
 
 
+@ddt.ddt
+@override_settings(EDX_DRF_EXTENSIONS={ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY: True})
+class TestRequestCustomAttributesMiddlewareForEvaluatedUserOnly(TestCase):
+    """
+    Tests RequestCustomAttributesMiddleware with ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY enabled.
+    """
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+        self.request = RequestFactory().get('/')
+        self.middleware = RequestCustomAttributesMiddleware(Mock())
+        self.user = UserFactory(is_staff=True)
+
+    @patch('edx_django_utils.monitoring.set_custom_attribute')
+    def test_unevaluated_user_is_not_evaluated(self, mock_set_custom_attribute):
+        mock_get_user = Mock(return_value=self.user)
+        self.request.user = SimpleLazyObject(mock_get_user)
+
+        self.middleware.process_request(self.request)
+        self.middleware.process_view(self.request, None, None, None)
+        self.middleware.process_response(self.request, None)
+
+        mock_get_user.assert_not_called()
+        mock_set_custom_attribute.assert_any_call('request_auth_type_guess', 'unevaluated-user')
+        attributes_called_with = [c.args[0] for c in mock_set_custom_attribute.call_args_list]
+        for attribute in (
+            'enduser.id', 'request_user_id', 'request_is_staff_or_superuser',
+            'request_authenticated_user_found_in_middleware',
+        ):
+            assert attribute not in attributes_called_with
+
+    @patch('edx_django_utils.monitoring.set_custom_attribute')
+    def test_user_evaluated_later_in_request(self, mock_set_custom_attribute):
+        self.request.user = SimpleLazyObject(lambda: self.user)
+
+        self.middleware.process_request(self.request)
+        # simulates the view using the user
+        assert self.request.user.is_authenticated
+        self.middleware.process_response(self.request, None)
+
+        expected_calls = [
+            call('request_auth_type_guess', 'session-or-other'),
+            call('enduser.id', self.user.id),
+            call('request_user_id', self.user.id),
+            call('request_authenticated_user_found_in_middleware', 'process_response'),
+            call('request_is_staff_or_superuser', 'staff'),
+        ]
+        mock_set_custom_attribute.assert_has_calls(expected_calls, any_order=True)
+
+    @patch('edx_django_utils.monitoring.set_custom_attribute')
+    def test_non_lazy_user(self, mock_set_custom_attribute):
+        self.request.user = self.user
+
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(self.request, None)
+
+        mock_set_custom_attribute.assert_any_call('request_user_id', self.user.id)
+        mock_set_custom_attribute.assert_any_call('request_authenticated_user_found_in_middleware', 'process_request')
+
+    @ddt.data(
+        # toggle enabled, logged in, url, expected query count
+        (True, True, '/public/', 0),
+        (True, False, '/public/', 0),
+        (False, True, '/public/', 2),  # session lookup and user query
+        (True, True, '/user/', 2),
+    )
+    @ddt.unpack
+    @override_settings(
+        ROOT_URLCONF='edx_rest_framework_extensions.tests.test_middleware',
+        MIDDLEWARE=(
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+            'edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware',
+        ),
+    )
+    def test_query_count(self, is_toggle_enabled, is_logged_in, url, expected_query_count):
+        client = Client()
+        if is_logged_in:
+            assert client.login(username=self.user.username, password=PASSWORD)
+
+        edx_drf_extensions_settings = {ENABLE_CUSTOM_ATTRIBUTES_FOR_EVALUATED_USER_ONLY: is_toggle_enabled}
+        with override_settings(EDX_DRF_EXTENSIONS=edx_drf_extensions_settings):
+            with self.assertNumQueries(expected_query_count):
+                response = client.get(url)
+
+        assert response.status_code == 200
+
+
 @ddt.ddt
 class TestRequestMetricsMiddleware(TestCase):
     """
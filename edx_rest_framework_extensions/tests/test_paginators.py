@@ -1,18 +1,45 @@
 """ Tests paginator methods """
 
+import datetime
+import json
+import threading
+import time
+from base64 import urlsafe_b64encode
 from collections import namedtuple
-from unittest import TestCase
+from contextlib import contextmanager
+from unittest import TestCase, mock
 from unittest.mock import MagicMock, Mock
 
 import ddt
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db import connection, transaction
+from django.db.backends.utils import CursorWrapper
 from django.http import Http404
 from django.test import RequestFactory
+from django.test import TestCase as DatabaseTestCase
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import serializers
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
+from edx_rest_framework_extensions.count_strategies import (
+    CappedCount,
+    ExactCount,
+    NoCount,
+)
 from edx_rest_framework_extensions.paginators import (
+    CountStrategyPaginator,
+    DefaultPagination,
+    KeysetPagination,
     NamespacedPageNumberPagination,
+    paginate_lazy_search_results,
     paginate_search_results,
 )
+from edx_rest_framework_extensions.tests import factories
 
 
 @ddt.ddt
@@ -125,6 +152,101 @@ class PaginateSearchResultsTestCase(TestCase):
             paginate_search_results(self.mock_model, self.search_results, self.default_size, page_num)
 
 
+@ddt.ddt
+class PaginateSearchResultsDatabaseTestCase(DatabaseTestCase):
+    """Test cases for paginate_search_results method, with database objects"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user_{idx}') for idx in range(DefaultPagination.max_page_size + 50)
+        )
+
+    def _get_search_results(self):
+        # Search engines return results in their own (relevance) order, here the reverse of the primary keys.
+        pks = list(get_user_model().objects.order_by('-pk').values_list('pk', flat=True))
+        return {'results': [{'_id': pk, 'data': {'pk': pk}} for pk in pks]}
+
+    @ddt.data(10, DefaultPagination.max_page_size, DefaultPagination.max_page_size + 50)
+    def test_order_and_queries(self, page_size):
+        search_results = self._get_search_results()
+        with self.assertNumQueries(1):
+            page = paginate_search_results(get_user_model(), search_results, page_size, 1)
+
+        self.assertEqual(
+            [user.pk for user in page.object_list],
+            [item['data']['pk'] for item in search_results['results'][:page_size]],
+        )
+
+    def test_missing_objects(self):
+        search_results = self._get_search_results()
+        search_results['results'].insert(1, {'_id': 0, 'data': {'pk': 0}})
+
+        page = paginate_search_results(get_user_model(), search_results, 3, 1)
+        self.assertIsNone(page.object_list[1])
+        self.assertEqual(
+            [user.pk for user in page.object_list[::2]],
+            [search_results['results'][0]['data']['pk'], search_results['results'][2]['data']['pk']],
+        )
+
+    def test_queryset_hooks(self):
+        search_results = self._get_search_results()
+        with self.assertNumQueries(2):
+            page = paginate_search_results(
+                get_user_model(), search_results, 10, 1,
+                prefetch_related=['groups'], only=['username'],
+            )
+            for user in page.object_list:
+                list(user.groups.all())
+
+        self.assertEqual(page.object_list[0].get_deferred_fields(), {
+            field.attname for field in get_user_model()._meta.concrete_fields if field.name not in ('id', 'username')
+        })
+
+    def test_select_related_hook(self):
+        search_results = {'results': [{'data': {'pk': pk}} for pk in Permission.objects.values_list('pk', flat=True)]}
+        with self.assertNumQueries(1):
+            page = paginate_search_results(Permission, search_results, 10, 1, select_related=['content_type'])
+            for permission in page.object_list:
+                self.assertIsNotNone(permission.content_type.app_label)
+
+
+@ddt.ddt
+class PaginateLazySearchResultsTestCase(TestCase):
+    """Test cases for paginate_lazy_search_results method"""
+
+    def setUp(self):
+        super().setUp()
+        self.total = 20000
+        self.get_search_results = Mock(side_effect=lambda offset, limit: [
+            {'_id': pk, 'data': {'pk': pk}} for pk in range(offset, min(offset + limit, self.total))
+        ])
+        self.mock_model = Mock()
+        self.mock_model.objects.filter = Mock(side_effect=lambda pk__in: [build_mock_object(pk) for pk in pk__in])
+
+    @ddt.data((1, 0), (3, 100), ('last', 19950))
+    @ddt.unpack
+    def test_fetches_only_the_page(self, page_number, first_pk):
+        page = paginate_lazy_search_results(self.mock_model, self.get_search_results, self.total, 50, page_number)
+
+        self.get_search_results.assert_called_once_with(first_pk, 50)
+        self.assertEqual([obj.pk for obj in page.object_list], list(range(first_pk, first_pk + 50)))
+        self.assertEqual(page.paginator.count, self.total)
+        self.assertEqual(page.has_next(), page_number != 'last')
+
+    @ddt.data(0, 401, 'str')
+    def test_invalid_page_number(self, page_number):
+        with self.assertRaises(Http404):
+            paginate_lazy_search_results(self.mock_model, self.get_search_results, self.total, 50, page_number)
+        self.get_search_results.assert_not_called()
+
+    def test_no_results(self):
+        page = paginate_lazy_search_results(self.mock_model, self.get_search_results, 0, 50, 1)
+        self.assertEqual(list(page.object_list), [])
+        self.get_search_results.assert_not_called()
+
+
 class NamespacedPaginationTestCase(TestCase):
     """
     Test behavior of `NamespacedPageNumberPagination`
@@ -169,6 +291,450 @@ class NamespacedPaginationTestCase(TestCase):
         self.assertEqual(self.expected_data, self.paginator.get_paginated_response(results).data)
 
 
+@ddt.ddt
+class CountStrategyPaginationTestCase(DatabaseTestCase):
+    """
+    Test the count strategies of `DefaultPagination` and `NamespacedPageNumberPagination`
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for idx in range(25):
+            factories.UserFactory(username=f'user_{idx:02}')
+
+    def _paginate(self, paginator_class, count_strategy, page):
+        paginator = paginator_class()
+        paginator.count_strategy = count_strategy
+        request = Request(RequestFactory().get('/endpoint', data={'page': page, 'page_size': 10}))
+        results = paginator.paginate_queryset(get_user_model().objects.order_by('username'), request)
+        return [user.username for user in results], paginator.get_paginated_response([]).data
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_exact_count(self, paginator_class):
+        __, data = self._paginate(paginator_class, ExactCount(), 3)
+        metadata = data.get('pagination', data)
+        self.assertEqual((metadata['count'], metadata['num_pages']), (25, 3))
+        self.assertNotIn('count_is_exact', metadata)
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_capped_count(self, paginator_class):
+        usernames, data = self._paginate(paginator_class, CappedCount(15), 1)
+        metadata = data.get('pagination', data)
+        self.assertEqual(usernames[0], 'user_00')
+        self.assertEqual((metadata['count'], metadata['num_pages'], metadata['count_is_exact']), (15, 2, False))
+
+        # Pages past the capped count can still be reached.
+        usernames, data = self._paginate(paginator_class, CappedCount(15), 3)
+        metadata = data.get('pagination', data)
+        self.assertEqual(usernames, [f'user_{idx}' for idx in range(20, 25)])
+        self.assertIsNone(metadata['next'])
+        self.assertIsNotNone(metadata['previous'])
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_no_count(self, paginator_class):
+        for page, expected_next in ((1, 'page=2'), (2, 'page=3'), (3, None)):
+            with self.assertNumQueries(1):
+                usernames, data = self._paginate(paginator_class, NoCount(), page)
+            metadata = data.get('pagination', data)
+            self.assertEqual(usernames[0], f'user_{(page - 1) * 10:02}')
+            self.assertEqual((metadata['count'], metadata['num_pages']), (None, None))
+            if expected_next:
+                self.assertIn(expected_next, metadata['next'])
+            else:
+                self.assertIsNone(metadata['next'])
+
+    def test_no_count_page_out_of_range(self):
+        with self.assertRaises(NotFound):
+            self._paginate(DefaultPagination, NoCount(), 4)
+
+    def test_capped_count_next_link(self):
+        __, data = self._paginate(DefaultPagination, CappedCount(15), 2)
+        self.assertEqual(data['next'], 'http://testserver/endpoint?page=3&page_size=10')
+
+    def test_capped_count_page_out_of_range(self):
+        with self.assertRaises(NotFound):
+            self._paginate(DefaultPagination, CappedCount(15), 4)
+
+
+@ddt.ddt
+class ConcurrentCountTestCase(TransactionTestCase):
+    """
+    Test the concurrent count and page queries of `DefaultPagination` and `NamespacedPageNumberPagination`
+
+    Not run within a transaction, since concurrent counts are made on another connection.
+    """
+    def setUp(self):
+        super().setUp()
+        # Concurrent counts require persistent connections.
+        conn_max_age_patcher = mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60})
+        conn_max_age_patcher.start()
+        self.addCleanup(conn_max_age_patcher.stop)
+        get_user_model().objects.bulk_create(get_user_model()(username=f'user_{idx:02}') for idx in range(25))
+
+    def _paginate(self, paginator_class, page, page_size=10, count_strategy=ExactCount(), concurrent_count=True):
+        paginator_class = type('ConcurrentCountPagination', (paginator_class,), {
+            'count_strategy': count_strategy, 'concurrent_count': concurrent_count,
+        })
+        paginator = paginator_class()
+        request = Request(RequestFactory().get('/endpoint', data={'page': page, 'page_size': page_size}))
+        results = paginator.paginate_queryset(get_user_model().objects.order_by('username'), request)
+        return [user.username for user in results], paginator.get_paginated_response([]).data
+
+    @contextmanager
+    def _recorded_queries(self, concurrent_queries=1):
+        """
+        Records the thread and the start and end times of each query, on any connection.
+
+        With ``concurrent_queries``, each query waits at a barrier until that many queries are in progress, so the
+        queries only complete if they are made concurrently.
+        """
+        queries = []
+        barrier = threading.Barrier(concurrent_queries, timeout=10)
+        execute = CursorWrapper.execute
+
+        def recorded_execute(cursor, *args, **kwargs):
+            start = time.perf_counter()
+            barrier.wait()
+            try:
+                return execute(cursor, *args, **kwargs)
+            finally:
+                queries.append((threading.get_ident(), start, time.perf_counter()))
+
+        with mock.patch.object(CursorWrapper, 'execute', recorded_execute):
+            yield queries
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_same_response(self, paginator_class):
+        for page in (1, 2, 3, 'last'):
+            self.assertEqual(
+                self._paginate(paginator_class, page),
+                self._paginate(paginator_class, page, concurrent_count=False),
+            )
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_queries_overlap(self, paginator_class):
+        with self._recorded_queries(concurrent_queries=2) as queries:
+            usernames, __ = self._paginate(paginator_class, 2)
+        self.assertEqual(usernames, [f'user_{idx}' for idx in range(10, 20)])
+        (first_thread, first_start, first_end), (second_thread, second_start, second_end) = queries
+        self.assertNotEqual(first_thread, second_thread)
+        self.assertLess(max(first_start, second_start), min(first_end, second_end))
+
+    def test_queries_sequential_when_disabled(self):
+        with self._recorded_queries() as queries:
+            usernames, __ = self._paginate(DefaultPagination, 2, concurrent_count=False)
+        self.assertEqual(usernames, [f'user_{idx}' for idx in range(10, 20)])
+        (first_thread, __, first_end), (second_thread, second_start, __) = queries
+        self.assertEqual(first_thread, second_thread)
+        self.assertLessEqual(first_end, second_start)
+
+    @mock.patch('edx_rest_framework_extensions.paginators.set_custom_attribute')
+    def test_custom_attribute(self, mock_set_custom_attribute):
+        self._paginate(DefaultPagination, 1)
+        mock_set_custom_attribute.assert_any_call('pagination_concurrent_count', True)
+
+    @mock.patch('edx_rest_framework_extensions.paginators.set_custom_attribute')
+    def test_not_concurrent_in_transaction(self, mock_set_custom_attribute):
+        with transaction.atomic():
+            usernames, data = self._paginate(DefaultPagination, 3)
+        self.assertEqual((usernames[0], data['count']), ('user_20', 25))
+        self.assertNotIn(mock.call('pagination_concurrent_count', True), mock_set_custom_attribute.call_args_list)
+
+    def test_orphans(self):
+        paginator = CountStrategyPaginator(
+            get_user_model().objects.order_by('username'), 10, orphans=5, concurrent=True
+        )
+        page = paginator.page('2')
+        self.assertEqual([user.username for user in page], [f'user_{idx}' for idx in range(10, 25)])
+        self.assertFalse(page.has_next())
+
+    def test_inexact_count(self):
+        usernames, data = self._paginate(DefaultPagination, 3, count_strategy=CappedCount(15))
+        self.assertEqual(usernames, [f'user_{idx}' for idx in range(20, 25)])
+        self.assertEqual((data['count'], data['count_is_exact'], data['next']), (15, False, None))
+
+    @ddt.data(4, 0, 'invalid')
+    def test_page_not_found(self, page):
+        with self.assertRaises(NotFound):
+            self._paginate(DefaultPagination, page)
+
+    @mock.patch('edx_rest_framework_extensions.paginators.set_custom_attribute')
+    def test_not_concurrent_without_persistent_connections(self, mock_set_custom_attribute):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}):
+            usernames, data = self._paginate(DefaultPagination, 3)
+        self.assertEqual((usernames[0], data['count']), ('user_20', 25))
+        self.assertNotIn(mock.call('pagination_concurrent_count', True), mock_set_custom_attribute.call_args_list)
+
+
+@ddt.ddt
+class PageDepthLimitTestCase(TestCase):
+    """
+    Test the page depth limit of `DefaultPagination` and `NamespacedPageNumberPagination`
+    """
+
+    def _paginate(self, paginator_class, page, max_page_offset=None):
+        paginator = paginator_class()
+        paginator.max_page_offset = max_page_offset
+        request = Request(RequestFactory().get('/endpoint', data={'page': page, 'page_size': 10}))
+        return paginator.paginate_queryset(list(range(1000)), request)
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    @mock.patch('edx_rest_framework_extensions.paginators.set_custom_attribute')
+    def test_within_limit(self, paginator_class, mock_set_custom_attribute):
+        self.assertEqual(self._paginate(paginator_class, 51, max_page_offset=500), list(range(500, 510)))
+        mock_set_custom_attribute.assert_called_once_with('pagination_offset', 500)
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    @mock.patch('edx_rest_framework_extensions.paginators.set_custom_attribute')
+    def test_past_limit(self, paginator_class, mock_set_custom_attribute):
+        for page in (52, 'last'):
+            with self.assertRaisesRegex(ValidationError, 'past result 500') as context:
+                self._paginate(paginator_class, page, max_page_offset=500)
+            self.assertEqual(context.exception.status_code, 400)
+            self.assertIn('page', context.exception.detail)
+        mock_set_custom_attribute.assert_any_call('pagination_offset', 990)
+        mock_set_custom_attribute.assert_any_call('pagination_offset_exceeded', True)
+
+    @override_settings(EDX_DRF_EXTENSIONS={'PAGINATION_MAX_PAGE_OFFSET': 100})
+    def test_limit_setting(self):
+        self.assertEqual(self._paginate(DefaultPagination, 11), list(range(100, 110)))
+        with self.assertRaises(ValidationError):
+            self._paginate(DefaultPagination, 12)
+        self.assertEqual(len(self._paginate(DefaultPagination, 12, max_page_offset=200)), 10)
+
+    def test_no_limit_by_default(self):
+        self.assertEqual(self._paginate(DefaultPagination, 100), list(range(990, 1000)))
+
+    def test_invalid_page(self):
+        with self.assertRaisesRegex(NotFound, 'Invalid page'):
+            self._paginate(DefaultPagination, 'str', max_page_offset=500)
+
+
+class UsernameSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    username = serializers.CharField()
+
+
+class StreamingUserListView(ListAPIView):
+    authentication_classes = ()
+    permission_classes = ()
+    serializer_class = UsernameSerializer
+    queryset = get_user_model().objects.order_by('username')
+
+
+@ddt.ddt
+class StreamingExportTestCase(DatabaseTestCase):
+    """
+    Test the streaming export mode of `DefaultPagination` and `NamespacedPageNumberPagination`
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(get_user_model()(username=f'user_{idx:02}') for idx in range(25))
+
+    def _get(self, paginator_class, query_string):
+        paginator_class = type('StreamingPagination', (paginator_class,), {
+            'stream_query_param': 'stream', 'stream_chunk_size': 10, 'page_size': 5,
+        })
+        view = StreamingUserListView.as_view(pagination_class=paginator_class)
+        return view(APIRequestFactory().get(f'/endpoint?{query_string}'))
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_stream(self, paginator_class):
+        with mock.patch.object(
+            UsernameSerializer, 'to_representation', autospec=True, side_effect=lambda __, user: user.username
+        ) as mock_to_representation:
+            response = self._get(paginator_class, 'stream=true')
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            self.assertEqual(mock_to_representation.call_count, 0)
+
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(
+            [json.loads(line) for line in b''.join(chunks).splitlines()],
+            [f'user_{idx:02}' for idx in range(25)],
+        )
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_paginated_without_stream_param(self, paginator_class):
+        for query_string in ('', 'stream=false'):
+            response = self._get(paginator_class, query_string)
+            self.assertFalse(response.streaming)
+            self.assertEqual(len(response.data['results']), 5)
+
+    def test_stream_disabled_by_default(self):
+        view = StreamingUserListView.as_view(pagination_class=DefaultPagination)
+        response = view(APIRequestFactory().get('/endpoint?stream=true'))
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.data['count'], 25)
+
+
+@ddt.ddt
+class ConditionalPageTestCase(DatabaseTestCase):
+    """
+    Test conditional requests for pages of `DefaultPagination` and `NamespacedPageNumberPagination`
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(get_user_model()(username=f'user_{idx:02}') for idx in range(25))
+
+    def _get(self, paginator_class, query_string='page=2', **headers):
+        paginator_class = type('ConditionalPagination', (paginator_class,), {
+            'page_etag_field': 'date_joined', 'page_size': 5,
+        })
+        view = StreamingUserListView.as_view(pagination_class=paginator_class)
+        with mock.patch.object(
+            UsernameSerializer, 'to_representation', autospec=True, side_effect=lambda __, user: user.username
+        ) as mock_to_representation:
+            response = view(APIRequestFactory().get(f'/endpoint?{query_string}', **headers))
+            response.render()
+        return response, mock_to_representation.call_count
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_not_modified(self, paginator_class):
+        response, serialized_count = self._get(paginator_class)
+        self.assertEqual((response.status_code, serialized_count), (200, 5))
+        etag = response['ETag']
+
+        for if_none_match in (etag, f'"other", W/{etag}', '*'):
+            response, serialized_count = self._get(paginator_class, HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual((response.status_code, serialized_count), (304, 0))
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+    @ddt.data(DefaultPagination, NamespacedPageNumberPagination)
+    def test_modified(self, paginator_class):
+        etag = self._get(paginator_class)[0]['ETag']
+        user = get_user_model().objects.get(username='user_07')
+        user.date_joined -= datetime.timedelta(days=1)
+        user.save()
+
+        response, serialized_count = self._get(paginator_class, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, serialized_count), (200, 5))
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_differs_per_page_and_count(self):
+        etag = self._get(DefaultPagination)[0]['ETag']
+        self.assertNotEqual(self._get(DefaultPagination, query_string='page=3')[0]['ETag'], etag)
+
+        get_user_model().objects.get(username='user_20').delete()
+        self.assertNotEqual(self._get(DefaultPagination)[0]['ETag'], etag)
+
+    def test_disabled_by_default(self):
+        view = StreamingUserListView.as_view(pagination_class=DefaultPagination)
+        response = view(APIRequestFactory().get('/endpoint', HTTP_IF_NONE_MATCH='*'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+class UserKeysetPagination(KeysetPagination):
+    page_size = 4
+    ordering = ('-last_name', 'username')
+
+
+class KeysetPaginationTestCase(DatabaseTestCase):
+    """
+    Test behavior of `KeysetPagination`
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Ties on last_name exercise the unique ordering suffix.
+        for idx in range(10):
+            factories.UserFactory(username=f'user_{idx}', last_name=f'name_{idx // 3}')
+
+    def setUp(self):
+        super().setUp()
+        self.request_factory = RequestFactory()
+        self.expected_usernames = list(
+            get_user_model().objects.order_by('-last_name', 'username', 'pk').values_list('username', flat=True)
+        )
+
+    def _get_page(self, url, paginator=None):
+        paginator = paginator or UserKeysetPagination()
+        request = Request(self.request_factory.get(url))
+        results = paginator.paginate_queryset(get_user_model().objects.all(), request)
+        return [user.username for user in results], paginator.get_paginated_response([]).data
+
+    def _walk(self, url, link):
+        usernames = []
+        while url:
+            page, data = self._get_page(url)
+            usernames.append(page)
+            url = data[link]
+        return usernames
+
+    def test_walk_forward_and_backward(self):
+        forward = self._walk('/endpoint', 'next')
+        self.assertEqual(forward, [
+            self.expected_usernames[0:4], self.expected_usernames[4:8], self.expected_usernames[8:10],
+        ])
+
+        __, last_page = self._get_page(self._get_page(self._get_page('/endpoint')[1]['next'])[1]['next'])
+        self.assertIsNone(last_page['next'])
+        backward = self._walk(last_page['previous'], 'previous')
+        self.assertEqual(backward, [self.expected_usernames[4:8], self.expected_usernames[0:4]])
+
+    def test_datetime_ordering(self):
+        paginator_class = type('DateJoinedKeysetPagination', (KeysetPagination,), {'ordering': ('-date_joined',)})
+        url, usernames = '/endpoint?page_size=3', []
+        while url:
+            page, data = self._get_page(url, paginator=paginator_class())
+            usernames += page
+            url = data['next']
+
+        self.assertEqual(usernames, list(
+            get_user_model().objects.order_by('-date_joined', 'pk').values_list('username', flat=True)
+        ))
+
+    def test_first_page(self):
+        page, data = self._get_page('/endpoint')
+        self.assertEqual(page, self.expected_usernames[:4])
+        self.assertEqual(set(data), {'next', 'previous', 'results'})
+        self.assertIsNone(data['previous'])
+        self.assertTrue(data['next'].startswith('http://testserver/endpoint?cursor='))
+
+    def test_page_size(self):
+        page, __ = self._get_page('/endpoint?page_size=3')
+        self.assertEqual(page, self.expected_usernames[:3])
+
+        paginator = UserKeysetPagination()
+        paginator.max_page_size = 5
+        page, __ = self._get_page('/endpoint?page_size=500', paginator=paginator)
+        self.assertEqual(len(page), 5)
+
+    def test_deep_page_query(self):
+        __, data = self._get_page('/endpoint')
+        with CaptureQueriesContext(connection) as queries:
+            self._get_page(data['next'])
+
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+        self.assertIn('LIMIT 5', sql)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'eyJ4IjogMX0=', 'eyJwIjogWzFdfQ=='):
+            with self.assertRaises(NotFound):
+                self._get_page(f'/endpoint?cursor={cursor}')
+
+    def test_invalid_cursor_values(self):
+        for position in (['abc'], [{'x': 1}], [[1, 2]], [None]):
+            cursor = urlsafe_b64encode(json.dumps({'p': position}).encode('utf8')).decode('ascii')
+            with self.assertRaises(NotFound):
+                self._get_page(f'/endpoint?cursor={cursor}', paginator=KeysetPagination())
+
+        cursor = urlsafe_b64encode(json.dumps({'p': ['name_2', {'x': 1}, 1]}).encode('utf8')).decode('ascii')
+        with self.assertRaises(NotFound):
+            self._get_page(f'/endpoint?cursor={cursor}')
+
+
 def build_mock_object(obj_id):
     """ Build a mock object with the passed id"""
     mock_object = Mock()
@@ -1,10 +1,39 @@
 """ Tests for the OEP-66 queryset-scoping building blocks. """
-from unittest.mock import Mock, sentinel
+import uuid
+from collections import namedtuple
+from itertools import islice
+from unittest.mock import Mock, call, patch, sentinel
 
+import ddt
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
-from django.test import TestCase
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from edx_django_utils.cache import RequestCache
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.permissions import BasePermission
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-from edx_rest_framework_extensions.scoping import ScopedQuerysetMixin
+from edx_rest_framework_extensions.config import ENABLE_SCOPING_INSTRUMENTATION
+from edx_rest_framework_extensions.scoping import (
+    SCOPE_FILTER_EXISTS,
+    SCOPE_FILTER_IN,
+    SCOPE_FILTER_VALUES,
+    AllOf,
+    AnyOf,
+    CachedScopingPolicy,
+    Not,
+    ScopedQuerysetMixin,
+    ScopeSetPolicy,
+    _PolicyCombinator,
+    compile_scope_filter,
+    report_scope_set,
+    scope_many,
+    scope_many_annotated,
+)
 
 
 class _RecordingPolicy:
@@ -18,6 +47,47 @@ class _RecordingPolicy:
         return self.result
 
 
+class _UsernameScopesPolicy:
+    """ A duck-typed resolving policy whose scopes are the usernames in ``grants`` of the subject. """
+    def __init__(self, grants):
+        self.grants = grants
+        self.resolved_subjects = []
+
+    def resolve_scopes(self, subject):
+        self.resolved_subjects.append(subject)
+        return self.grants.get(subject.username, ())
+
+    def get_scope_filter(self, queryset, subject, scopes):
+        return Q(username__in=scopes)
+
+    def scope(self, queryset, subject):
+        return queryset.filter(self.get_scope_filter(queryset, subject, self.resolve_scopes(subject)))
+
+
+class _FieldScopesPolicy:
+    """ A duck-typed resolving policy matching ``field`` against the scopes in ``grants`` of the subject. """
+    def __init__(self, field, grants):
+        self.field = field
+        self.grants = grants
+        self.resolve_count = 0
+
+    def resolve_scopes(self, subject):
+        self.resolve_count += 1
+        return frozenset(self.grants.get(subject.username, ()))
+
+    def get_scope_filter(self, queryset, subject, scopes):
+        return Q(**{f'{self.field}__in': scopes})
+
+    def scope(self, queryset, subject):
+        return queryset.filter(self.get_scope_filter(queryset, subject, self.resolve_scopes(subject)))
+
+
+class _OwnershipPolicy:
+    """ A duck-typed policy that does not resolve scopes, matching the subject's own row only. """
+    def scope(self, queryset, subject):
+        return queryset.filter(pk=subject.pk)
+
+
 class _NotAPolicy:
     """ An object that does not expose a ``scope`` method. """
 
@@ -63,3 +133,660 @@ class ScopedQuerysetMixinTests(TestCase):
         view = self._make_view(policy=Mock(scope="not-callable"))
         with self.assertRaises(ImproperlyConfigured):
             view.get_queryset()
+
+
+@patch('edx_rest_framework_extensions.scoping.increment')
+class CachedScopingPolicyTests(TestCase):
+    """ Tests for ``CachedScopingPolicy``. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(get_user_model()(username=name) for name in ('alice', 'bob', 'eve'))
+        cls.alice = get_user_model().objects.get(username='alice')
+        cls.bob = get_user_model().objects.get(username='bob')
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        RequestCache.clear_all_namespaces()
+        self.policy = _UsernameScopesPolicy({'alice': ('alice', 'eve'), 'bob': ('bob',)})
+
+    def _scoped_usernames(self, policy, subject):
+        return sorted(policy.scope(get_user_model().objects.all(), subject).values_list('username', flat=True))
+
+    def test_scope(self, mock_increment):
+        cached_policy = CachedScopingPolicy(self.policy)
+        self.assertEqual(self._scoped_usernames(cached_policy, self.alice), ['alice', 'eve'])
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob'])
+        self.assertEqual(self._scoped_usernames(cached_policy, self.alice), ['alice', 'eve'])
+        self.assertEqual(self.policy.resolved_subjects, [self.alice, self.bob])
+        self.assertEqual(mock_increment.call_args_list, [
+            call('scoping_scope_cache_misses'),
+            call('scoping_scope_cache_misses'),
+            call('scoping_scope_cache_request_hits'),
+        ])
+
+    def test_cached_across_requests(self, mock_increment):
+        cached_policy = CachedScopingPolicy(self.policy)
+        self.assertEqual(cached_policy.resolve_scopes(self.alice), frozenset(['alice', 'eve']))
+        RequestCache.clear_all_namespaces()
+        self.assertEqual(cached_policy.resolve_scopes(self.alice), frozenset(['alice', 'eve']))
+        self.assertEqual(self.policy.resolved_subjects, [self.alice])
+        mock_increment.assert_called_with('scoping_scope_cache_hits')
+
+    def test_request_only(self, mock_increment):  # pylint: disable=unused-argument
+        cached_policy = CachedScopingPolicy(self.policy, ttl=0)
+        cached_policy.resolve_scopes(self.alice)
+        cached_policy.resolve_scopes(self.alice)
+        RequestCache.clear_all_namespaces()
+        cached_policy.resolve_scopes(self.alice)
+        self.assertEqual(self.policy.resolved_subjects, [self.alice, self.alice])
+
+    def test_ttl_expiry(self, mock_increment):  # pylint: disable=unused-argument
+        cached_policy = CachedScopingPolicy(self.policy, ttl=60)
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1000):
+            cached_policy.resolve_scopes(self.alice)
+        RequestCache.clear_all_namespaces()
+        with patch('django.core.cache.backends.locmem.time.time', return_value=1061):
+            cached_policy.resolve_scopes(self.alice)
+        self.assertEqual(self.policy.resolved_subjects, [self.alice, self.alice])
+
+    def test_invalidate(self, mock_increment):  # pylint: disable=unused-argument
+        cached_policy = CachedScopingPolicy(self.policy)
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob'])
+        self.policy.grants['bob'] = ('bob', 'eve')
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob'])
+
+        cached_policy.invalidate(self.bob)
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob', 'eve'])
+        cached_policy.invalidate(AnonymousUser())
+
+    def test_clear_request_cache(self, mock_increment):  # pylint: disable=unused-argument
+        cached_policy = CachedScopingPolicy(self.policy, ttl=0)
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob'])
+        self.policy.grants['bob'] = ('bob', 'eve')
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob'])
+
+        CachedScopingPolicy.clear_request_cache()
+        self.assertEqual(self._scoped_usernames(cached_policy, self.bob), ['bob', 'eve'])
+
+    def test_keyed_by_name(self, mock_increment):  # pylint: disable=unused-argument
+        other_policy = _UsernameScopesPolicy({'alice': ('bob',)})
+        self.assertEqual(CachedScopingPolicy(self.policy).resolve_scopes(self.alice), frozenset(['alice', 'eve']))
+        self.assertEqual(
+            CachedScopingPolicy(other_policy, name='other').resolve_scopes(self.alice), frozenset(['bob'])
+        )
+
+    def test_keyed_by_cache_key_fragment(self, mock_increment):  # pylint: disable=unused-argument
+        other_policy = _UsernameScopesPolicy({'alice': ('bob',)})
+        other_policy.cache_key_fragment = 'other'
+        self.assertEqual(CachedScopingPolicy(self.policy).resolve_scopes(self.alice), frozenset(['alice', 'eve']))
+        RequestCache.clear_all_namespaces()
+        self.assertEqual(CachedScopingPolicy(other_policy).resolve_scopes(self.alice), frozenset(['bob']))
+
+    def test_subject_without_pk_not_cached(self, mock_increment):
+        anonymous_user = AnonymousUser()
+        cached_policy = CachedScopingPolicy(self.policy)
+        cached_policy.resolve_scopes(anonymous_user)
+        cached_policy.resolve_scopes(anonymous_user)
+        self.assertEqual(self.policy.resolved_subjects, [anonymous_user, anonymous_user])
+        mock_increment.assert_not_called()
+
+    def test_policy_without_resolve_scopes(self, mock_increment):  # pylint: disable=unused-argument
+        policy = _RecordingPolicy(result=sentinel.scoped_qs)
+        self.assertIs(CachedScopingPolicy(policy).scope(sentinel.base_qs, self.alice), sentinel.scoped_qs)
+        self.assertEqual(policy.calls, [(sentinel.base_qs, self.alice)])
+
+    def test_with_scoped_queryset_mixin(self, mock_increment):  # pylint: disable=unused-argument
+        cached_policy = CachedScopingPolicy(self.policy)
+
+        class _BaseView:
+            def get_queryset(self):
+                return get_user_model().objects.all()
+
+        class _View(ScopedQuerysetMixin, _BaseView):
+            request = Mock(user=self.alice)
+            scoping_policy = cached_policy
+
+        for __ in range(3):
+            self.assertEqual(sorted(u.username for u in _View().get_queryset()), ['alice', 'eve'])
+        self.assertEqual(self.policy.resolved_subjects, [self.alice])
+
+
+@ddt.ddt
+@patch('edx_rest_framework_extensions.scoping.set_custom_attribute')
+class CompileScopeFilterTests(TestCase):
+    """ Tests for ``compile_scope_filter``, over a matrix of scope set sizes and strategies on SQLite. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'user_{idx:04}', is_staff=idx % 3 == 0) for idx in range(1000)
+        )
+        cls.user_ids = sorted(get_user_model().objects.values_list('id', flat=True))
+
+    def _scoped_ids(self, scopes, field='id', **kwargs):
+        queryset = get_user_model().objects.all()
+        scope_filter = compile_scope_filter(queryset, field, scopes, **kwargs)
+        return sorted(queryset.filter(scope_filter).values_list('id', flat=True))
+
+    @ddt.data(
+        (10, 500, SCOPE_FILTER_IN),
+        (500, 500, SCOPE_FILTER_IN),
+        (501, 500, SCOPE_FILTER_VALUES),
+        (5000, 500, SCOPE_FILTER_VALUES),
+        (5000, 10000, SCOPE_FILTER_IN),
+    )
+    @ddt.unpack
+    def test_strategy_by_size(self, size, max_in_size, expected_strategy, mock_set_custom_attribute):
+        # Every other user, and ids that do not exist.
+        scopes = set(self.user_ids[::2]) | set(range(-size, 0))
+        scopes = set(sorted(scopes)[-size:])
+        expected_ids = sorted(scopes & set(self.user_ids))
+
+        self.assertEqual(self._scoped_ids(scopes, max_in_size=max_in_size), expected_ids)
+        mock_set_custom_attribute.assert_called_with('scoping_filter_strategy', expected_strategy)
+
+    @ddt.data(10, 2000)
+    def test_values_uses_single_parameter(self, size, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        queryset = get_user_model().objects.all()
+        scope_filter = compile_scope_filter(queryset, 'id', set(range(size)), max_in_size=5)
+        __, params = queryset.filter(scope_filter).query.sql_with_params()
+        self.assertEqual(len(params), 1)
+
+    def test_exists(self, mock_set_custom_attribute):
+        grants = get_user_model().objects.filter(is_staff=True)
+        scoped_ids = self._scoped_ids(self.user_ids, grants=grants, grants_field='pk', max_in_size=5)
+        self.assertEqual(scoped_ids, sorted(grants.values_list('id', flat=True)))
+        mock_set_custom_attribute.assert_called_with('scoping_filter_strategy', SCOPE_FILTER_EXISTS)
+
+    def test_related_field(self, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        queryset = get_user_model().objects.all()
+        self.assertEqual(
+            list(queryset.filter(compile_scope_filter(queryset, 'groups__name', ['missing'] * 10, max_in_size=5))),
+            [],
+        )
+
+    def test_values_converted_as_field(self, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        usernames = [f'user_{idx:04}' for idx in range(0, 1000, 7)]
+        self.assertEqual(
+            self._scoped_ids(usernames + [uuid.uuid4()], field='username', max_in_size=5),
+            sorted(get_user_model().objects.filter(username__in=usernames).values_list('id', flat=True)),
+        )
+
+    @override_settings(EDX_DRF_EXTENSIONS={'SCOPING_MAX_IN_LIST_SIZE': 2})
+    def test_max_in_size_setting(self, mock_set_custom_attribute):
+        self._scoped_ids(self.user_ids[:3])
+        mock_set_custom_attribute.assert_called_with('scoping_filter_strategy', SCOPE_FILTER_VALUES)
+
+
+class PolicyCombinatorTests(TestCase):
+    """ Tests for ``AllOf``, ``AnyOf`` and ``Not``. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=name, first_name=first_name, is_staff=is_staff)
+            for name, first_name, is_staff in (
+                ('alice', 'org_a', True), ('bob', 'org_a', False), ('carol', 'org_b', True), ('dave', 'org_c', False),
+            )
+        )
+        cls.alice = get_user_model().objects.get(username='alice')
+
+    def setUp(self):
+        super().setUp()
+        self.org_policy = _FieldScopesPolicy('first_name', {'alice': ('org_a', 'org_b')})
+        self.user_policy = _FieldScopesPolicy('username', {'alice': ('bob', 'dave')})
+
+    def _scoped_usernames(self, policy, queryset=None):
+        queryset = get_user_model().objects.all() if queryset is None else queryset
+        return sorted(policy.scope(queryset, self.alice).values_list('username', flat=True))
+
+    def test_all_of(self):
+        self.assertEqual(self._scoped_usernames(AllOf(self.org_policy, self.user_policy)), ['bob'])
+
+    def test_any_of(self):
+        self.assertEqual(
+            self._scoped_usernames(AnyOf(self.org_policy, self.user_policy)), ['alice', 'bob', 'carol', 'dave']
+        )
+
+    def test_no_policies(self):
+        for combinator in (AllOf, AnyOf):
+            with self.assertRaises(ImproperlyConfigured):
+                combinator()
+
+    def test_incomplete_combinator(self):
+        class _FirstOf(_PolicyCombinator):
+            def _combine(self, filters):
+                return filters[0]
+
+        with self.assertRaises(TypeError):
+            _FirstOf(self.org_policy)
+
+    def test_not(self):
+        self.assertEqual(self._scoped_usernames(AllOf(self.org_policy, Not(self.user_policy))), ['alice', 'carol'])
+
+    def test_single_where_clause(self):
+        queryset = get_user_model().objects.filter(is_active=True)
+        scoped_queryset = AnyOf(AllOf(self.org_policy, Not(self.user_policy)), self.user_policy).scope(
+            queryset, self.alice
+        )
+        expected_queryset = queryset.filter(
+            (Q(first_name__in={'org_a', 'org_b'}) & ~Q(username__in={'bob', 'dave'})) |
+            Q(username__in={'bob', 'dave'})
+        )
+        self.assertEqual(str(scoped_queryset.query), str(expected_queryset.query))
+        self.assertNotIn('SELECT', str(scoped_queryset.query).split('WHERE', 1)[1])
+
+    def test_shared_resolution(self):
+        policy = AnyOf(AllOf(self.org_policy, self.user_policy), AllOf(self.org_policy, Not(self.user_policy)))
+        with self.assertNumQueries(1):
+            self.assertEqual(self._scoped_usernames(policy), ['alice', 'bob', 'carol'])
+        self.assertEqual((self.org_policy.resolve_count, self.user_policy.resolve_count), (1, 1))
+
+    def test_policy_without_resolve_scopes(self):
+        policy = AnyOf(self.user_policy, _OwnershipPolicy())
+        with self.assertNumQueries(1):
+            self.assertEqual(self._scoped_usernames(policy), ['alice', 'bob', 'dave'])
+
+        queryset = get_user_model().objects.filter(is_staff=True)
+        self.assertEqual(self._scoped_usernames(policy, queryset), ['alice'])
+
+    def test_cached_policy_without_resolve_scopes(self):
+        policy = AnyOf(self.user_policy, CachedScopingPolicy(_OwnershipPolicy()))
+        self.assertEqual(self._scoped_usernames(policy), ['alice', 'bob', 'dave'])
+
+    @patch('edx_rest_framework_extensions.scoping.increment')
+    def test_cached(self, mock_increment):  # pylint: disable=unused-argument
+        caches['default'].clear()
+        RequestCache.clear_all_namespaces()
+        policy = CachedScopingPolicy(
+            AllOf(CachedScopingPolicy(self.org_policy, name='org'), self.user_policy), name='org_and_user'
+        )
+        for __ in range(2):
+            self.assertEqual(self._scoped_usernames(policy), ['bob'])
+        self.assertEqual((self.org_policy.resolve_count, self.user_policy.resolve_count), (1, 1))
+
+    @patch('edx_rest_framework_extensions.scoping.increment')
+    def test_cached_combinators_do_not_share_scopes(self, mock_increment):  # pylint: disable=unused-argument
+        RequestCache.clear_all_namespaces()
+        org_policy = CachedScopingPolicy(AllOf(self.org_policy), ttl=0)
+        user_policy = CachedScopingPolicy(AllOf(self.user_policy), ttl=0)
+        self.assertEqual(self._scoped_usernames(org_policy), ['alice', 'bob', 'carol'])
+        self.assertEqual(self._scoped_usernames(user_policy), ['bob', 'dave'])
+
+    def test_cached_combinator_requires_name(self):
+        with self.assertRaises(ImproperlyConfigured):
+            CachedScopingPolicy(AnyOf(self.org_policy, self.user_policy))
+
+
+class _UsernameScopeSetPolicy(ScopeSetPolicy):
+    """ A ``ScopeSetPolicy`` whose scopes are the usernames in ``grants`` of the subject. """
+    scope_field = 'username'
+
+    def __init__(self, grants):
+        self.grants = grants
+
+    def resolve_scopes(self, subject):
+        return frozenset(self.grants.get(subject.username, ()))
+
+
+class _UserSerializer(ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ('username',)
+
+
+class _DenyStaff(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return not obj.is_staff
+
+
+class ScopedGetObjectTests(TestCase):
+    """ Tests for ``ScopedQuerysetMixin.get_object`` and the ``contains`` of policies. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=name, is_staff=name == 'carol') for name in ('alice', 'bob', 'carol', 'dave')
+        )
+        cls.users = {user.username: user for user in get_user_model().objects.all()}
+
+    def setUp(self):
+        super().setUp()
+        self.policy = _UsernameScopeSetPolicy({'alice': ('alice', 'bob', 'carol')})
+
+    def _retrieve(self, policy, username, permission_classes=(), **attributes):
+        view = type('_View', (ScopedQuerysetMixin, RetrieveAPIView), {
+            'queryset': get_user_model().objects.all(),
+            'serializer_class': _UserSerializer,
+            'scoping_policy': policy,
+            'permission_classes': permission_classes,
+            **attributes,
+        }).as_view()
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.users['alice'])
+        return view(request, pk=self.users[username].pk)
+
+    def test_resolve_scopes_is_abstract(self):
+        class IncompletePolicy(ScopeSetPolicy):  # pylint: disable=abstract-method
+            scope_field = 'username'
+
+        with self.assertRaises(TypeError):
+            IncompletePolicy()  # pylint: disable=abstract-class-instantiated
+
+    def test_visible_without_scoped_query(self):
+        with self.assertNumQueries(1):
+            response = self._retrieve(self.policy, 'bob')
+        self.assertEqual((response.status_code, response.data), (200, {'username': 'bob'}))
+
+    def test_not_visible(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self._retrieve(self.policy, 'dave').status_code, 404)
+
+    def test_not_visible_before_object_permissions(self):
+        self.assertEqual(self._retrieve(self.policy, 'carol', permission_classes=(_DenyStaff,)).status_code, 403)
+        self.policy.grants['alice'] = ('alice',)
+        self.assertEqual(self._retrieve(self.policy, 'carol', permission_classes=(_DenyStaff,)).status_code, 404)
+
+    def test_not_visible_with_overridden_object_permissions(self):
+        def check_object_permissions(view, request, obj):  # pylint: disable=unused-argument
+            pass
+
+        with self.assertNumQueries(1):
+            response = self._retrieve(self.policy, 'dave', check_object_permissions=check_object_permissions)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            self._retrieve(self.policy, 'bob', check_object_permissions=check_object_permissions).status_code, 200
+        )
+
+    def test_policy_without_contains(self):
+        policy = _FieldScopesPolicy('username', {'alice': ('bob',)})
+        with self.assertNumQueries(1):
+            self.assertEqual(self._retrieve(policy, 'bob').status_code, 200)
+        self.assertEqual(self._retrieve(policy, 'dave').status_code, 404)
+
+    def test_contains_unknown_falls_back_to_scoped_queryset(self):
+        policy = AnyOf(self.policy, _OwnershipPolicy())
+        with self.assertNumQueries(1):
+            self.assertEqual(self._retrieve(policy, 'bob').status_code, 200)
+        with self.assertNumQueries(2):
+            self.assertEqual(self._retrieve(policy, 'dave').status_code, 404)
+        self.assertEqual(self._retrieve(AllOf(self.policy, _OwnershipPolicy()), 'alice').status_code, 200)
+
+    def test_combinator_contains(self):
+        alice, other_policy = self.users['alice'], _UsernameScopeSetPolicy({'alice': ('bob', 'dave')})
+        expected = {
+            'alice': (False, True, True, False),
+            'bob': (True, True, False, False),
+            'dave': (False, True, False, True),
+        }
+        for username, expected_memberships in expected.items():
+            obj = self.users[username]
+            self.assertEqual((
+                AllOf(self.policy, other_policy).contains(obj, alice),
+                AnyOf(self.policy, other_policy).contains(obj, alice),
+                AllOf(self.policy, Not(other_policy)).contains(obj, alice),
+                Not(self.policy).contains(obj, alice),
+            ), expected_memberships)
+        self.assertIsNone(Not(_OwnershipPolicy()).contains(self.users['bob'], alice))
+
+    @patch('edx_rest_framework_extensions.scoping.increment')
+    def test_cached_policy(self, mock_increment):
+        caches['default'].clear()
+        RequestCache.clear_all_namespaces()
+        policy = CachedScopingPolicy(self.policy)
+        self.assertEqual(self._retrieve(policy, 'bob').status_code, 200)
+        self.assertEqual(self._retrieve(policy, 'dave').status_code, 404)
+        mock_increment.assert_called_with('scoping_scope_cache_request_hits')
+        self.assertIsNone(CachedScopingPolicy(_OwnershipPolicy()).contains(self.users['bob'], self.users['alice']))
+
+    def test_scope_set_policy_related_field(self):
+        policy = _UsernameScopeSetPolicy({'alice': ('alice',)})
+        policy.scope_field = 'missing__username'
+        self.assertFalse(policy.contains(self.users['alice'], self.users['alice']))
+
+    def test_scope_set_policy_contains_converts_values(self):
+        bob = self.users['bob']
+        policy = _UsernameScopeSetPolicy({})
+        for scope_field in ('id', 'pk'):
+            policy.scope_field = scope_field
+            policy.grants = {'alice': (str(bob.pk),)}
+            self.assertTrue(policy.contains(bob, self.users['alice']))
+            self.assertEqual(list(policy.scope(get_user_model().objects.all(), self.users['alice'])), [bob])
+            policy.grants = {'alice': ('not-an-id',)}
+            self.assertIsNone(policy.contains(bob, self.users['alice']))
+
+    def test_scope_set_policy_scope(self):
+        scoped_queryset = self.policy.scope(get_user_model().objects.all(), self.users['alice'])
+        self.assertEqual(sorted(user.username for user in scoped_queryset), ['alice', 'bob', 'carol'])
+
+
+class _ReportingPolicy(_OwnershipPolicy):
+    """ A policy implementing ``scope`` itself, that reports its scope set. """
+    def scope(self, queryset, subject):
+        report_scope_set(['a', 'b'])
+        return super().scope(queryset, subject)
+
+
+@patch('edx_rest_framework_extensions.scoping.set_custom_attribute')
+class ScopingInstrumentationTests(TestCase):
+    """ Tests for the instrumentation of ``ScopedQuerysetMixin``. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(get_user_model()(username=name) for name in ('alice', 'bob', 'carol'))
+        cls.alice = get_user_model().objects.get(username='alice')
+
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+        self.policy = _UsernameScopeSetPolicy({'alice': ('alice', 'bob', 'carol')})
+
+    def _list(self, policy):
+        view = type('_View', (ScopedQuerysetMixin, ListAPIView), {
+            'queryset': get_user_model().objects.order_by('username'),
+            'serializer_class': _UserSerializer,
+            'scoping_policy': policy,
+            'permission_classes': (),
+        }).as_view()
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=self.alice)
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _get_scoping_attributes(self, mock_set_custom_attribute):
+        return {
+            c.args[0]: c.args[1] for c in mock_set_custom_attribute.call_args_list
+            if c.args[0] != 'scoping_filter_strategy'
+        }
+
+    def test_disabled(self, mock_set_custom_attribute):
+        self._list(self.policy)
+        self.assertEqual(self._get_scoping_attributes(mock_set_custom_attribute), {})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    @patch('edx_rest_framework_extensions.scoping.time.perf_counter', side_effect=[1.0, 1.125, 1.375, 1.5])
+    def test_resolving_policy(self, mock_perf_counter, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        self._list(self.policy)
+        self.assertEqual(self._get_scoping_attributes(mock_set_custom_attribute), {
+            'scoping_policy_ms': 500.0,
+            'scoping_resolution_ms': 250.0,
+            'scoping_scope_set_size': 3,
+        })
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    def test_combined_policy(self, mock_set_custom_attribute):
+        other_policy = _UsernameScopeSetPolicy({'alice': ('bob',)})
+        self._list(CachedScopingPolicy(AnyOf(self.policy, Not(other_policy), _OwnershipPolicy()), ttl=0))
+        attributes = self._get_scoping_attributes(mock_set_custom_attribute)
+        self.assertEqual(set(attributes), {'scoping_policy_ms', 'scoping_resolution_ms', 'scoping_scope_set_size'})
+        self.assertEqual(attributes['scoping_scope_set_size'], 4)
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    def test_policy_not_reporting(self, mock_set_custom_attribute):
+        self._list(_OwnershipPolicy())
+        self.assertEqual(set(self._get_scoping_attributes(mock_set_custom_attribute)), {'scoping_policy_ms'})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    def test_policy_reporting_without_duration(self, mock_set_custom_attribute):
+        self._list(_ReportingPolicy())
+        self.assertEqual(self._get_scoping_attributes(mock_set_custom_attribute).keys(), {
+            'scoping_policy_ms', 'scoping_scope_set_size',
+        })
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    def test_reported_outside_view(self, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        self._list(self.policy)
+        for __ in range(3):
+            _ReportingPolicy().scope(get_user_model().objects.all(), self.alice)
+            self.policy.scope(get_user_model().objects.all(), self.alice)
+        self.assertEqual(RequestCache('edx_rest_framework_extensions.scoping').data, {})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True, 'SCOPING_EXPLAIN_SAMPLE_RATE': 1})
+    def test_explain_sampled(self, mock_set_custom_attribute):
+        with self.assertLogs('edx_rest_framework_extensions.scoping', level='INFO') as logs:
+            self._list(self.policy)
+        mock_set_custom_attribute.assert_any_call('scoping_explain_sampled', True)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Scoped query of _View: SELECT', logs.output[0])
+        self.assertIn('ORDER BY', logs.output[0])
+        self.assertIn('EXPLAIN:', logs.output[0])
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True, 'SCOPING_EXPLAIN_SAMPLE_RATE': 1})
+    def test_explain_no_rows(self, mock_set_custom_attribute):  # pylint: disable=unused-argument
+        with self.assertLogs('edx_rest_framework_extensions.scoping', level='INFO') as logs:
+            self._list(_UsernameScopeSetPolicy({}))
+        self.assertEqual(logs.output, [
+            'INFO:edx_rest_framework_extensions.scoping:Scoped query of _View matches no rows.',
+        ])
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_SCOPING_INSTRUMENTATION: True})
+    def test_explain_not_sampled(self, mock_set_custom_attribute):
+        with self.assertNoLogs('edx_rest_framework_extensions.scoping', level='INFO'):
+            self._list(self.policy)
+        self.assertNotIn('scoping_explain_sampled', self._get_scoping_attributes(mock_set_custom_attribute))
+
+
+_Subject = namedtuple('_Subject', ['pk', 'username'])
+
+
+class _BulkUsernameScopeSetPolicy(_UsernameScopeSetPolicy):
+    """ A ``ScopeSetPolicy`` resolving the scope sets of many subjects in bulk. """
+    def __init__(self, grants):
+        super().__init__(grants)
+        self.batch_sizes = []
+
+    def resolve_scopes_many(self, subjects):
+        self.batch_sizes.append(len(subjects))
+        return {subject: frozenset(self.grants.get(subject.username, ())) for subject in subjects}
+
+
+class ScopeManyTests(TestCase):
+    """ Tests for ``scope_many`` and ``scope_many_annotated``. """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        get_user_model().objects.bulk_create(get_user_model()(username=name) for name in ('alice', 'bob', 'carol'))
+        cls.users = {user.username: user for user in get_user_model().objects.all()}
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        self.grants = {'alice': ('alice', 'bob'), 'bob': ('bob',), 'carol': ()}
+        self.policy = _BulkUsernameScopeSetPolicy(self.grants)
+
+    def _scoped_usernames(self, pairs):
+        return {
+            subject.username: sorted(scoped_queryset.values_list('username', flat=True))
+            for subject, scoped_queryset in pairs
+        }
+
+    def test_scope_many(self):
+        pairs = scope_many(self.policy, get_user_model().objects.all(), self.users.values())
+        self.assertEqual(self._scoped_usernames(pairs), {'alice': ['alice', 'bob'], 'bob': ['bob'], 'carol': []})
+        self.assertEqual(self.policy.batch_sizes, [3])
+
+    def test_batches(self):
+        subjects = (_Subject(pk=idx, username=f'user_{idx}') for idx in range(10000))
+        with self.assertNumQueries(0):
+            scoped_querysets = dict(scope_many(self.policy, get_user_model().objects.all(), subjects, batch_size=400))
+        self.assertEqual(len(scoped_querysets), 10000)
+        self.assertEqual(self.policy.batch_sizes, [400] * 25)
+
+    def test_lazy(self):
+        subjects = (_Subject(pk=idx, username=f'user_{idx}') for idx in range(1000))
+        pairs = scope_many(self.policy, get_user_model().objects.all(), subjects, batch_size=10)
+        self.assertEqual(len(list(islice(pairs, 15))), 15)
+        self.assertEqual(self.policy.batch_sizes, [10, 10])
+
+    @override_settings(EDX_DRF_EXTENSIONS={'SCOPING_SCOPE_MANY_BATCH_SIZE': 2})
+    def test_batch_size_setting(self):
+        list(scope_many(self.policy, get_user_model().objects.all(), self.users.values()))
+        self.assertEqual(self.policy.batch_sizes, [2, 1])
+
+    def test_without_resolve_scopes_many(self):
+        policy = _UsernameScopeSetPolicy(self.grants)
+        pairs = scope_many(policy, get_user_model().objects.all(), self.users.values())
+        self.assertEqual(self._scoped_usernames(pairs), {'alice': ['alice', 'bob'], 'bob': ['bob'], 'carol': []})
+
+    def test_policy_without_resolve_scopes(self):
+        pairs = scope_many(_OwnershipPolicy(), get_user_model().objects.all(), self.users.values())
+        self.assertEqual(self._scoped_usernames(pairs), {'alice': ['alice'], 'bob': ['bob'], 'carol': ['carol']})
+
+    def test_policy_scope_many(self):
+        policy = Mock(spec=['scope', 'scope_many'])
+        policy.scope_many.return_value = iter([(sentinel.subject, sentinel.scoped_qs)])
+        self.assertEqual(
+            list(scope_many(policy, sentinel.base_qs, [sentinel.subject])), [(sentinel.subject, sentinel.scoped_qs)]
+        )
+        policy.scope_many.assert_called_once_with(sentinel.base_qs, [sentinel.subject])
+
+    def test_cached_policy(self):
+        cached_policy = CachedScopingPolicy(self.policy)
+        subjects = list(self.users.values()) + [AnonymousUser()]
+        for __ in range(2):
+            scoped_querysets = dict(scope_many(cached_policy, get_user_model().objects.all(), subjects))
+            self.assertEqual(len(scoped_querysets), 4)
+        # Only the subject without a primary key is resolved again.
+        self.assertEqual(self.policy.batch_sizes, [4, 1])
+        self.assertEqual(cached_policy.resolve_scopes(self.users['alice']), frozenset(['alice', 'bob']))
+        self.assertEqual(self.policy.batch_sizes, [4, 1])
+
+    def test_combined_policy(self):
+        policy = AnyOf(AllOf(self.policy, _OwnershipPolicy()), Not(CachedScopingPolicy(self.policy, ttl=0)))
+        pairs = scope_many(policy, get_user_model().objects.all(), self.users.values())
+        self.assertEqual(self._scoped_usernames(pairs), {
+            'alice': ['alice', 'carol'], 'bob': ['alice', 'bob', 'carol'], 'carol': ['alice', 'bob', 'carol'],
+        })
+        self.assertEqual(self.policy.batch_sizes, [3, 3])
+
+    def test_scope_many_annotated(self):
+        self.grants['carol'] = ('carol',)
+        querysets = list(scope_many_annotated(
+            self.policy, get_user_model().objects.order_by('username'), self.users.values(), batch_size=2
+        ))
+        self.assertEqual(len(querysets), 2)
+        with self.assertNumQueries(2):
+            rows = sorted(
+                (user.scoped_subject_id, user.username) for queryset in querysets for user in queryset
+            )
+        self.assertEqual(rows, sorted([
+            (self.users['alice'].pk, 'alice'), (self.users['alice'].pk, 'bob'), (self.users['bob'].pk, 'bob'),
+            (self.users['carol'].pk, 'carol'),
+        ]))
+
+    def test_get_scoped_querysets(self):
+        view = type('_View', (ScopedQuerysetMixin, ListAPIView), {
+            'queryset': get_user_model().objects.all(),
+            'scoping_policy': self.policy,
+        })()
+        pairs = view.get_scoped_querysets([self.users['alice'], self.users['bob']])
+        self.assertEqual(self._scoped_usernames(pairs), {'alice': ['alice', 'bob'], 'bob': ['bob']})
@@ -0,0 +1,191 @@
+""" Tests for request phase timing. """
+import pickle
+from unittest.mock import patch
+
+from django.template.response import SimpleTemplateResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import re_path as url_pattern
+from edx_django_utils.cache import RequestCache
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import IntegerField, Serializer
+
+from edx_rest_framework_extensions.config import ENABLE_REQUEST_PHASE_TIMING
+from edx_rest_framework_extensions.paginators import DefaultPagination
+from edx_rest_framework_extensions.permissions import NotJwtRestrictedApplication
+from edx_rest_framework_extensions.timing import (
+    PHASE_PERMISSIONS,
+    PHASE_RENDERING,
+    PermissionTimingMixin,
+    get_phase_durations_ms,
+    phase_timer,
+    time_response_rendering,
+    timed_phase,
+)
+
+
+class NumberSerializer(Serializer):  # pylint: disable=abstract-method
+    number = IntegerField()
+
+
+class NumberListView(PermissionTimingMixin, ListAPIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny, NotJwtRestrictedApplication)
+    pagination_class = DefaultPagination
+    serializer_class = NumberSerializer
+
+    def get_queryset(self):
+        return [{'number': number} for number in range(25)]
+
+
+urlpatterns = [
+    url_pattern(r'^numbers/$', NumberListView.as_view()),
+]
+
+
+@timed_phase(PHASE_PERMISSIONS)
+def _timed_function(nested=False):
+    if nested:
+        return _timed_function()
+    return 'result'
+
+
+class PhaseTimingTests(TestCase):
+    """ Tests for the phase timing helpers. """
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+
+    def test_timed_phase_disabled(self):
+        self.assertEqual(_timed_function(), 'result')
+        self.assertEqual(get_phase_durations_ms(), {})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_REQUEST_PHASE_TIMING: True})
+    @patch('edx_rest_framework_extensions.timing.time.perf_counter', side_effect=[1.0, 1.5, 2.0, 2.25])
+    def test_timed_phase_enabled(self, mock_perf_counter):  # pylint: disable=unused-argument
+        self.assertEqual(_timed_function(), 'result')
+        self.assertEqual(_timed_function(), 'result')
+        self.assertEqual(get_phase_durations_ms(), {PHASE_PERMISSIONS: 750.0})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_REQUEST_PHASE_TIMING: True})
+    @patch('edx_rest_framework_extensions.timing.time.perf_counter', side_effect=[1.0, 1.5])
+    def test_nested_phase_counted_once(self, mock_perf_counter):
+        self.assertEqual(_timed_function(nested=True), 'result')
+        self.assertEqual(mock_perf_counter.call_count, 2)
+        self.assertEqual(get_phase_durations_ms(), {PHASE_PERMISSIONS: 500.0})
+
+    @patch('edx_rest_framework_extensions.timing.time.perf_counter', side_effect=[1.0, 1.25])
+    def test_phase_timer_records_on_exception(self, mock_perf_counter):  # pylint: disable=unused-argument
+        with self.assertRaises(ValueError):
+            with phase_timer(PHASE_PERMISSIONS):
+                raise ValueError
+        self.assertEqual(get_phase_durations_ms(), {PHASE_PERMISSIONS: 250.0})
+
+    @patch('edx_rest_framework_extensions.timing.time.perf_counter', side_effect=[1.0, 1.125])
+    def test_time_response_rendering(self, mock_perf_counter):  # pylint: disable=unused-argument
+        response = SimpleTemplateResponse(template='unused')
+        time_response_rendering(response)
+        self.assertEqual(get_phase_durations_ms(), {})
+
+        with patch.object(SimpleTemplateResponse, 'rendered_content', 'content'):
+            response.render()
+        self.assertEqual(get_phase_durations_ms(), {PHASE_RENDERING: 125.0})
+        pickle.dumps(response)
+
+    @patch('edx_rest_framework_extensions.timing.time.perf_counter', side_effect=[1.0, 1.125])
+    def test_time_drf_response_rendering(self, mock_perf_counter):
+        renderer = JSONRenderer()
+        response = Response({'number': 1})
+        response.accepted_renderer = renderer
+        response.accepted_media_type = renderer.media_type
+        response.renderer_context = {}
+        time_response_rendering(response)
+        # The clock only starts when the renderer is called, not when the response is returned by the view.
+        self.assertEqual(mock_perf_counter.call_count, 0)
+
+        response.render()
+        self.assertEqual(response.content, b'{"number":1}')
+        self.assertIs(response.accepted_renderer, renderer)
+        self.assertEqual(get_phase_durations_ms(), {PHASE_RENDERING: 125.0})
+        pickle.dumps(response)
+
+
+class PermissionTimingMixinTests(TestCase):
+    """ Tests for PermissionTimingMixin. """
+    def setUp(self):
+        super().setUp()
+        RequestCache.clear_all_namespaces()
+        self.view = NumberListView()
+        self.request = Request(RequestFactory().get('/'))
+
+    def test_disabled(self):
+        self.view.check_permissions(self.request)
+        self.view.check_object_permissions(self.request, object())
+        self.assertEqual(get_phase_durations_ms(), {})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_REQUEST_PHASE_TIMING: True})
+    @patch(
+        'edx_rest_framework_extensions.timing.time.perf_counter',
+        side_effect=[1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 10.0, 10.125, 10.25, 10.5, 10.75, 11.0],
+    )
+    def test_timed_per_permission_class(self, mock_perf_counter):  # pylint: disable=unused-argument
+        self.view.check_permissions(self.request)
+        self.view.check_object_permissions(self.request, object())
+        self.assertEqual(get_phase_durations_ms(), {
+            'permission_AllowAny': 375.0,
+            'permission_NotJwtRestrictedApplication': 750.0,
+            PHASE_PERMISSIONS: 3000.0,
+        })
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_REQUEST_PHASE_TIMING: True})
+    def test_denied(self):
+        with patch.object(NotJwtRestrictedApplication, 'has_permission', return_value=False):
+            with self.assertRaises(PermissionDenied):
+                self.view.check_permissions(self.request)
+        self.assertEqual(
+            set(get_phase_durations_ms()),
+            {'permission_AllowAny', 'permission_NotJwtRestrictedApplication', PHASE_PERMISSIONS},
+        )
+
+
+@override_settings(
+    ROOT_URLCONF='edx_rest_framework_extensions.tests.test_timing',
+    MIDDLEWARE=(
+        'edx_django_utils.cache.middleware.RequestCacheMiddleware',
+        'edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware',
+    ),
+)
+class RequestPhaseTimingAttributesTests(TestCase):
+    """ Tests the request phase custom attributes set by RequestCustomAttributesMiddleware. """
+
+    def _get_phase_attributes(self):
+        with patch('edx_django_utils.monitoring.set_custom_attribute') as mock_set_custom_attribute:
+            response = Client().get('/numbers/')
+        self.assertEqual(response.status_code, 200)
+        return {
+            c.args[0]: c.args[1] for c in mock_set_custom_attribute.call_args_list
+            if c.args[0].startswith('request_phase_')
+        }
+
+    def test_disabled(self):
+        self.assertEqual(self._get_phase_attributes(), {})
+
+    @override_settings(EDX_DRF_EXTENSIONS={ENABLE_REQUEST_PHASE_TIMING: True})
+    def test_enabled(self):
+        phase_attributes = self._get_phase_attributes()
+        self.assertEqual(
+            set(phase_attributes),
+            {
+                'request_phase_permissions_ms',
+                'request_phase_permission_AllowAny_ms',
+                'request_phase_permission_NotJwtRestrictedApplication_ms',
+                'request_phase_pagination_ms',
+                'request_phase_rendering_ms',
+            },
+        )
+        for duration_ms in phase_attributes.values():
+            self.assertGreaterEqual(duration_ms, 0)
@@ -0,0 +1,208 @@
+"""
+Request phase timing for DRF endpoints.
+
+When the toggle EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled, the time spent in each of the
+following phases is accumulated for the current request, and reported in milliseconds as custom attributes by
+:class:`~edx_rest_framework_extensions.middleware.RequestCustomAttributesMiddleware`:
+
+* ``authentication``: ``JwtAuthentication.authenticate``.
+* ``permissions``: ``check_permissions`` and ``check_object_permissions`` of views using
+  :class:`PermissionTimingMixin`.
+* ``permission_<class name>``: ``has_permission`` and ``has_object_permission`` of each permission class of views
+  using :class:`PermissionTimingMixin`, e.g. ``permission_IsAuthenticated``.
+* ``scoping``: ``ScopedQuerysetMixin.get_queryset``.
+* ``pagination``: ``paginate_queryset`` and ``get_paginated_response`` of the paginators in this package.
+* ``rendering``: the renderer of a DRF ``Response``, or the rendering of another template response.
+
+When the toggle is disabled, the only overhead is the check of the setting.
+"""
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from edx_django_utils.cache import RequestCache
+
+from edx_rest_framework_extensions.config import ENABLE_REQUEST_PHASE_TIMING
+from edx_rest_framework_extensions.settings import get_setting
+
+
+# .. custom_attribute_name: request_phase_authentication_ms
+# .. custom_attribute_description: Milliseconds spent in JwtAuthentication.authenticate for the request. Only set if
+#      EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled.
+PHASE_AUTHENTICATION = 'authentication'
+# .. custom_attribute_name: request_phase_permissions_ms
+# .. custom_attribute_description: Milliseconds spent checking the permissions and object permissions of a view using
+#      PermissionTimingMixin for the request. Only set if EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled.
+PHASE_PERMISSIONS = 'permissions'
+# .. custom_attribute_name: request_phase_permission_<class name>_ms
+# .. custom_attribute_description: Milliseconds spent in has_permission and has_object_permission of the named
+#      permission class of a view using PermissionTimingMixin for the request, e.g.
+#      request_phase_permission_IsAuthenticated_ms. Only set if EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is
+#      enabled.
+PHASE_PERMISSION_PREFIX = 'permission_'
+# .. custom_attribute_name: request_phase_scoping_ms
+# .. custom_attribute_description: Milliseconds spent in ScopedQuerysetMixin.get_queryset for the request. Only set if
+#      EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled.
+PHASE_SCOPING = 'scoping'
+# .. custom_attribute_name: request_phase_pagination_ms
+# .. custom_attribute_description: Milliseconds spent in paginate_queryset and get_paginated_response of this
+#      package's paginators for the request. Only set if EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled.
+PHASE_PAGINATION = 'pagination'
+# .. custom_attribute_name: request_phase_rendering_ms
+# .. custom_attribute_description: Milliseconds spent rendering the response. Only set if
+#      EDX_DRF_EXTENSIONS[ENABLE_REQUEST_PHASE_TIMING] is enabled.
+PHASE_RENDERING = 'rendering'
+
+_REQUEST_CACHE_NAMESPACE = 'edx_rest_framework_extensions.timing'
+_DURATIONS_CACHE_KEY = 'durations'
+_IN_PROGRESS_CACHE_KEY = 'in_progress'
+
+
+def is_request_phase_timing_enabled():
+    """
+    Returns True if request phase timing is enabled.
+    """
+    return get_setting(ENABLE_REQUEST_PHASE_TIMING)
+
+
+@contextmanager
+def phase_timer(phase):
+    """
+    Context manager that adds the time spent in its block to the given phase of the current request.
+
+    Nested blocks for the same phase (e.g. a permission class that calls another permission class) are only
+    counted once.
+    """
+    request_cache = _get_request_cache()
+    in_progress = request_cache.setdefault(_IN_PROGRESS_CACHE_KEY, set())
+    if phase in in_progress:
+        yield
+        return
+
+    in_progress.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        in_progress.discard(phase)
+        _add_phase_duration(phase, time.perf_counter() - start)
+
+
+def timed_phase(phase):
+    """
+    Decorator that adds the time spent in the decorated function to the given phase of the current request,
+    if request phase timing is enabled.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_request_phase_timing_enabled():
+                return func(*args, **kwargs)
+            with phase_timer(phase):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def time_response_rendering(response):
+    """
+    Adds the time spent rendering the given (not yet rendered) template response to the rendering phase.
+
+    For a DRF ``Response``, the call to its renderer is timed, and the renderer is restored once rendered. For other
+    template responses, the time from this call until rendering completes is used. The response is not otherwise
+    modified, so it can still be pickled, e.g. by ``cache_page``.
+    """
+    renderer = getattr(response, 'accepted_renderer', None)
+    if renderer is not None:
+        response.accepted_renderer = _TimedRenderer(renderer)
+
+        def _restore_renderer(rendered_response):
+            rendered_response.accepted_renderer = renderer
+
+        response.add_post_render_callback(_restore_renderer)
+        return
+
+    start = time.perf_counter()
+
+    def _add_rendering_duration(rendered_response):  # pylint: disable=unused-argument
+        _add_phase_duration(PHASE_RENDERING, time.perf_counter() - start)
+
+    response.add_post_render_callback(_add_rendering_duration)
+
+
+class _TimedRenderer:
+    """
+    Wraps a DRF renderer, adding the time spent in its ``render`` to the rendering phase.
+    """
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    def __getattr__(self, name):
+        return getattr(self.renderer, name)
+
+    def render(self, *args, **kwargs):
+        with phase_timer(PHASE_RENDERING):
+            return self.renderer.render(*args, **kwargs)
+
+
+class PermissionTimingMixin:
+    """
+    View mixin that times the permission checks of a DRF view, if request phase timing is enabled.
+
+    The whole of ``check_permissions`` and ``check_object_permissions`` is added to the ``permissions`` phase, and
+    each permission class's ``has_permission`` and ``has_object_permission`` to its own
+    ``permission_<class name>`` phase, so a slow permission class can be told apart from the others.
+    """
+
+    def get_permissions(self):
+        permissions = super().get_permissions()
+        if is_request_phase_timing_enabled():
+            for permission in permissions:
+                _time_permission(permission)
+        return permissions
+
+    def check_permissions(self, request):
+        if not is_request_phase_timing_enabled():
+            return super().check_permissions(request)
+        with phase_timer(PHASE_PERMISSIONS):
+            return super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        if not is_request_phase_timing_enabled():
+            return super().check_object_permissions(request, obj)
+        with phase_timer(PHASE_PERMISSIONS):
+            return super().check_object_permissions(request, obj)
+
+
+def _time_permission(permission):
+    """
+    Times the permission checks of the given permission instance, in the phase of its class.
+    """
+    phase = PHASE_PERMISSION_PREFIX + type(permission).__name__
+    for method_name in ('has_permission', 'has_object_permission'):
+        method = getattr(permission, method_name)
+
+        def _timed_method(*args, _method=method, **kwargs):
+            with phase_timer(phase):
+                return _method(*args, **kwargs)
+
+        setattr(permission, method_name, _timed_method)
+
+
+def get_phase_durations_ms():
+    """
+    Returns a dict mapping each timed phase of the current request to its duration in milliseconds.
+    """
+    return {
+        phase: round(duration * 1000, 3)
+        for phase, duration in _get_request_cache().get(_DURATIONS_CACHE_KEY, {}).items()
+    }
+
+
+def _add_phase_duration(phase, duration):
+    durations = _get_request_cache().setdefault(_DURATIONS_CACHE_KEY, {})
+    durations[phase] = durations.get(phase, 0.0) + duration
+
+
+def _get_request_cache():
+    return RequestCache(_REQUEST_CACHE_NAMESPACE).data
@@ -143,5 +143,8 @@ setup(
     ],
     packages=find_packages(exclude=["tests"]),
     install_requires=load_requirements('requirements/base.in'),
+    extras_require={
+        'async': load_requirements('requirements/async.in'),
+    },
     tests_require=load_requirements('requirements/test.in'),
 )